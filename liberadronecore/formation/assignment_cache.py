@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from liberadronecore.util import image_util
+
+
+# Coordinates are hashed on this grid so float noise from re-evaluation does not miss.
+QUANTUM = 1e-4
+_FORMAT = 1
+_SUBDIR = "Pairing"
+_MEMORY_LIMIT = 16
+# Recently used assignments by slot, for unsaved files and repeated solves in one session.
+_MEMORY: "OrderedDict[str, Tuple[str, np.ndarray, np.ndarray]]" = OrderedDict()
+
+
+def _quantized(points: np.ndarray) -> np.ndarray:
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return np.rint(pts / QUANTUM).astype(np.int64)
+
+
+def assignment_key(
+    pts_prev: np.ndarray,
+    pts_next: np.ndarray,
+    ids: Optional[Sequence[int]],
+    options: Tuple,
+) -> str:
+    """Stable digest of both endpoints, their ids and the solver options."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((_FORMAT, QUANTUM, tuple(options))).encode("utf-8"))
+    for arr in (_quantized(pts_prev), _quantized(pts_next)):
+        digest.update(np.asarray(arr.shape, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    if ids is not None:
+        digest.update(np.asarray(ids, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def slot_name(prev_names: Sequence[str], next_names: Sequence[str]) -> str:
+    """One cache file per pair of endpoint collections; a changed mesh overwrites it."""
+    text = "\0".join(prev_names) + "\x01" + "\0".join(next_names)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _slot_path(slot: str, *, create: bool) -> Optional[str]:
+    cache_dir = image_util.get_scene_cache_dir(create=create)
+    if not cache_dir:
+        return None
+    folder = os.path.join(cache_dir, _SUBDIR)
+    if create:
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except Exception:
+            return None
+    return os.path.join(folder, f"{slot}.npz")
+
+
+def _valid(p2q: np.ndarray, q2p: np.ndarray, count: int) -> bool:
+    if p2q.shape != (count,) or q2p.shape != (count,):
+        return False
+    if np.any(p2q < 0) or np.any(p2q >= count):
+        return False
+    return bool(np.array_equal(q2p[p2q], np.arange(count)))
+
+
+def _remember(slot: str, key: str, p2q: np.ndarray, q2p: np.ndarray) -> None:
+    _MEMORY[slot] = (key, p2q, q2p)
+    _MEMORY.move_to_end(slot)
+    while len(_MEMORY) > _MEMORY_LIMIT:
+        _MEMORY.popitem(last=False)
+
+
+def load(slot: str, key: str, count: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    cached = _MEMORY.get(slot)
+    if cached is not None and cached[0] == key:
+        _MEMORY.move_to_end(slot)
+        return cached[1], cached[2]
+    path = _slot_path(slot, create=False)
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["key"]) != key or int(data["format"]) != _FORMAT:
+                return None
+            p2q = np.asarray(data["p2q"], dtype=np.int32)
+            q2p = np.asarray(data["q2p"], dtype=np.int32)
+    except Exception:
+        return None
+    if not _valid(p2q, q2p, count):
+        return None
+    _remember(slot, key, p2q, q2p)
+    return p2q, q2p
+
+
+def store(slot: str, key: str, p2q: np.ndarray, q2p: np.ndarray) -> None:
+    p2q = np.asarray(p2q, dtype=np.int32)
+    q2p = np.asarray(q2p, dtype=np.int32)
+    _remember(slot, key, p2q, q2p)
+    path = _slot_path(slot, create=True)
+    if not path:
+        return
+    tmp_path = f"{path}.tmp.npz"
+    try:
+        np.savez(tmp_path, key=np.asarray(key), format=np.asarray(_FORMAT), p2q=p2q, q2p=q2p)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def clear_memory() -> None:
+    _MEMORY.clear()
@@ -3,7 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import bpy
-from mathutils.kdtree import KDTree
+import numpy as np
+
+from liberadronecore.formation import assignment_cache, greedy_pairing
 
 PAIR_ID_ATTR = "PairID"
 FORMATION_ID_ATTR = "FormationID"
@@ -36,6 +38,14 @@ def _assign_initial_ids(mesh: bpy.types.Mesh) -> None:
     form_attr.data.foreach_set("value", values)
 
 
+def _world_vertex_coords(obj: bpy.types.Object) -> np.ndarray:
+    mesh = obj.data
+    coords = np.empty((len(mesh.vertices) * 3,), dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    mw = np.array(obj.matrix_world, dtype=np.float64)
+    return coords.reshape(-1, 3).astype(np.float64) @ mw[:3, :3].T + mw[:3, 3]
+
+
 def _pair_vertices(prev_obj: bpy.types.Object, cur_obj: bpy.types.Object) -> None:
     prev_mesh = prev_obj.data
     cur_mesh = cur_obj.data
@@ -47,25 +57,11 @@ def _pair_vertices(prev_obj: bpy.types.Object, cur_obj: bpy.types.Object) -> Non
     prev_values = [0] * len(prev_mesh.vertices)
     prev_pair.data.foreach_get("value", prev_values)
 
-    prev_coords = [prev_obj.matrix_world @ v.co for v in prev_mesh.vertices]
-    kd = KDTree(len(prev_coords))
-    for i, co in enumerate(prev_coords):
-        kd.insert(co, i)
-    kd.balance()
-
-    used: set[int] = set()
-    cur_values = [0] * len(cur_mesh.vertices)
-    for idx, v in enumerate(cur_mesh.vertices):
-        co = cur_obj.matrix_world @ v.co
-        target_idx = None
-        for (_, pidx, _) in kd.find_n(co, len(prev_coords)):
-            if pidx not in used:
-                target_idx = pidx
-                break
-        if target_idx is None:
-            target_idx = idx
-        used.add(target_idx)
-        cur_values[idx] = prev_values[target_idx]
+    targets = greedy_pairing.greedy_nearest_pairing(
+        _world_vertex_coords(prev_obj),
+        _world_vertex_coords(cur_obj),
+    )
+    cur_values = [prev_values[int(target)] for target in targets]
     cur_pair.data.foreach_set("value", cur_values)
 
 
@@ -304,6 +300,37 @@ def _collect_meshes_from_cols(cols: Sequence[bpy.types.Collection]) -> List[bpy.
     return meshes
 
 
+# Dense Hungarian cost grows with N^2 memory; above this the auction solver is used in AUTO mode.
+_AUCTION_MIN_POINTS = 2000
+
+
+def _pairing_prefs() -> Tuple[str, float]:
+    try:
+        prefs = bpy.context.preferences.addons["liberadronecore"].preferences
+        return str(prefs.pairing_solver), float(prefs.pairing_gap) * 0.01
+    except Exception:
+        return "AUTO", 0.01
+
+
+def _solver_options(count: int) -> Tuple:
+    solver, gap = _pairing_prefs()
+    if solver == "AUCTION" or (solver == "AUTO" and count > _AUCTION_MIN_POINTS):
+        return ("AUCTION", round(gap, 6))
+    return ("EXACT",)
+
+
+def _solve_assignment(pts_prev: np.ndarray, pts_next: np.ndarray, options: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    from liberadronecore.system.drone import auction_mapping, calculate_mapping
+
+    if options[0] == "AUCTION":
+        return auction_mapping.auction_from_points(pts_prev, pts_next, gap=options[1], workers=-1)
+    return calculate_mapping.hungarian_from_points(pts_prev, pts_next)
+
+
+def _entry_names(entries: Sequence[Tuple[bpy.types.Collection, int]]) -> List[str]:
+    return [f"{col.name}@{int(frame)}" for col, frame in entries if col is not None]
+
+
 def _pair_from_previous(
     prev_entries: Sequence[Tuple[bpy.types.Collection, int]],
     next_entries: Sequence[Tuple[bpy.types.Collection, int]],
@@ -313,9 +340,6 @@ def _pair_from_previous(
     """Assign pair_id on next collections using prev formation_id and evaluated positions."""
     if not prev_entries or not next_entries or scene is None or depsgraph is None:
         return False
-    from liberadronecore.system.drone import calculate_mapping
-    import numpy as np
-
     def _read_int_attr(mesh, fallback_mesh, name: str, length: int) -> List[int]:
         attr = getattr(mesh, "attributes", None)
         attr = attr.get(name) if attr else None
@@ -381,7 +405,15 @@ def _pair_from_previous(
 
     pts_prev = np.asarray(prev_positions, dtype=np.float64)
     pts_next = np.asarray(next_positions, dtype=np.float64)
-    _pairA, pairB = calculate_mapping.hungarian_from_points(pts_prev, pts_next)
+    # Unchanged endpoints reuse the stored permutation instead of solving again.
+    options = _solver_options(len(pts_prev))
+    slot = assignment_cache.slot_name(_entry_names(prev_entries), _entry_names(next_entries))
+    key = assignment_cache.assignment_key(pts_prev, pts_next, prev_form_ids, options)
+    solved = assignment_cache.load(slot, key, len(pts_prev))
+    if solved is None:
+        solved = _solve_assignment(pts_prev, pts_next, options)
+        assignment_cache.store(slot, key, solved[0], solved[1])
+    _pairA, pairB = solved
 
     mapped_ids = [prev_form_ids[p] for p in pairB]
 
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+# Neighbors fetched per point up front; most points find a free partner among them.
+_INITIAL_K = 16
+# Rebuild the search tree over unclaimed points once this fraction of it is claimed.
+_COMPACT_RATIO = 0.5
+
+
+def _ordered(dist: np.ndarray, idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Equal distances resolve to the lower point index so results are deterministic.
+    order = np.lexsort((idx, dist))
+    return dist[order], idx[order]
+
+
+class _FreeTree:
+    """KD-tree over the points that were still unclaimed at the last rebuild."""
+
+    def __init__(self, pts: np.ndarray, claimed: np.ndarray):
+        self.pts = pts
+        self.claimed = claimed
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        self.live = np.flatnonzero(~self.claimed)
+        self.tree = cKDTree(self.pts[self.live]) if self.live.size else None
+        self.claimed_since = 0
+
+    def claim(self, index: int) -> None:
+        self.claimed[index] = True
+        self.claimed_since += 1
+
+    def nearest_free(self, co: np.ndarray) -> int:
+        if self.claimed_since > self.live.size * _COMPACT_RATIO:
+            self.rebuild()
+        if self.tree is None:
+            return -1
+        size = self.live.size
+        k = min(_INITIAL_K, size)
+        while True:
+            dist, loc = self.tree.query(co, k=k)
+            dist, cand = _ordered(np.atleast_1d(dist), self.live[np.atleast_1d(loc)])
+            found = _first_free(self.tree, self.live, self.pts, self.claimed, co, dist, cand, k < size)
+            if found >= 0 or k >= size:
+                return found
+            k = min(k * 2, size)
+
+
+def _first_free(tree, live, pts, claimed, co, dist, cand, truncated: bool) -> int:
+    free = np.flatnonzero(~claimed[cand])
+    if free.size == 0:
+        return -1
+    best = free[0]
+    if truncated and dist[best] >= dist[-1]:
+        # The candidate list was cut inside a run of equal distances; fetch the whole run.
+        reach = dist[best] * (1.0 + 1e-12) + 1e-15
+        ties = live[np.asarray(tree.query_ball_point(co, reach), dtype=np.int64)]
+        ties = ties[~claimed[ties]]
+        ties = ties[np.sqrt(np.sum((pts[ties] - co) ** 2, axis=1)) <= reach]
+        if ties.size:
+            return int(ties.min())
+    return int(cand[best])
+
+
+def greedy_nearest_pairing(prev_pts, cur_pts) -> np.ndarray:
+    """Pair each current point, in index order, with its nearest unclaimed previous point.
+
+    Returns an int array mapping current index -> previous index. When every previous
+    point is already taken the current index itself is used, as the original
+    per-vertex ``find_n`` loop did.
+    """
+    prev = np.asarray(prev_pts, dtype=np.float64).reshape(-1, 3)
+    cur = np.asarray(cur_pts, dtype=np.float64).reshape(-1, 3)
+    n = prev.shape[0]
+    m = cur.shape[0]
+    result = np.arange(m, dtype=np.int64)
+    if n == 0 or m == 0:
+        return result
+
+    claimed = np.zeros((n,), dtype=bool)
+    base_tree = cKDTree(prev)
+    k0 = min(_INITIAL_K, n)
+    pre_dist, pre_idx = base_tree.query(cur, k=k0)
+    pre_dist = np.asarray(pre_dist, dtype=np.float64).reshape(m, k0)
+    pre_idx = np.asarray(pre_idx, dtype=np.int64).reshape(m, k0)
+    order = np.lexsort((pre_idx, pre_dist), axis=-1)
+    pre_dist = np.take_along_axis(pre_dist, order, axis=-1)
+    pre_idx = np.take_along_axis(pre_idx, order, axis=-1)
+    all_live = np.arange(n, dtype=np.int64)
+    free_tree = None
+
+    for i in range(m):
+        target = _first_free(base_tree, all_live, prev, claimed, cur[i], pre_dist[i], pre_idx[i], k0 < n)
+        if target < 0:
+            if free_tree is None:
+                free_tree = _FreeTree(prev, claimed)
+            target = free_tree.nearest_free(cur[i])
+        if target < 0:
+            # Everything is claimed; keep the original fallback of pairing with itself.
+            continue
+        result[i] = target
+        if free_tree is not None:
+            free_tree.claim(target)
+        else:
+            claimed[target] = True
+    return result
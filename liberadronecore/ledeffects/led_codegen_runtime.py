@@ -8,8 +8,14 @@ import bpy
 
 from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 from liberadronecore.ledeffects import le_codegen_base
-from liberadronecore.ledeffects.runtime_registry import runtime_functions
+from liberadronecore.ledeffects.runtime_registry import exec_runtime, registry_version
 from liberadronecore.ledeffects.nodes.sampler import le_image
+from liberadronecore.ledeffects.util import temporal
+
+
+# Module globals visible to generated code besides the registered runtime functions.
+_EXEC_GLOBALS: Dict[str, Any] = {"bpy": bpy, "math": math, "mathutils": mathutils}
+
 
 def _sanitize_identifier(text: str) -> str:
     safe = []
@@ -613,11 +619,9 @@ def compile_led_effect(tree: bpy.types.NodeTree) -> Optional[Callable]:
     body.append("    return color")
 
     code = "\n".join(body)
-    env = {"bpy": bpy, "math": math, "mathutils": mathutils}
-    env.update(runtime_functions())
-    exec(code, env)
+    effect = exec_runtime(code, "_led_effect", _EXEC_GLOBALS)
     le_image._prewarm_tree_images(tree)
-    return env["_led_effect"]
+    return effect
 
 
 def compile_led_socket(
@@ -716,10 +720,7 @@ def compile_led_socket(
     body.append("    return _value")
 
     code = "\n".join(body)
-    env = {"bpy": bpy, "math": math, "mathutils": mathutils}
-    env.update(runtime_functions())
-    exec(code, env)
-    return env["_led_socket"]
+    return exec_runtime(code, "_led_socket", _EXEC_GLOBALS)
 
 
 def get_output_activity(tree: bpy.types.NodeTree, frame: float) -> Dict[str, bool]:
@@ -805,14 +806,11 @@ def get_output_activity(tree: bpy.types.NodeTree, frame: float) -> Dict[str, boo
     body.append("    return result")
 
     code = "\n".join(body)
-    env = {"bpy": bpy, "math": math, "mathutils": mathutils}
-    env.update(runtime_functions())
-    exec(code, env)
-    counts = env["_led_output_activity"](float(frame))
+    counts = exec_runtime(code, "_led_output_activity", _EXEC_GLOBALS)(float(frame))
     return {name: bool(count) for name, count in counts.items()}
 
 
-_TREE_CACHE: Dict[int, Tuple[Callable, Any]] = {}
+_TREE_CACHE: Dict[int, Tuple[Callable, Any, int]] = {}
 
 
 def _to_hashable(value):
@@ -862,12 +860,14 @@ def _tree_signature(tree: bpy.types.NodeTree):
 def get_compiled_effect(tree: bpy.types.NodeTree) -> Optional[Callable]:
     key = tree.as_pointer()
     sig = _tree_signature(tree)
+    version = registry_version()
     cached = _TREE_CACHE.get(key)
-    if cached and cached[1] == sig:
+    if cached and cached[1] == sig and cached[2] == version:
         return cached[0]
+    temporal.bump_tree_revision(tree.name)
     compiled = compile_led_effect(tree)
     if compiled is not None:
-        _TREE_CACHE[key] = (compiled, sig)
+        _TREE_CACHE[key] = (compiled, sig, version)
     return compiled
 
 
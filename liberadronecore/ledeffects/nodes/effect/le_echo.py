@@ -1,29 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from typing import Tuple
 
 import bpy
 from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
-
-
-_ECHO_CACHE: Dict[str, Dict[str, object]] = {}
-
-
-def _echo_state(key: str, frame: float) -> Dict[str, object]:
-    state = _ECHO_CACHE.get(key)
-    if state is None:
-        state = {"frame": None, "colors": {}, "prev_colors": {}}
-        _ECHO_CACHE[key] = state
-    frame_i = int(frame)
-    if state.get("frame") != frame_i:
-        if state.get("frame") == frame_i - 1:
-            state["prev_colors"] = state.get("colors", {})
-        else:
-            state["prev_colors"] = {}
-        state["colors"] = {}
-        state["frame"] = frame_i
-    return state
+from liberadronecore.ledeffects.nodes.util import le_meshinfo
+from liberadronecore.ledeffects.util import temporal
 
 
 @register_runtime_function
@@ -38,17 +21,22 @@ def _echo_color(
         idx_i = int(idx)
     except Exception:
         return 0.0, 0.0, 0.0, 1.0
-    state = _echo_state(str(key or ""), frame)
+    positions = le_meshinfo._LED_FRAME_CACHE.get("positions") or []
+    count = len(positions)
+    frame_i = int(frame)
+    key = str(key or "")
     cur_color = color
     if not isinstance(cur_color, (list, tuple)):
         cur_color = (0.0, 0.0, 0.0, 1.0)
-    color_vals = [float(cur_color[0]) if len(cur_color) > 0 else 0.0]
-    color_vals.append(float(cur_color[1]) if len(cur_color) > 1 else 0.0)
-    color_vals.append(float(cur_color[2]) if len(cur_color) > 2 else 0.0)
-    color_vals.append(float(cur_color[3]) if len(cur_color) > 3 else 1.0)
-    state.get("colors", {})[idx_i] = tuple(color_vals)
+    color_vals = (
+        float(cur_color[0]) if len(cur_color) > 0 else 0.0,
+        float(cur_color[1]) if len(cur_color) > 1 else 0.0,
+        float(cur_color[2]) if len(cur_color) > 2 else 0.0,
+        float(cur_color[3]) if len(cur_color) > 3 else 1.0,
+    )
+    temporal.record(key, frame_i, idx_i, color_vals, count)
 
-    prev_color = state.get("prev_colors", {}).get(idx_i)
+    prev_color = temporal.lookup(key, frame_i - 1, idx_i, count)
     if not prev_color:
         return 0.0, 0.0, 0.0, 1.0
     try:
@@ -60,12 +48,11 @@ def _echo_color(
     elif decay_val > 1.0:
         decay_val = 1.0
     scale = 1.0 - decay_val
-    alpha = float(prev_color[3]) if len(prev_color) > 3 else 1.0
     return (
-        float(prev_color[0]) * scale,
-        float(prev_color[1]) * scale,
-        float(prev_color[2]) * scale,
-        alpha,
+        prev_color[0] * scale,
+        prev_color[1] * scale,
+        prev_color[2] * scale,
+        prev_color[3],
     )
 
 
@@ -95,5 +82,5 @@ class LDLEDEchoSamplerNode(bpy.types.Node, LDLED_CodeNodeBase):
         color = inputs.get("Color", "(0.0, 0.0, 0.0, 1.0)")
         decay = inputs.get("Decay", "0.0")
         out_var = self.output_var("Color")
-        cache_key = self.name or self.codegen_id()
+        cache_key = temporal.history_key(self)
         return f"{out_var} = _echo_color({cache_key!r}, idx, frame, {color}, {decay})"
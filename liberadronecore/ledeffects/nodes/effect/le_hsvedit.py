@@ -29,13 +29,4 @@ class LDLEDHSVEditNode(bpy.types.Node, LDLED_CodeNodeBase):
         saturation = inputs.get("Saturation", "0.0")
         value = inputs.get("Value", "0.0")
         out_var = self.output_var("Color")
-        hsv_id = f"{self.codegen_id()}_{int(self.as_pointer())}"
-        return "\n".join(
-            [
-                f"_hsv_{hsv_id} = _rgb_to_hsv({color})",
-                f"_h_{hsv_id} = _fract(_hsv_{hsv_id}[0] + ({hue}))",
-                f"_s_{hsv_id} = _clamp01(_hsv_{hsv_id}[1] + ({saturation}))",
-                f"_v_{hsv_id} = _clamp01(_hsv_{hsv_id}[2] + ({value}))",
-                f"{out_var} = _hsv_to_rgb((_h_{hsv_id}, _s_{hsv_id}, _v_{hsv_id}, _hsv_{hsv_id}[3]))",
-            ]
-        )
+        return f"{out_var} = _hsv_adjust({color}, ({hue}), ({saturation}), ({value}))"
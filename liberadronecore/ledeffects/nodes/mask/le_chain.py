@@ -58,7 +58,8 @@ def _pick_neighbor(
     angle: float,
     center: Tuple[float, float, float],
     allowed_indices: Sequence[int],
-    neighbor_map: Optional[Sequence[Sequence[int]]] = None,
+    neighbor_graph: Optional[Dict[str, object]] = None,
+    use_neighbor_map: bool = False,
 ) -> int:
     count = len(positions)
     if count <= 1:
@@ -68,8 +69,20 @@ def _pick_neighbor(
     if not allowed_indices:
         return current_idx
     cx, cy, cz = positions[current_idx]
-    if neighbor_map is not None and current_idx < len(neighbor_map):
-        top = [idx for idx in neighbor_map[current_idx] if idx != prev_idx]
+    graph_row = None
+    if neighbor_graph is not None:
+        indices = neighbor_graph["indices"]
+        if current_idx < len(indices) and indices[current_idx, 0] >= 0:
+            graph_row = [int(idx) for idx in indices[current_idx] if idx >= 0]
+        elif use_neighbor_map:
+            return current_idx
+    if graph_row is not None:
+        # The graph holds one spare neighbor so prev can be skipped before or
+        # after taking the closest _NEIGHBOR_COUNT, matching both legacy paths.
+        if use_neighbor_map:
+            top = [idx for idx in graph_row[:_NEIGHBOR_COUNT] if idx != prev_idx]
+        else:
+            top = [idx for idx in graph_row if idx != prev_idx][:_NEIGHBOR_COUNT]
         if not top:
             return current_idx
     else:
@@ -222,14 +235,14 @@ def _advance_chain_state(
     particle_count = len(state.get("particles", []))
     move_rate = max(1, int(speed_frames))
     expected_moves = particle_count / float(move_rate) if move_rate > 0 else float(particle_count)
-    neighbor_map = None
-    if allowed_count and (allowed_count <= 96 or expected_moves >= allowed_count):
-        neighbor_map = le_particlebase._neighbor_map(
+    use_neighbor_map = bool(allowed_count and (allowed_count <= 96 or expected_moves >= allowed_count))
+    neighbor_graph = None
+    if allowed_count:
+        neighbor_graph = le_particlebase._neighbor_graph(
             state,
             positions,
             allowed_indices,
-            _NEIGHBOR_COUNT,
-            frame=current_frame,
+            _NEIGHBOR_COUNT + 1,
         )
 
     for step_frame in range(int(last_frame) + 1, current_frame + 1):
@@ -284,7 +297,8 @@ def _advance_chain_state(
                     angle,
                     center,
                     allowed_indices,
-                    neighbor_map,
+                    neighbor_graph,
+                    use_neighbor_map,
                 )
                 if new_idx != idx:
                     prev = idx
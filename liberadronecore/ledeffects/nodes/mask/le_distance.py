@@ -3,7 +3,7 @@ from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 
 
 class LDLEDDistanceMaskNode(bpy.types.Node, LDLED_CodeNodeBase):
-    """Mask by distance to a mesh bounds."""
+    """Mask by distance to a mesh surface or its bounds."""
 
     bl_idname = "LDLEDDistanceMaskNode"
     bl_label = "Distance Mask"
@@ -23,6 +23,20 @@ class LDLEDDistanceMaskNode(bpy.types.Node, LDLED_CodeNodeBase):
         options={'LIBRARY_EDITABLE'},
     )
 
+    distance_items = [
+        ("SURFACE", "Surface", "Exact distance to the mesh surface"),
+        ("GRID", "Surface (Grid)", "Cached distance field, fastest for static meshes"),
+        ("BOUNDS", "Bounds", "Distance to the mesh bounding box"),
+    ]
+
+    # Nodes saved before surface distance existed keep measuring to the bounds.
+    distance_mode: bpy.props.EnumProperty(
+        name="Distance",
+        items=distance_items,
+        default="BOUNDS",
+        options={'LIBRARY_EDITABLE'},
+    )
+
     combine_items = [
         ("MULTIPLY", "Multiply", "Multiply the mask with the value"),
         ("ADD", "Add", "Add the value to the mask"),
@@ -46,6 +60,7 @@ class LDLEDDistanceMaskNode(bpy.types.Node, LDLED_CodeNodeBase):
         return ntree.bl_idname == "LD_LedEffectsTree"
 
     def init(self, context):
+        self.distance_mode = "SURFACE"
         self.inputs.new("NodeSocketObject", "Mesh")
         value = self.inputs.new("NodeSocketFloat", "Value")
         value.default_value = 1.0
@@ -58,6 +73,7 @@ class LDLEDDistanceMaskNode(bpy.types.Node, LDLED_CodeNodeBase):
     def draw_buttons(self, context, layout):
         layout.prop(self, "target_object")
         layout.prop(self, "max_distance")
+        layout.prop(self, "distance_mode", text="")
         layout.prop(self, "combine_mode", text="")
         layout.prop(self, "invert")
 
@@ -77,9 +93,13 @@ class LDLEDDistanceMaskNode(bpy.types.Node, LDLED_CodeNodeBase):
             expr = f"_clamp01(({base_expr}) - ({value}))"
         else:
             expr = f"_clamp01(({base_expr}) * ({value}))"
+        if self.distance_mode == "BOUNDS":
+            dist_expr = f"_distance_to_mesh_bbox({obj_expr}, (pos[0], pos[1], pos[2]))"
+        else:
+            dist_expr = f"_distance_to_mesh({obj_expr}, idx, (pos[0], pos[1], pos[2]), {self.distance_mode!r})"
         return "\n".join(
             [
-                f"_dist = _distance_to_mesh_bbox({obj_expr}, (pos[0], pos[1], pos[2]))",
+                f"_dist = {dist_expr}",
                 f"{out_var} = {expr}",
             ]
         )
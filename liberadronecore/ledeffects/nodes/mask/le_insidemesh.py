@@ -3,7 +3,7 @@ from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 
 
 class LDLEDInsideMeshNode(bpy.types.Node, LDLED_CodeNodeBase):
-    """Mask based on whether a point is inside a mesh bounds."""
+    """Mask based on whether a point is inside a mesh volume or its bounds."""
 
     bl_idname = "LDLEDInsideMeshNode"
     bl_label = "Inside Mesh"
@@ -15,6 +15,18 @@ class LDLEDInsideMeshNode(bpy.types.Node, LDLED_CodeNodeBase):
         ("SUB", "Subtract", "Subtract the value from the mask"),
     ]
 
+    test_items = [
+        ("MESH", "Mesh", "Test against the closed mesh surface"),
+        ("BOUNDS", "Bounds", "Test against the mesh bounding box"),
+    ]
+
+    # Nodes saved before the exact test existed keep the bounds test.
+    test_mode: bpy.props.EnumProperty(
+        name="Test",
+        items=test_items,
+        default="BOUNDS",
+        options={'LIBRARY_EDITABLE'},
+    )
     combine_mode: bpy.props.EnumProperty(
         name="Combine",
         items=combine_items,
@@ -32,6 +44,7 @@ class LDLEDInsideMeshNode(bpy.types.Node, LDLED_CodeNodeBase):
         return ntree.bl_idname == "LD_LedEffectsTree"
 
     def init(self, context):
+        self.test_mode = "MESH"
         mesh = self.inputs.new("NodeSocketObject", "Mesh")
         value = self.inputs.new("NodeSocketFloat", "Value")
         value.default_value = 1.0
@@ -45,6 +58,7 @@ class LDLEDInsideMeshNode(bpy.types.Node, LDLED_CodeNodeBase):
         op = layout.operator("ldled.insidemesh_create_mesh", text="From Selection")
         op.node_tree_name = self.id_data.name
         op.node_name = self.name
+        layout.prop(self, "test_mode", text="")
         layout.prop(self, "combine_mode", text="")
         layout.prop(self, "invert")
 
@@ -52,7 +66,10 @@ class LDLEDInsideMeshNode(bpy.types.Node, LDLED_CodeNodeBase):
         out_var = self.output_var("Mask")
         obj_expr = inputs.get("Mesh", "''")
         value = inputs.get("Value", "1.0")
-        base_expr = f"1.0 if _point_in_mesh_bbox({obj_expr}, (pos[0], pos[1], pos[2])) else 0.0"
+        if self.test_mode == "MESH":
+            base_expr = f"1.0 if _point_in_mesh({obj_expr}, idx, (pos[0], pos[1], pos[2])) else 0.0"
+        else:
+            base_expr = f"1.0 if _point_in_mesh_bbox({obj_expr}, (pos[0], pos[1], pos[2])) else 0.0"
         if self.invert:
             base_expr = f"(1.0 - ({base_expr}))"
         if self.combine_mode == "ADD":
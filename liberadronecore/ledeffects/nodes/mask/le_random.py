@@ -1,19 +1,27 @@
 import bpy
-import math
 from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
+from liberadronecore.ledeffects.util import random_hash
 
 
 @register_runtime_function
 def _rand01(idx: int, frame: float, seed: float) -> float:
-    value = math.sin(idx * 12.9898 + frame * 78.233 + seed * 37.719)
-    return value - math.floor(value)
+    return random_hash.legacy01(idx, frame, seed)
 
 
 @register_runtime_function
 def _rand01_static(idx: int, seed: float) -> float:
-    value = math.sin(idx * 12.9898 + seed * 78.233)
-    return value - math.floor(value)
+    return random_hash.legacy01_static(idx, seed)
+
+
+@register_runtime_function
+def _rand01_hash(idx: int, frame: float, seed: float) -> float:
+    return random_hash.hash01(idx, frame, seed)
+
+
+@register_runtime_function
+def _rand01_hash_static(idx: int, seed: float) -> float:
+    return random_hash.hash01_static(idx, seed)
 
 
 class LDLEDRandomNode(bpy.types.Node, LDLED_CodeNodeBase):
@@ -29,6 +37,19 @@ class LDLEDRandomNode(bpy.types.Node, LDLED_CodeNodeBase):
         options={'LIBRARY_EDITABLE'},
     )
 
+    random_items = [
+        ("HASH", "Hash", "Counter-based integer hash, stable at any frame"),
+        ("LEGACY", "Legacy", "Sine hash used by older shows"),
+    ]
+
+    # Nodes saved before the hash generator existed keep the legacy sequence.
+    random_mode: bpy.props.EnumProperty(
+        name="Random",
+        items=random_items,
+        default="LEGACY",
+        options={'LIBRARY_EDITABLE'},
+    )
+
     combine_items = [
         ("MULTIPLY", "Multiply", "Multiply the mask with the value"),
         ("ADD", "Add", "Add the value to the mask"),
@@ -52,6 +73,7 @@ class LDLEDRandomNode(bpy.types.Node, LDLED_CodeNodeBase):
         return ntree.bl_idname == "LD_LedEffectsTree"
 
     def init(self, context):
+        self.random_mode = "HASH"
         chance = self.inputs.new("NodeSocketFloat", "Chance")
         chance.default_value = 0.0
         try:
@@ -71,6 +93,7 @@ class LDLEDRandomNode(bpy.types.Node, LDLED_CodeNodeBase):
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "combine_mode", text="")
+        layout.prop(self, "random_mode", text="")
         layout.prop(self, "invert")
 
     def build_code(self, inputs):
@@ -80,6 +103,7 @@ class LDLEDRandomNode(bpy.types.Node, LDLED_CodeNodeBase):
         value = inputs.get("Value", "1.0")
         out_var = self.output_var("Value")
         rand_id = f"{self.codegen_id()}_{int(self.as_pointer())}"
+        rand_fn = "_rand01_hash_static" if self.random_mode == "HASH" else "_rand01_static"
         base_var = f"_rand_val_{rand_id}"
         base_expr = base_var
         if self.invert:
@@ -91,9 +115,9 @@ class LDLEDRandomNode(bpy.types.Node, LDLED_CodeNodeBase):
         else:
             expr = f"_clamp01(({base_expr}) * ({value}))"
         lines = [
-            f"_rand_{rand_id} = _rand01_static(idx, {seed})",
+            f"_rand_{rand_id} = {rand_fn}(idx, {seed})",
             f"if _rand_{rand_id} < ({chance_expr}):",
-            f"    {base_var} = _rand01_static(idx, {seed} + 1.0)",
+            f"    {base_var} = {rand_fn}(idx, {seed} + 1.0)",
             "else:",
             f"    {base_var} = {value}",
             f"{out_var} = {expr}",
@@ -1,5 +1,6 @@
 import bpy
 from typing import Dict, List, Optional, Sequence, Tuple
+from mathutils.kdtree import KDTree
 
 from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
@@ -26,12 +27,68 @@ def _map_transit_ids(
     return mapped
 
 
+def _build_neighbor_index(
+    positions: List[Tuple[float, float, float]],
+    allowed_indices: Sequence[int],
+) -> Dict[str, object]:
+    count = len(positions)
+    allowed = [idx for idx in allowed_indices if 0 <= idx < count]
+    kd = KDTree(len(allowed))
+    for order, idx in enumerate(allowed):
+        kd.insert(positions[idx], order)
+    kd.balance()
+    return {
+        "kd": kd,
+        "allowed": allowed,
+        "order": {idx: order for order, idx in enumerate(allowed)},
+        "top": {},
+    }
+
+
+def _nearest_allowed(
+    index: Dict[str, object],
+    positions: List[Tuple[float, float, float]],
+    current_idx: int,
+    neighbor_count: int,
+) -> List[int]:
+    memo = index["top"]
+    cached = memo.get(current_idx)
+    if cached is not None:
+        return cached
+    allowed = index["allowed"]
+    order = index["order"]
+    kd = index["kd"]
+    cx, cy, cz = positions[current_idx]
+    found = kd.find_n((cx, cy, cz), neighbor_count + 1)
+    candidates = [allowed[k_i] for _co, k_i, _dist in found]
+    if len(found) > neighbor_count:
+        # The KD-tree breaks distance ties arbitrarily; pull in every point on
+        # the boundary so the stable (distance, allowed order) choice matches.
+        radius = float(found[-1][2])
+        radius = radius * (1.0 + 1e-5) + 1e-9
+        candidates = [allowed[k_i] for _co, k_i, _dist in kd.find_range((cx, cy, cz), radius)]
+    dists: List[Tuple[float, int, int]] = []
+    for idx in candidates:
+        if idx == current_idx:
+            continue
+        px, py, pz = positions[idx]
+        dx = px - cx
+        dy = py - cy
+        dz = pz - cz
+        dists.append((dx * dx + dy * dy + dz * dz, order[idx], idx))
+    dists.sort()
+    top = [item[2] for item in dists[: min(neighbor_count, len(dists))]]
+    memo[current_idx] = top
+    return top
+
+
 def _pick_trail_neighbor(
     positions: List[Tuple[float, float, float]],
     current_idx: int,
     target_idx: int,
     allowed_indices: Sequence[int],
     neighbor_map: Optional[Sequence[Sequence[int]]] = None,
+    neighbor_index: Optional[Dict[str, object]] = None,
 ) -> int:
     if current_idx == target_idx:
         return current_idx
@@ -42,28 +99,15 @@ def _pick_trail_neighbor(
         return current_idx
     if target_idx < 0 or target_idx >= count:
         return current_idx
-    cx, cy, cz = positions[current_idx]
     tx, ty, tz = positions[target_idx]
     if neighbor_map is not None and current_idx < len(neighbor_map):
         top = list(neighbor_map[current_idx])
-        if not top:
-            return current_idx
     else:
-        dists: List[Tuple[float, int]] = []
-        for idx in allowed_indices:
-            if idx == current_idx:
-                continue
-            if idx < 0 or idx >= count:
-                continue
-            px, py, pz = positions[idx]
-            dx = px - cx
-            dy = py - cy
-            dz = pz - cz
-            dists.append((dx * dx + dy * dy + dz * dz, idx))
-        if not dists:
-            return current_idx
-        dists.sort(key=lambda item: item[0])
-        top = [item[1] for item in dists[: min(_NEIGHBOR_COUNT, len(dists))]]
+        if neighbor_index is None:
+            neighbor_index = _build_neighbor_index(positions, allowed_indices)
+        top = _nearest_allowed(neighbor_index, positions, current_idx, _NEIGHBOR_COUNT)
+    if not top:
+        return current_idx
     best_idx = None
     best_dist = None
     for idx in top:
@@ -78,6 +122,28 @@ def _pick_trail_neighbor(
     return current_idx if best_idx is None else best_idx
 
 
+def _trail_neighbor_index(
+    state: Dict[str, object],
+    positions: List[Tuple[float, float, float]],
+    allowed_indices: Sequence[int],
+    frame: int,
+) -> Dict[str, object]:
+    sig = (int(frame), state.get("route_sig"))
+    cached = state.get("neighbor_index")
+    # Holding the positions keeps the identity check sound; a freed list's id can be reused.
+    if (
+        cached is not None
+        and state.get("neighbor_index_sig") == sig
+        and state.get("neighbor_index_positions") is positions
+    ):
+        return cached
+    index = _build_neighbor_index(positions, allowed_indices)
+    state["neighbor_index_sig"] = sig
+    state["neighbor_index_positions"] = positions
+    state["neighbor_index"] = index
+    return index
+
+
 def _init_trail_state(key: str, count: int) -> Dict[str, object]:
     return {
         "frame": None,
@@ -144,19 +210,9 @@ def _advance_trail_state(
     if current_frame - int(last_frame) > 1000:
         state.update(_init_trail_state(state.get("key", ""), count))
         last_frame = current_frame - 1
-    allowed_count = len(allowed_indices)
-    particle_count = len(state.get("particles", []))
-    move_rate = max(1, int(speed_frames))
-    expected_moves = particle_count / float(move_rate) if move_rate > 0 else float(particle_count)
-    neighbor_map = None
-    if allowed_count and (allowed_count <= 96 or expected_moves >= allowed_count):
-        neighbor_map = le_particlebase._neighbor_map(
-            state,
-            positions,
-            allowed_indices,
-            _NEIGHBOR_COUNT,
-            frame=current_frame,
-        )
+    neighbor_index = None
+    if allowed_indices:
+        neighbor_index = _trail_neighbor_index(state, positions, allowed_indices, current_frame)
     for step_frame in range(int(last_frame) + 1, current_frame + 1):
         if decay_val > 0.0:
             values = state.get("values", [])
@@ -209,7 +265,13 @@ def _advance_trail_state(
                     break
 
             if target_idx is not None and step_frame >= next_move:
-                idx = _pick_trail_neighbor(positions, idx, target_idx, allowed_indices, neighbor_map)
+                idx = _pick_trail_neighbor(
+                    positions,
+                    idx,
+                    target_idx,
+                    allowed_indices,
+                    neighbor_index=neighbor_index,
+                )
                 next_move = step_frame + speed_frames
                 if idx == target_idx:
                     route_index += 1
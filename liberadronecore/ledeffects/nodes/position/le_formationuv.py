@@ -35,7 +35,7 @@ class LDLEDFormationUVNode(bpy.types.Node, LDLED_CodeNodeBase):
         cache_key = f"{self.codegen_id()}_{int(self.as_pointer())}"
         return "\n".join(
             [
-                f"_rel = _formation_bbox_relpos((pos[0], pos[1], pos[2]), {cache_key!r}, {bool(self.static)!r})",
+                f"_rel = _formation_bbox_relpos((pos[0], pos[1], pos[2]), {cache_key!r}, {bool(self.static)!r}, idx)",
                 f"{out_x} = _rel[0]",
                 f"{out_y} = _rel[1]",
                 f"{out_z} = _rel[2]",
@@ -73,7 +73,7 @@ class LDLEDProjectionUVNode(bpy.types.Node, LDLED_CodeNodeBase):
         obj_expr = inputs.get("Mesh", "''")
         return "\n".join(
             [
-                f"_uv = _project_bbox_uv({obj_expr}, (pos[0], pos[1], pos[2]))",
+                f"_uv = _project_bbox_uv({obj_expr}, (pos[0], pos[1], pos[2]), idx)",
                 f"{out_u} = _uv[0]",
                 f"{out_v} = _uv[1]",
             ]
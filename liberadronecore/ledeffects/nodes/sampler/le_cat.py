@@ -20,21 +20,7 @@ def _cat_row_index_mode(idx: int, height: int, mode: str = "PAIR_TO_FORM") -> in
         mapping = le_particlebase._formation_id_map()
         row_val = int(mapping.get(fid_val, fid_val))
     else:
-        cache = le_meshinfo._LED_FRAME_CACHE
-        inv = cache.get("formation_id_inv_map")
-        if not isinstance(inv, dict):
-            mapping = le_particlebase._formation_id_map()
-            inv = {}
-            if isinstance(mapping, dict):
-                for fid, rid in mapping.items():
-                    rid_val = int(rid)
-                    if rid_val in inv:
-                        continue
-                    inv[rid_val] = fid
-            cache["formation_id_inv_map"] = inv
-        row_val = idx_val
-        if isinstance(inv, dict):
-            row_val = int(inv.get(idx_val, idx_val))
+        row_val = le_meshinfo._formation_ref_fid(idx_val)
     if height_val > 0:
         if row_val < 0:
             row_val = 0
@@ -147,19 +133,7 @@ def _cat_ref_fid(idx: int, mode: str = "PAIR_TO_FORM") -> int:
     idx_val = int(idx)
     if str(mode) == "REF_TO_REF":
         return int(le_meshinfo._formation_id(idx_val))
-    cache = le_meshinfo._LED_FRAME_CACHE
-    inv = cache.get("formation_id_inv_map")
-    if not isinstance(inv, dict):
-        mapping = le_particlebase._formation_id_map()
-        inv = {}
-        if isinstance(mapping, dict):
-            for fid, rid in mapping.items():
-                rid_val = int(rid)
-                if rid_val in inv:
-                    continue
-                inv[rid_val] = fid
-        cache["formation_id_inv_map"] = inv
-    return int(inv.get(idx_val, idx_val))
+    return le_meshinfo._formation_ref_fid(idx_val)
 
 
 @register_runtime_function
@@ -81,6 +81,18 @@ class LDLEDPaintNode(bpy.types.Node, LDLED_CodeNodeBase):
         options={'LIBRARY_EDITABLE'},
     )
     paint_items: bpy.props.CollectionProperty(type=LDLEDPaintItem, options={'LIBRARY_EDITABLE'})
+    paint_count: bpy.props.IntProperty(
+        name="Paint Count",
+        default=0,
+        min=0,
+        options={'HIDDEN', 'LIBRARY_EDITABLE'},
+    )
+    paint_data: bpy.props.StringProperty(
+        name="Paint Data",
+        description="Packed RGBA colors and coverage mask indexed by formation ID",
+        default="",
+        options={'HIDDEN', 'LIBRARY_EDITABLE'},
+    )
 
     @classmethod
     def poll(cls, ntree):
@@ -1,64 +1,30 @@
 import bpy
-import colorsys
 from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
-
-
-@register_runtime_function
-def _rgb_to_hsv(color):
-    r, g, b, a = color
-    h, s, v = colorsys.rgb_to_hsv(r, g, b)
-    return h, s, v, a
-
-
-@register_runtime_function
-def _hsv_to_rgb(color):
-    h, s, v, a = color
-    r, g, b = colorsys.hsv_to_rgb(h, s, v)
-    return r, g, b, a
-
-
-@register_runtime_function
-def _srgb_to_linear_channel(c: float) -> float:
-    if c <= 0.04045:
-        return c / 12.92
-    return ((c + 0.055) / 1.055) ** 2.4
-
-
-@register_runtime_function
-def _linear_to_srgb_channel(c: float) -> float:
-    if c <= 0.0031308:
-        return c * 12.92
-    return 1.055 * (c ** (1.0 / 2.4)) - 0.055
-
-
-@register_runtime_function
-def _srgb_to_linear(color):
-    r, g, b, a = color
-    return (
-        _srgb_to_linear_channel(r),
-        _srgb_to_linear_channel(g),
-        _srgb_to_linear_channel(b),
-        a,
-    )
-
-
-@register_runtime_function
-def _linear_to_srgb(color):
-    r, g, b, a = color
-    return (
-        _linear_to_srgb_channel(r),
-        _linear_to_srgb_channel(g),
-        _linear_to_srgb_channel(b),
-        a,
-    )
-
-
-@register_runtime_function
-def _to_grayscale(color):
-    r, g, b, a = color
-    gray = 0.2126 * r + 0.7152 * g + 0.0722 * b
-    return gray, gray, gray, a
+from liberadronecore.ledeffects.util import color_kernels
+
+
+# Kernels are registered directly so generated code calls them without a wrapper frame.
+_rgb_to_hsv = register_runtime_function(color_kernels.rgb_to_hsv, name="_rgb_to_hsv")
+_hsv_to_rgb = register_runtime_function(color_kernels.hsv_to_rgb, name="_hsv_to_rgb")
+_hsv_adjust = register_runtime_function(color_kernels.hsv_adjust, name="_hsv_adjust")
+_srgb_to_linear_channel = register_runtime_function(
+    color_kernels.srgb_to_linear_channel, name="_srgb_to_linear_channel"
+)
+_linear_to_srgb_channel = register_runtime_function(
+    color_kernels.linear_to_srgb_channel, name="_linear_to_srgb_channel"
+)
+_srgb_to_linear = register_runtime_function(color_kernels.srgb_to_linear, name="_srgb_to_linear")
+_linear_to_srgb = register_runtime_function(color_kernels.linear_to_srgb, name="_linear_to_srgb")
+_to_grayscale = register_runtime_function(color_kernels.grayscale, name="_to_grayscale")
+
+# (N,4) forms for callers that convert every drone at once.
+_rgb_to_hsv_array = register_runtime_function(color_kernels.rgb_to_hsv_array, name="_rgb_to_hsv_array")
+_hsv_to_rgb_array = register_runtime_function(color_kernels.hsv_to_rgb_array, name="_hsv_to_rgb_array")
+_hsv_adjust_array = register_runtime_function(color_kernels.hsv_adjust_array, name="_hsv_adjust_array")
+_srgb_to_linear_array = register_runtime_function(color_kernels.srgb_to_linear_array, name="_srgb_to_linear_array")
+_linear_to_srgb_array = register_runtime_function(color_kernels.linear_to_srgb_array, name="_linear_to_srgb_array")
+_to_grayscale_array = register_runtime_function(color_kernels.grayscale_array, name="_to_grayscale_array")
 
 
 class LDLEDColorSpaceNode(bpy.types.Node, LDLED_CodeNodeBase):
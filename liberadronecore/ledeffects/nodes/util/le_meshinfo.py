@@ -4,11 +4,13 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import bpy
 import math
-import mathutils
+import numpy as np
+from scipy.spatial import cKDTree
 from liberadronecore.formation import fn_parse_pairing
 from liberadronecore.ledeffects.le_codegen_base import LDLED_CodeNodeBase
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
-from liberadronecore.ledeffects.nodes.util.le_math import _clamp
+from liberadronecore.ledeffects.util import bounds as bounds_util, mesh_bvh, neighbor_graph
+from liberadronecore.util import time_static
 
 
 _LED_FRAME_CACHE: Dict[str, Any] = {
@@ -24,8 +26,15 @@ _LED_FRAME_CACHE: Dict[str, Any] = {
     "formation_ids": None,
     "pair_ids": None,
     "formation_id_map": None,
-    "formation_id_inv_map": None,
-    "pair_id_inv_map": None,
+    "id_tables": None,
+    "positions_array": None,
+    "kdtree": None,
+    "radius_neighbors": {},
+    "radius_requests": {},
+    "bvh": {},
+    "inside": {},
+    "distance": {},
+    "projection": {},
 }
 _FORMATION_BBOX_CACHE: Dict[str, Tuple[Tuple[float, float, float], Tuple[float, float, float]]] = {}
 _COLLECTION_IDS_CACHE: Dict[Tuple[str, bool], list[int]] = {}
@@ -49,8 +58,16 @@ def begin_led_frame_cache(
     _LED_FRAME_CACHE["formation_ids"] = formation_ids
     _LED_FRAME_CACHE["pair_ids"] = pair_ids
     _LED_FRAME_CACHE["formation_id_map"] = None
-    _LED_FRAME_CACHE["formation_id_inv_map"] = None
-    _LED_FRAME_CACHE["pair_id_inv_map"] = None
+    _LED_FRAME_CACHE["id_tables"] = None
+    _LED_FRAME_CACHE["positions_array"] = None
+    _LED_FRAME_CACHE["kdtree"] = None
+    _LED_FRAME_CACHE["radius_neighbors"] = {}
+    _LED_FRAME_CACHE["radius_requests"] = {}
+    _LED_FRAME_CACHE["bvh"] = {}
+    _LED_FRAME_CACHE["inside"] = {}
+    _LED_FRAME_CACHE["distance"] = {}
+    _LED_FRAME_CACHE["projection"] = {}
+    _LED_FRAME_CACHE["id_tables"] = _build_id_tables(positions, formation_ids, pair_ids)
 
 
 def end_led_frame_cache() -> None:
@@ -66,37 +83,192 @@ def end_led_frame_cache() -> None:
     _LED_FRAME_CACHE["formation_ids"] = None
     _LED_FRAME_CACHE["pair_ids"] = None
     _LED_FRAME_CACHE["formation_id_map"] = None
-    _LED_FRAME_CACHE["formation_id_inv_map"] = None
-    _LED_FRAME_CACHE["pair_id_inv_map"] = None
+    _LED_FRAME_CACHE["id_tables"] = None
+    _LED_FRAME_CACHE["positions_array"] = None
+    _LED_FRAME_CACHE["kdtree"] = None
+    _LED_FRAME_CACHE["radius_neighbors"] = {}
+    _LED_FRAME_CACHE["radius_requests"] = {}
+    _LED_FRAME_CACHE["bvh"] = {}
+    _LED_FRAME_CACHE["inside"] = {}
+    _LED_FRAME_CACHE["distance"] = {}
+    _LED_FRAME_CACHE["projection"] = {}
+
+
+# Distinct radii kept per frame; beyond this, callers query the tree per drone.
+_RADIUS_NEIGHBORS_LIMIT = 8
+# Neighbor entries held over all radii of one frame (8 bytes each).
+_RADIUS_NEIGHBORS_MAX_PAIRS = 1 << 22
+
+
+def _frame_positions_array() -> Optional[np.ndarray]:
+    if _LED_FRAME_CACHE.get("frame") is None:
+        return None
+    pts = _LED_FRAME_CACHE.get("positions_array")
+    if pts is None:
+        positions = _LED_FRAME_CACHE.get("positions") or []
+        pts = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        _LED_FRAME_CACHE["positions_array"] = pts
+    return pts
+
+
+def _frame_kdtree() -> Optional[cKDTree]:
+    pts = _frame_positions_array()
+    if pts is None or pts.shape[0] == 0:
+        return None
+    tree = _LED_FRAME_CACHE.get("kdtree")
+    if tree is None:
+        tree = cKDTree(pts)
+        _LED_FRAME_CACHE["kdtree"] = tree
+    return tree
+
+
+def _frame_radius_neighbors(radius: float):
+    """Shared per-frame CSR ``(offsets, indices)`` neighbor lists for ``radius``, or None."""
+    tree = _frame_kdtree()
+    if tree is None:
+        return None
+    key = float(radius)
+    cache = _LED_FRAME_CACHE["radius_neighbors"]
+    if key in cache:
+        return cache[key]
+    requests = _LED_FRAME_CACHE["radius_requests"]
+    requests[key] = requests.get(key, 0) + 1
+    # A radius asked for once is answered from the tree; only repeats pay for the lists.
+    if requests[key] < 2 or len(cache) >= _RADIUS_NEIGHBORS_LIMIT:
+        return None
+    used = sum(csr[1].size for csr in cache.values() if csr is not None)
+    cached = neighbor_graph.radius_neighbors(tree, key, max_pairs=_RADIUS_NEIGHBORS_MAX_PAIRS - used)
+    # A refused radius is remembered too, so its pairs are not counted again.
+    cache[key] = cached
+    return cached
+
+
+def _frame_row(idx, pos) -> Optional[int]:
+    """Runtime index of ``pos`` when it is the cached frame position of drone ``idx``."""
+    positions = _LED_FRAME_CACHE.get("positions")
+    if positions is None or idx is None:
+        return None
+    idx_i = int(idx)
+    if not 0 <= idx_i < len(positions):
+        return None
+    row = positions[idx_i]
+    if float(row[0]) == float(pos[0]) and float(row[1]) == float(pos[1]) and float(row[2]) == float(pos[2]):
+        return idx_i
+    return None
 
 
 def clear_led_frame_cache() -> None:
     end_led_frame_cache()
     _FORMATION_BBOX_CACHE.clear()
     _COLLECTION_IDS_CACHE.clear()
+    mesh_bvh.clear_bvh_cache()
+    bounds_util.clear_bounds_cache()
+
+
+def _int_array(values) -> Optional[np.ndarray]:
+    if values is None or len(values) == 0:
+        return None
+    return np.asarray(values, dtype=np.int64).reshape(-1)
+
+
+def _build_id_tables(positions, formation_ids, pair_ids) -> Dict[str, Any]:
+    """Dense per-frame id lookups shared by every formation/pair id accessor."""
+    count = len(positions) if positions is not None else 0
+    ids = _int_array(formation_ids)
+    pids = _int_array(pair_ids)
+    tables: Dict[str, Any] = {"formation_ids": ids, "pair_ids": pids}
+
+    # Runtime index -> source index (first source per pair id, else itself).
+    if pids is not None:
+        pair_count = pids.shape[0]
+        uniq, first = np.unique(pids, return_index=True)
+        in_range = (uniq >= 0) & (uniq < pair_count)
+        src_by_runtime = np.arange(pair_count, dtype=np.int64)
+        src_by_runtime[uniq[in_range]] = first[in_range]
+        tables["src_by_runtime"] = src_by_runtime
+        tables["pair_duplicate"] = uniq.shape[0] != pair_count
+
+    if ids is None:
+        return tables
+    id_count = ids.shape[0]
+    if pids is not None and pids.shape[0] == id_count:
+        tables["pair_lookup"] = pids
+        tables["fid_by_runtime"] = ids[tables["src_by_runtime"]]
+    else:
+        tables["pair_duplicate"] = False
+        tables["fid_by_runtime"] = ids
+
+    # Formation id -> runtime index, through pair ids only when they permute the drones.
+    use_pair_ids = (
+        pids is not None
+        and pids.shape[0] == count
+        and count > 0
+        and int(pids.min()) >= 0
+        and int(pids.max()) < count
+        and np.unique(pids).shape[0] == count
+    )
+    runtime_by_src = np.arange(id_count, dtype=np.int64)
+    if use_pair_ids:
+        usable = min(id_count, count)
+        runtime_by_src[:usable] = pids[:usable]
+    fid_keys, first_src, fid_counts = np.unique(ids, return_index=True, return_counts=True)
+    fid_runtime = runtime_by_src[first_src]
+    tables["fid_keys"] = fid_keys
+    tables["fid_runtime"] = fid_runtime
+
+    # Runtime index -> formation id it is the reference drone of, else itself.
+    ref_size = max(count, id_count, int(fid_runtime.max()) + 1 if fid_runtime.size else 0)
+    ref_fid_by_runtime = np.arange(ref_size, dtype=np.int64)
+    ref_fid_by_runtime[fid_runtime] = fid_keys
+    tables["ref_fid_by_runtime"] = ref_fid_by_runtime
+
+    # Drones grouped by formation id: members[offsets[i]:offsets[i + 1]] share fid_keys[i].
+    offsets = np.zeros((fid_keys.shape[0] + 1,), dtype=np.int64)
+    np.cumsum(fid_counts, out=offsets[1:])
+    tables["fid_counts"] = fid_counts
+    tables["fid_offsets"] = offsets
+    tables["fid_members"] = runtime_by_src[np.argsort(ids, kind="stable")]
+    return tables
+
+
+def _id_tables() -> Dict[str, Any]:
+    tables = _LED_FRAME_CACHE.get("id_tables")
+    if tables is None:
+        tables = _build_id_tables(
+            _LED_FRAME_CACHE.get("positions"),
+            _LED_FRAME_CACHE.get("formation_ids"),
+            _LED_FRAME_CACHE.get("pair_ids"),
+        )
+        _LED_FRAME_CACHE["id_tables"] = tables
+    return tables
 
 
 @register_runtime_function
 def _formation_id(idx: int) -> int:
     idx_val = int(idx)
-    ids = _LED_FRAME_CACHE.get("formation_ids")
-    if ids:
-        src_idx = idx_val
-        pair_ids = _LED_FRAME_CACHE.get("pair_ids")
-        if pair_ids and len(pair_ids) == len(ids):
-            inv = _LED_FRAME_CACHE.get("pair_id_inv_map")
-            if inv is None:
-                inv = {}
-                for src_idx_local, pid in enumerate(pair_ids):
-                    key = int(pid)
-                    if key in inv:
-                        raise ValueError("duplicate pair_id in formation mapping")
-                    inv[key] = src_idx_local
-                _LED_FRAME_CACHE["pair_id_inv_map"] = inv
-            src_idx = inv.get(idx_val, idx_val)
-        if 0 <= src_idx < len(ids):
-            return int(ids[src_idx])
-    return int(idx_val)
+    tables = _id_tables()
+    fid_by_runtime = tables.get("fid_by_runtime")
+    if fid_by_runtime is None:
+        return idx_val
+    if tables.get("pair_duplicate"):
+        raise ValueError("duplicate pair_id in formation mapping")
+    if 0 <= idx_val < fid_by_runtime.shape[0]:
+        return int(fid_by_runtime[idx_val])
+    pair_lookup = tables.get("pair_lookup")
+    if pair_lookup is not None:
+        hits = np.flatnonzero(pair_lookup == idx_val)
+        if hits.size:
+            return int(tables["formation_ids"][hits[0]])
+    return idx_val
+
+
+def _formation_ref_fid(idx: int) -> int:
+    """Formation id whose reference drone is runtime ``idx``; ``idx`` if none."""
+    idx_val = int(idx)
+    ref = _id_tables().get("ref_fid_by_runtime")
+    if ref is not None and 0 <= idx_val < ref.shape[0]:
+        return int(ref[idx_val])
+    return idx_val
 
 
 @register_runtime_function
@@ -171,6 +343,13 @@ def _object_world_transform(obj_name: str):
     return result
 
 
+def _bounds_tuple(bounds) -> Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float]]]:
+    if bounds is None:
+        return None
+    bmin, bmax = bounds
+    return (float(bmin[0]), float(bmin[1]), float(bmin[2])), (float(bmax[0]), float(bmax[1]), float(bmax[2]))
+
+
 def _object_world_bbox(obj: bpy.types.Object) -> Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float]]]:
     if obj is None:
         return None
@@ -178,19 +357,9 @@ def _object_world_bbox(obj: bpy.types.Object) -> Optional[Tuple[Tuple[float, flo
         cached = _LED_FRAME_CACHE["bbox"].get(obj.name)
         if cached is not None:
             return cached
-    bbox = obj.bound_box
-    if not bbox:
+    bounds = _bounds_tuple(bounds_util.world_bounds(obj))
+    if bounds is None:
         return None
-    mw = obj.matrix_world
-    xs: List[float] = []
-    ys: List[float] = []
-    zs: List[float] = []
-    for co in bbox:
-        world = mw @ mathutils.Vector(co)
-        xs.append(world.x)
-        ys.append(world.y)
-        zs.append(world.z)
-    bounds = (min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))
     if _LED_FRAME_CACHE.get("frame") is not None:
         _LED_FRAME_CACHE["bbox"][obj.name] = bounds
     return bounds
@@ -218,29 +387,8 @@ def _collection_world_bbox(
             if use_children:
                 stack.extend(list(current.children))
         names = [obj.name for obj in candidates]
-    min_v = None
-    max_v = None
-    for name in names:
-        obj = bpy.data.objects.get(name)
-        if obj is None or obj.type != 'MESH':
-            continue
-        bounds = _object_world_bbox(obj)
-        if not bounds:
-            continue
-        (min_x, min_y, min_z), (max_x, max_y, max_z) = bounds
-        if min_v is None:
-            min_v = [min_x, min_y, min_z]
-            max_v = [max_x, max_y, max_z]
-        else:
-            min_v[0] = min(min_v[0], min_x)
-            min_v[1] = min(min_v[1], min_y)
-            min_v[2] = min(min_v[2], min_z)
-            max_v[0] = max(max_v[0], max_x)
-            max_v[1] = max(max_v[1], max_y)
-            max_v[2] = max(max_v[2], max_z)
-    if min_v is None or max_v is None:
-        return None
-    return (min_v[0], min_v[1], min_v[2]), (max_v[0], max_v[1], max_v[2])
+    objects = [bpy.data.objects.get(name) for name in names]
+    return _bounds_tuple(bounds_util.collection_bounds(obj for obj in objects if obj is not None))
 
 
 def _point_in_bbox(pos: Tuple[float, float, float], bounds) -> bool:
@@ -256,28 +404,39 @@ def _distance_to_bbox(pos: Tuple[float, float, float], bounds) -> float:
     return math.sqrt(dx * dx + dy * dy + dz * dz)
 
 
+def _frame_positions_f64() -> Optional[np.ndarray]:
+    cache = _LED_FRAME_CACHE["projection"]
+    pts = cache.get("positions")
+    if pts is None:
+        pts = np.asarray(_LED_FRAME_CACHE.get("positions") or [], dtype=np.float64).reshape(-1, 3)
+        cache["positions"] = pts
+    return pts
+
+
+def _frame_projection(key, build) -> np.ndarray:
+    # Projections are computed for every drone at once the first time a key is queried.
+    cache = _LED_FRAME_CACHE["projection"]
+    values = cache.get(key)
+    if values is None:
+        values = build(_frame_positions_f64())
+        cache[key] = values
+    return values
+
+
 @register_runtime_function
-def _project_bbox_uv(obj_name: str, pos: Tuple[float, float, float]) -> Tuple[float, float]:
+def _project_bbox_uv(obj_name: str, pos: Tuple[float, float, float], idx: Optional[int] = None) -> Tuple[float, float]:
     obj = _get_object(obj_name)
     if obj is None:
         return 0.0, 0.0
-    bbox = obj.bound_box
-    if not bbox:
+    entry = bounds_util.object_bounds(obj)
+    if entry is None:
         return 0.0, 0.0
-    min_x = min(co[0] for co in bbox)
-    max_x = max(co[0] for co in bbox)
-    min_z = min(co[2] for co in bbox)
-    max_z = max(co[2] for co in bbox)
-    span_x = max(0.0001, max_x - min_x)
-    span_z = max(0.0001, max_z - min_z)
-    try:
-        local = obj.matrix_world.inverted() @ mathutils.Vector(pos)
-        u = _clamp((local.x - min_x) / span_x, 0.0, 1.0)
-        v = _clamp((local.z - min_z) / span_z, 0.0, 1.0)
-    except Exception:
-        u = 0.0
-        v = 0.0
-    return u, v
+    idx_i = _frame_row(idx, pos)
+    if idx_i is not None:
+        uv = _frame_projection(("uv", obj.name), lambda pts: bounds_util.project_uv(entry, pts))[idx_i]
+    else:
+        uv = bounds_util.project_uv(entry, (pos,))[0]
+    return float(uv[0]), float(uv[1])
 
 
 @register_runtime_function
@@ -298,6 +457,77 @@ def _point_in_mesh_bbox(obj_name: str, pos: Tuple[float, float, float]) -> bool:
     return _point_in_bbox(pos, bounds)
 
 
+def _get_mesh_bvh(obj: bpy.types.Object) -> Optional[Dict[str, Any]]:
+    if obj is None or obj.type != 'MESH':
+        return None
+    if _LED_FRAME_CACHE.get("frame") is None:
+        return mesh_bvh.object_bvh(obj)
+    cache = _LED_FRAME_CACHE["bvh"]
+    if obj.name not in cache:
+        cache[obj.name] = mesh_bvh.object_bvh(obj)
+    return cache[obj.name]
+
+
+def _frame_inside_mask(obj: bpy.types.Object, entry: Dict[str, Any]) -> Optional[np.ndarray]:
+    pts = _frame_positions_array()
+    if pts is None:
+        return None
+    cache = _LED_FRAME_CACHE["inside"]
+    mask = cache.get(obj.name)
+    if mask is None:
+        mask = mesh_bvh.points_inside(entry, mesh_bvh.to_local(obj, pts))
+        cache[obj.name] = mask
+    return mask
+
+
+@register_runtime_function
+def _point_in_mesh(obj_name: str, idx: int, pos: Tuple[float, float, float]) -> bool:
+    obj = _get_object(obj_name)
+    bounds = _object_world_bbox(obj)
+    if not bounds or not _point_in_bbox(pos, bounds):
+        return False
+    entry = _get_mesh_bvh(obj)
+    if entry is None:
+        return False
+    idx_i = _frame_row(idx, pos)
+    if idx_i is not None:
+        # Classify every drone in one pass the first time this object is queried.
+        mask = _frame_inside_mask(obj, entry)
+        if mask is not None:
+            return bool(mask[idx_i])
+    return bool(mesh_bvh.points_inside(entry, mesh_bvh.to_local(obj, (pos,)))[0])
+
+
+# Grid resolution of the cached signed distance field used by the "GRID" mode.
+_SDF_RESOLUTION = 32
+
+
+def _mesh_distances(obj: bpy.types.Object, entry: Dict[str, Any], points, mode: str) -> np.ndarray:
+    # Deforming meshes would rebuild the grid every frame; the BVH is cheaper there.
+    if mode == "GRID" and time_static.is_time_static(obj, world=False):
+        return mesh_bvh.points_distance_sdf(obj, entry, points, _SDF_RESOLUTION)
+    return mesh_bvh.points_distance(obj, entry, points)
+
+
+@register_runtime_function
+def _distance_to_mesh(obj_name: str, idx: int, pos: Tuple[float, float, float], mode: str = "SURFACE") -> float:
+    obj = _get_object(obj_name)
+    entry = _get_mesh_bvh(obj)
+    if entry is None:
+        return 0.0
+    idx_i = _frame_row(idx, pos)
+    if idx_i is not None:
+        # Measure every drone in one pass the first time this object is queried.
+        cache = _LED_FRAME_CACHE["distance"]
+        key = (obj.name, mode)
+        dists = cache.get(key)
+        if dists is None:
+            dists = _mesh_distances(obj, entry, _frame_positions_array(), mode)
+            cache[key] = dists
+        return float(dists[idx_i])
+    return float(_mesh_distances(obj, entry, (pos,), mode)[0])
+
+
 def _build_mesh_cache(obj: bpy.types.Object) -> Optional[Dict[str, Any]]:
     if obj is None or obj.type != 'MESH':
         return None
@@ -629,21 +859,35 @@ def _get_formation_bbox(cache_key: Optional[str] = None, static: bool = False):
     return bounds
 
 
+def _formation_relpos_row(
+    pos: Tuple[float, float, float],
+    cache_key: Optional[str],
+    static: bool,
+    idx: Optional[int],
+) -> Optional[np.ndarray]:
+    bounds = _get_formation_bbox(cache_key, static)
+    if not bounds:
+        return None
+    bmin = np.asarray(bounds[0], dtype=np.float64)
+    bmax = np.asarray(bounds[1], dtype=np.float64)
+    idx_i = _frame_row(idx, pos)
+    if idx_i is None:
+        return bounds_util.normalized((pos,), bmin, bmax)[0]
+    key = ("formation", bounds)
+    return _frame_projection(key, lambda pts: bounds_util.normalized(pts, bmin, bmax))[idx_i]
+
+
 @register_runtime_function
 def _formation_bbox_uv(
     pos: Tuple[float, float, float],
     cache_key: Optional[str] = None,
     static: bool = False,
+    idx: Optional[int] = None,
 ) -> Tuple[float, float]:
-    bounds = _get_formation_bbox(cache_key, static)
-    if not bounds:
+    rel = _formation_relpos_row(pos, cache_key, static, idx)
+    if rel is None:
         return 0.0, 0.0
-    (min_x, min_y, min_z), (max_x, max_y, max_z) = bounds
-    span_x = max(0.0001, max_x - min_x)
-    span_z = max(0.0001, max_z - min_z)
-    u = _clamp((pos[0] - min_x) / span_x, 0.0, 1.0)
-    v = _clamp((pos[2] - min_z) / span_z, 0.0, 1.0)
-    return u, v
+    return float(rel[0]), float(rel[2])
 
 
 @register_runtime_function
@@ -651,18 +895,12 @@ def _formation_bbox_relpos(
     pos: Tuple[float, float, float],
     cache_key: Optional[str] = None,
     static: bool = False,
+    idx: Optional[int] = None,
 ) -> Tuple[float, float, float]:
-    bounds = _get_formation_bbox(cache_key, static)
-    if not bounds:
+    rel = _formation_relpos_row(pos, cache_key, static, idx)
+    if rel is None:
         return 0.0, 0.0, 0.0
-    (min_x, min_y, min_z), (max_x, max_y, max_z) = bounds
-    span_x = max(0.0001, max_x - min_x)
-    span_y = max(0.0001, max_y - min_y)
-    span_z = max(0.0001, max_z - min_z)
-    rel_x = _clamp((pos[0] - min_x) / span_x, 0.0, 1.0)
-    rel_y = _clamp((pos[1] - min_y) / span_y, 0.0, 1.0)
-    rel_z = _clamp((pos[2] - min_z) / span_z, 0.0, 1.0)
-    return rel_x, rel_y, rel_z
+    return float(rel[0]), float(rel[1]), float(rel[2])
 
 
 def _mesh_formation_ids(mesh: Optional[bpy.types.Mesh], require_attr: bool = False) -> List[int]:
@@ -5,6 +5,7 @@ from typing import Dict, List, Optional, Sequence, Tuple
 import bpy
 
 from liberadronecore.ledeffects.nodes.util import le_meshinfo
+from liberadronecore.ledeffects.util import neighbor_graph
 
 
 def _particle_fps() -> float:
@@ -25,40 +26,11 @@ def _formation_id_map() -> Dict[int, int]:
     cached = cache.get("formation_id_map")
     if isinstance(cached, dict):
         return cached
+    tables = le_meshinfo._id_tables()
+    fid_keys = tables.get("fid_keys")
     mapping: Dict[int, int] = {}
-    ids = cache.get("formation_ids")
-    if ids is None:
-        ids = []
-    pair_ids = cache.get("pair_ids")
-    positions = cache.get("positions") or []
-    use_pair_ids = False
-    if pair_ids is not None and len(pair_ids) == len(positions):
-        seen = set()
-        use_pair_ids = True
-        for pid in pair_ids:
-            try:
-                key = int(pid)
-            except (TypeError, ValueError):
-                use_pair_ids = False
-                break
-            if key < 0 or key >= len(positions) or key in seen:
-                use_pair_ids = False
-                break
-            seen.add(key)
-    for src_idx, fid in enumerate(ids):
-        try:
-            key = int(fid)
-        except (TypeError, ValueError):
-            continue
-        if key in mapping:
-            continue
-        runtime_idx = src_idx
-        if use_pair_ids and src_idx < len(pair_ids):
-            try:
-                runtime_idx = int(pair_ids[src_idx])
-            except (TypeError, ValueError):
-                runtime_idx = src_idx
-        mapping[key] = runtime_idx
+    if fid_keys is not None:
+        mapping = dict(zip(fid_keys.tolist(), tables["fid_runtime"].tolist()))
     cache["formation_id_map"] = mapping
     return mapping
 
@@ -155,37 +127,17 @@ def _resolve_mask_context(
     return True, mask_key, allowed_indices, allowed_set
 
 
-def _neighbor_map(
+def _neighbor_graph(
     state: Dict[str, object],
     positions: List[Tuple[float, float, float]],
     allowed_indices: Sequence[int],
     neighbor_count: int,
-    *,
-    frame: Optional[int] = None,
-) -> List[List[int]]:
-    sig = (int(frame) if frame is not None else None, state.get("route_sig"), int(neighbor_count))
-    cached_sig = state.get("neighbor_sig")
-    cached = state.get("neighbor_map")
-    if cached_sig == sig and isinstance(cached, list):
-        return cached
-    count = len(positions)
-    neighbors: List[List[int]] = [[] for _ in range(count)]
-    allowed = [idx for idx in allowed_indices if 0 <= idx < count]
-    if allowed:
-        for idx in allowed:
-            cx, cy, cz = positions[idx]
-            dists: List[Tuple[float, int]] = []
-            for other in allowed:
-                if other == idx:
-                    continue
-                px, py, pz = positions[other]
-                dx = px - cx
-                dy = py - cy
-                dz = pz - cz
-                dists.append((dx * dx + dy * dy + dz * dz, other))
-            if dists:
-                dists.sort(key=lambda item: item[0])
-                neighbors[idx] = [item[1] for item in dists[: min(neighbor_count, len(dists))]]
-    state["neighbor_sig"] = sig
-    state["neighbor_map"] = neighbors
-    return neighbors
+) -> Dict[str, object]:
+    graph = neighbor_graph.knn_graph(
+        positions,
+        allowed_indices,
+        neighbor_count,
+        graph=state.get("neighbor_graph"),
+    )
+    state["neighbor_graph"] = graph
+    return graph
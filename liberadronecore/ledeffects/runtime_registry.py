@@ -1,9 +1,26 @@
 from __future__ import annotations
 
-from typing import Callable, Dict, Optional
+import functools
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 
 _RUNTIME_FUNCTIONS: Dict[str, Callable] = {}
 
+# Bumped on every registration change; snapshots and namespaces are rebuilt lazily per version.
+_VERSION = 0
+_SNAPSHOT: Dict[str, Any] = {"version": None, "counting": None, "functions": None}
+# Shared exec globals keyed by (version, id(base)); compiled functions keep a
+# reference to theirs, so registrations made later never leak into older code.
+_NAMESPACES: Dict[Tuple[int, int], Dict[str, Any]] = {}
+_COUNTING = False
+_CALL_COUNTS: Dict[str, int] = {}
+
+
+def _bump_version() -> None:
+    global _VERSION
+    _VERSION += 1
+    _NAMESPACES.clear()
+
 
 def register_runtime_function(func: Optional[Callable] = None, *, name: Optional[str] = None):
     if func is None:
@@ -14,19 +31,82 @@ def register_runtime_function(func: Optional[Callable] = None, *, name: Optional
     fn_name = name or getattr(func, "__name__", None)
     if not fn_name:
         return func
-    _RUNTIME_FUNCTIONS[fn_name] = func
+    if _RUNTIME_FUNCTIONS.get(fn_name) is not func:
+        _RUNTIME_FUNCTIONS[fn_name] = func
+        _bump_version()
     return func
 
 
 def register_runtime_functions(funcs: Dict[str, Callable]) -> None:
     for key, func in (funcs or {}).items():
         if callable(func):
-            _RUNTIME_FUNCTIONS[key] = func
+            register_runtime_function(func, name=key)
 
 
 def clear_runtime_functions() -> None:
     _RUNTIME_FUNCTIONS.clear()
+    _bump_version()
 
 
 def runtime_functions() -> Dict[str, Callable]:
     return dict(_RUNTIME_FUNCTIONS)
+
+
+def registry_version() -> int:
+    """Changes whenever code compiled against the registry should be rebuilt."""
+    return _VERSION
+
+
+def _counted(fn_name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _CALL_COUNTS[fn_name] = _CALL_COUNTS.get(fn_name, 0) + 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def runtime_snapshot() -> Mapping[str, Callable]:
+    """Read-only view of the registered functions, rebuilt only after registrations change."""
+    if _SNAPSHOT["version"] != _VERSION or _SNAPSHOT["counting"] != _COUNTING:
+        funcs = dict(_RUNTIME_FUNCTIONS)
+        if _COUNTING:
+            funcs = {key: _counted(key, func) for key, func in funcs.items()}
+        _SNAPSHOT.update({"version": _VERSION, "counting": _COUNTING, "functions": MappingProxyType(funcs)})
+    return _SNAPSHOT["functions"]
+
+
+def exec_runtime(code: str, name: str, base: Optional[Dict[str, Any]] = None) -> Callable:
+    """Exec generated ``code`` in the shared runtime namespace and return the function ``name``.
+
+    ``base`` holds extra module globals (bpy, math, ...) and must be a long-lived dict;
+    namespaces are shared per base object and registry version.
+    """
+    key = (_VERSION, id(base))
+    env = _NAMESPACES.get(key)
+    if env is None:
+        env = dict(base or {})
+        env.update(runtime_snapshot())
+        _NAMESPACES[key] = env
+    exec(code, env)
+    return env.pop(name)
+
+
+def set_call_counting(enabled: bool) -> None:
+    """Wrap runtime functions with call counters in code compiled from now on."""
+    global _COUNTING
+    enabled = bool(enabled)
+    if enabled != _COUNTING:
+        _COUNTING = enabled
+        _bump_version()
+
+
+def is_call_counting() -> bool:
+    return _COUNTING
+
+
+def call_counts() -> Dict[str, int]:
+    return dict(sorted(_CALL_COUNTS.items(), key=lambda item: item[1], reverse=True))
+
+
+def reset_call_counts() -> None:
+    _CALL_COUNTS.clear()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import bpy
+import numpy as np
+
+
+# Per-object world bounds, reused while the object's matrix and local bounds are unchanged.
+_OBJECT_BOUNDS: Dict[str, Dict[str, Any]] = {}
+# Keep spans away from zero so flat meshes still project to finite UVs.
+MIN_SPAN = 0.0001
+
+
+def matrix_array(obj: bpy.types.Object) -> np.ndarray:
+    return np.array(obj.matrix_world, dtype=np.float64).reshape(4, 4)
+
+
+def transform_points(matrix: np.ndarray, points) -> np.ndarray:
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return pts @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def points_bounds(points) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if pts.shape[0] == 0:
+        return None
+    return pts.min(axis=0), pts.max(axis=0)
+
+
+def merge_bounds(bounds: Iterable[Optional[Tuple[np.ndarray, np.ndarray]]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    items = [b for b in bounds if b is not None]
+    if not items:
+        return None
+    return np.min([b[0] for b in items], axis=0), np.max([b[1] for b in items], axis=0)
+
+
+def object_bounds(obj: Optional[bpy.types.Object]) -> Optional[Dict[str, Any]]:
+    """Local and world bounds of ``obj``; ``inv`` maps world points into local space."""
+    if obj is None:
+        return None
+    corners = np.array(obj.bound_box, dtype=np.float64).reshape(-1, 3) if obj.bound_box else None
+    if corners is None or corners.shape[0] == 0:
+        _OBJECT_BOUNDS.pop(obj.name, None)
+        return None
+    mw = matrix_array(obj)
+    entry = _OBJECT_BOUNDS.get(obj.name)
+    if entry is not None and np.array_equal(entry["matrix"], mw) and np.array_equal(entry["corners"], corners):
+        return entry
+    world = transform_points(mw, corners)
+    entry = {
+        "matrix": mw,
+        "corners": corners,
+        "local_min": corners.min(axis=0),
+        "local_max": corners.max(axis=0),
+        "world_min": world.min(axis=0),
+        "world_max": world.max(axis=0),
+        "inv": None,
+    }
+    _OBJECT_BOUNDS[obj.name] = entry
+    return entry
+
+
+def world_bounds(obj: Optional[bpy.types.Object]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    entry = object_bounds(obj)
+    if entry is None:
+        return None
+    return entry["world_min"], entry["world_max"]
+
+
+def collection_bounds(objects: Iterable[bpy.types.Object]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    return merge_bounds(world_bounds(obj) for obj in objects if obj is not None and obj.type == 'MESH')
+
+
+def _inverse(entry: Dict[str, Any]) -> Optional[np.ndarray]:
+    inv = entry.get("inv")
+    if inv is None:
+        try:
+            inv = np.linalg.inv(entry["matrix"])
+        except np.linalg.LinAlgError:
+            inv = False
+        entry["inv"] = inv
+    return inv if inv is not False else None
+
+
+def normalized(points, bounds_min: np.ndarray, bounds_max: np.ndarray) -> np.ndarray:
+    """Points mapped into [0,1] per axis of the given bounds (clamped)."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    span = np.maximum(bounds_max - bounds_min, MIN_SPAN)
+    return np.clip((pts - bounds_min) / span, 0.0, 1.0)
+
+
+def project_uv(entry: Optional[Dict[str, Any]], points_world) -> np.ndarray:
+    """(N,2) UVs of world points projected onto the local XZ bounds of an object."""
+    pts = np.asarray(points_world, dtype=np.float64).reshape(-1, 3)
+    inv = _inverse(entry) if entry is not None else None
+    if inv is None:
+        return np.zeros((pts.shape[0], 2), dtype=np.float64)
+    rel = normalized(transform_points(inv, pts), entry["local_min"], entry["local_max"])
+    return rel[:, (0, 2)]
+
+
+def clear_bounds_cache() -> None:
+    _OBJECT_BOUNDS.clear()
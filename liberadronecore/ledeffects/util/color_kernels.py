@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+
+# Scalar kernels follow colorsys / the channel formulas step for step, so results
+# match the previous per-drone functions exactly; the array kernels evaluate the
+# same expressions on (N,4) RGBA arrays and agree to float rounding.
+_LUMA = (0.2126, 0.7152, 0.0722)
+
+Color = Tuple[float, float, float, float]
+
+
+def rgb_to_hsv(color) -> Color:
+    r, g, b, a = color
+    maxc = max(r, g, b)
+    minc = min(r, g, b)
+    if minc == maxc:
+        return 0.0, 0.0, maxc, a
+    rangec = maxc - minc
+    s = rangec / maxc
+    rc = (maxc - r) / rangec
+    gc = (maxc - g) / rangec
+    bc = (maxc - b) / rangec
+    if r == maxc:
+        h = bc - gc
+    elif g == maxc:
+        h = 2.0 + rc - bc
+    else:
+        h = 4.0 + gc - rc
+    return (h / 6.0) % 1.0, s, maxc, a
+
+
+def hsv_to_rgb(color) -> Color:
+    h, s, v, a = color
+    if s == 0.0:
+        return v, v, v, a
+    i = int(h * 6.0)
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i % 6
+    if i == 0:
+        return v, t, p, a
+    if i == 1:
+        return q, v, p, a
+    if i == 2:
+        return p, v, t, a
+    if i == 3:
+        return p, q, v, a
+    if i == 4:
+        return t, p, v, a
+    return v, p, q, a
+
+
+def hsv_adjust(color, hue: float, saturation: float, value: float) -> Color:
+    """Shift hue (wrapped) and saturation/value (clamped) in one pass."""
+    h, s, v, a = rgb_to_hsv(color)
+    h = h + hue
+    h = h - math.floor(h)
+    s = min(max(s + saturation, 0.0), 1.0)
+    v = min(max(v + value, 0.0), 1.0)
+    return hsv_to_rgb((h, s, v, a))
+
+
+def srgb_to_linear_channel(c: float) -> float:
+    if c <= 0.04045:
+        return c / 12.92
+    return ((c + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb_channel(c: float) -> float:
+    if c <= 0.0031308:
+        return c * 12.92
+    return 1.055 * (c ** (1.0 / 2.4)) - 0.055
+
+
+def srgb_to_linear(color) -> Color:
+    r, g, b, a = color
+    return srgb_to_linear_channel(r), srgb_to_linear_channel(g), srgb_to_linear_channel(b), a
+
+
+def linear_to_srgb(color) -> Color:
+    r, g, b, a = color
+    return linear_to_srgb_channel(r), linear_to_srgb_channel(g), linear_to_srgb_channel(b), a
+
+
+def grayscale(color) -> Color:
+    r, g, b, a = color
+    gray = _LUMA[0] * r + _LUMA[1] * g + _LUMA[2] * b
+    return gray, gray, gray, a
+
+
+def _rgba(colors) -> np.ndarray:
+    return np.asarray(colors, dtype=np.float64).reshape(-1, 4)
+
+
+def rgb_to_hsv_array(colors) -> np.ndarray:
+    arr = _rgba(colors)
+    r, g, b = arr[:, 0], arr[:, 1], arr[:, 2]
+    maxc = arr[:, :3].max(axis=1)
+    minc = arr[:, :3].min(axis=1)
+    rangec = maxc - minc
+    gray = rangec == 0.0
+    safe_range = np.where(gray, 1.0, rangec)
+    safe_max = np.where(gray, 1.0, maxc)
+    rc = (maxc - r) / safe_range
+    gc = (maxc - g) / safe_range
+    bc = (maxc - b) / safe_range
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    out = np.empty_like(arr)
+    out[:, 0] = np.where(gray, 0.0, np.mod(h / 6.0, 1.0))
+    out[:, 1] = np.where(gray, 0.0, rangec / safe_max)
+    out[:, 2] = maxc
+    out[:, 3] = arr[:, 3]
+    return out
+
+
+def hsv_to_rgb_array(colors) -> np.ndarray:
+    arr = _rgba(colors)
+    h, s, v = arr[:, 0], arr[:, 1], arr[:, 2]
+    i = np.trunc(h * 6.0)
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    sector = np.mod(i.astype(np.int64), 6)
+    choices = (
+        (v, t, p),
+        (q, v, p),
+        (p, v, t),
+        (p, q, v),
+        (t, p, v),
+        (v, p, q),
+    )
+    out = np.empty_like(arr)
+    gray = s == 0.0
+    for ch in range(3):
+        value = np.choose(sector, [choice[ch] for choice in choices])
+        out[:, ch] = np.where(gray, v, value)
+    out[:, 3] = arr[:, 3]
+    return out
+
+
+def hsv_adjust_array(colors, hue, saturation, value) -> np.ndarray:
+    hsv = rgb_to_hsv_array(colors)
+    h = hsv[:, 0] + hue
+    hsv[:, 0] = h - np.floor(h)
+    hsv[:, 1] = np.clip(hsv[:, 1] + saturation, 0.0, 1.0)
+    hsv[:, 2] = np.clip(hsv[:, 2] + value, 0.0, 1.0)
+    return hsv_to_rgb_array(hsv)
+
+
+def srgb_to_linear_array(colors) -> np.ndarray:
+    out = _rgba(colors).copy()
+    rgb = out[:, :3]
+    # Clamp the base before the power so the discarded branch never produces NaN.
+    curved = ((np.maximum(rgb, 0.04045) + 0.055) / 1.055) ** 2.4
+    out[:, :3] = np.where(rgb <= 0.04045, rgb / 12.92, curved)
+    return out
+
+
+def linear_to_srgb_array(colors) -> np.ndarray:
+    out = _rgba(colors).copy()
+    rgb = out[:, :3]
+    curved = 1.055 * (np.maximum(rgb, 0.0031308) ** (1.0 / 2.4)) - 0.055
+    out[:, :3] = np.where(rgb <= 0.0031308, rgb * 12.92, curved)
+    return out
+
+
+def grayscale_array(colors) -> np.ndarray:
+    out = _rgba(colors).copy()
+    gray = _LUMA[0] * out[:, 0] + _LUMA[1] * out[:, 1] + _LUMA[2] * out[:, 2]
+    out[:, 0] = gray
+    out[:, 1] = gray
+    out[:, 2] = gray
+    return out
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import bpy
+from bpy.app.handlers import persistent
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+from liberadronecore.util import time_static
+
+
+_BVH_CACHE: Dict[str, Dict[str, Any]] = {}
+# Geometry revision per object name, bumped by depsgraph updates of that object or its mesh.
+_GEOMETRY_REVISIONS: Dict[str, int] = {}
+
+# Skewed so parity rays do not run along axis-aligned edges of boxy meshes.
+_RAY_DIR = Vector((0.2963, 0.1337, 0.9457)).normalized()
+_RAY_HIT_LIMIT = 256
+
+
+def _mesh_arrays(obj: bpy.types.Object, depsgraph) -> tuple[np.ndarray, np.ndarray]:
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    try:
+        verts = np.empty((len(mesh.vertices) * 3,), dtype=np.float32)
+        mesh.vertices.foreach_get("co", verts)
+        mesh.calc_loop_triangles()
+        tris = np.empty((len(mesh.loop_triangles) * 3,), dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", tris)
+    finally:
+        eval_obj.to_mesh_clear()
+    return verts.reshape(-1, 3), tris.reshape(-1, 3)
+
+
+def invalidate_object(obj_name: str) -> None:
+    _GEOMETRY_REVISIONS[obj_name] = _GEOMETRY_REVISIONS.get(obj_name, 0) + 1
+
+
+@persistent
+def on_depsgraph_update(_scene, depsgraph) -> None:
+    if not _BVH_CACHE:
+        return
+    for update in depsgraph.updates:
+        update_id = getattr(update.id, "original", update.id)
+        if isinstance(update_id, bpy.types.Object) and update.is_updated_geometry:
+            invalidate_object(update_id.name)
+        elif isinstance(update_id, bpy.types.Mesh):
+            for name in [name for name, entry in _BVH_CACHE.items() if entry.get("mesh") == update_id.name]:
+                invalidate_object(name)
+
+
+def object_bvh(obj: bpy.types.Object, depsgraph=None) -> Optional[Dict[str, Any]]:
+    """Return the local-space BVH entry of an evaluated mesh object.
+
+    Entries are keyed on the object's geometry revision, plus the frame for
+    animated or modified objects, so an unchanged object costs no readback.
+    Object transforms are applied by the callers, so moving the object is free.
+    """
+    if obj is None or obj.type != 'MESH':
+        return None
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    frame = None if time_static.is_time_static(obj, world=False) else int(depsgraph.scene.frame_current)
+    key = (_GEOMETRY_REVISIONS.get(obj.name, 0), frame)
+    entry = _BVH_CACHE.get(obj.name)
+    if entry is not None and entry.get("key") == key:
+        return entry if entry.get("bvh") is not None else None
+    verts, tris = _mesh_arrays(obj, depsgraph)
+    if verts.shape[0] == 0 or tris.shape[0] == 0:
+        _BVH_CACHE[obj.name] = {"key": key, "mesh": obj.data.name, "bvh": None}
+        return None
+    sig = (verts.shape[0], tris.shape[0], hash(verts.tobytes()), hash(tris.tobytes()))
+    if entry is not None and entry.get("sig") == sig:
+        # Re-evaluated per frame but unchanged: keep the tree and its distance grids.
+        entry["key"] = key
+        return entry
+    bounds_min = verts.min(axis=0)
+    bounds_max = verts.max(axis=0)
+    diag = float(np.linalg.norm(bounds_max - bounds_min))
+    entry = {
+        "key": key,
+        "mesh": obj.data.name,
+        "sig": sig,
+        "bvh": BVHTree.FromPolygons(verts.tolist(), tris.tolist(), all_triangles=True),
+        "verts": verts,
+        "tris": tris,
+        "bounds_min": bounds_min,
+        "bounds_max": bounds_max,
+        "eps": max(diag, 1.0) * 1e-6,
+    }
+    _BVH_CACHE[obj.name] = entry
+    return entry
+
+
+def clear_bvh_cache() -> None:
+    _BVH_CACHE.clear()
+    _GEOMETRY_REVISIONS.clear()
+
+
+def to_local(obj: bpy.types.Object, points: np.ndarray) -> np.ndarray:
+    inv = np.array(obj.matrix_world.inverted(), dtype=np.float64)
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return pts @ inv[:3, :3].T + inv[:3, 3]
+
+
+def _ray_parity(bvh: BVHTree, co, eps: float) -> bool:
+    origin = Vector(co)
+    hits = 0
+    for _ in range(_RAY_HIT_LIMIT):
+        loc, _normal, _index, _dist = bvh.ray_cast(origin, _RAY_DIR)
+        if loc is None:
+            break
+        hits += 1
+        origin = loc + _RAY_DIR * eps
+    return (hits % 2) == 1
+
+
+def _row_crossings(bvh: BVHTree, origin, eps: float) -> np.ndarray:
+    """X coordinates where a +X ray from ``origin`` crosses the surface, in order."""
+    direction = Vector((1.0, 0.0, 0.0))
+    start = Vector(origin)
+    hits = []
+    for _ in range(_RAY_HIT_LIMIT):
+        loc, _normal, _index, _dist = bvh.ray_cast(start, direction)
+        if loc is None:
+            break
+        hits.append(loc[0])
+        start = loc + direction * eps
+    return np.asarray(hits, dtype=np.float64)
+
+
+def points_inside(entry: Dict[str, Any], points_local: np.ndarray) -> np.ndarray:
+    """Classify local-space points by ray parity, rejecting by bounds first."""
+    pts = np.asarray(points_local, dtype=np.float64).reshape(-1, 3)
+    inside = np.all((pts >= entry["bounds_min"]) & (pts <= entry["bounds_max"]), axis=1)
+    bvh = entry["bvh"]
+    eps = entry["eps"]
+    for row in np.flatnonzero(inside):
+        inside[row] = _ray_parity(bvh, pts[row], eps)
+    return inside
+
+
+def _nearest(bvh: BVHTree, co) -> tuple[Optional[Vector], float]:
+    loc, _normal, _index, dist = bvh.find_nearest(Vector(co))
+    if loc is None:
+        return None, 0.0
+    return loc, float(dist)
+
+
+def points_distance(obj: bpy.types.Object, entry: Dict[str, Any], points_world: np.ndarray) -> np.ndarray:
+    """World distance from each point to the mesh surface, 0 inside the volume.
+
+    The nearest point is found in local space, so under non-uniform object scale
+    it is not always the nearest one in world space and distances are approximate.
+    """
+    pts = np.asarray(points_world, dtype=np.float64).reshape(-1, 3)
+    local = to_local(obj, pts)
+    nearest = np.empty_like(local)
+    bvh = entry["bvh"]
+    for row in range(local.shape[0]):
+        loc, _dist = _nearest(bvh, local[row])
+        nearest[row] = local[row] if loc is None else (loc[0], loc[1], loc[2])
+    # The nearest face's normal is ambiguous next to edges and vertices; ray parity is not.
+    inside = points_inside(entry, local)
+    mw = np.array(obj.matrix_world, dtype=np.float64)
+    nearest_world = nearest @ mw[:3, :3].T + mw[:3, 3]
+    dist = np.linalg.norm(nearest_world - pts, axis=1)
+    dist[inside] = 0.0
+    return dist
+
+
+def sdf_grid(entry: Dict[str, Any], resolution: int) -> Dict[str, Any]:
+    """Local-space signed distance samples on a padded regular grid.
+
+    Built once per geometry revision, so only static meshes should use it. The
+    sign comes from ray parity along each grid row: one ray per row instead of
+    one per node.
+    """
+    resolution = max(2, int(resolution))
+    grids = entry.setdefault("sdf", {})
+    grid = grids.get(resolution)
+    if grid is not None:
+        return grid
+    bmin = entry["bounds_min"].astype(np.float64)
+    bmax = entry["bounds_max"].astype(np.float64)
+    pad = max(float(np.linalg.norm(bmax - bmin)) * 0.25, entry["eps"])
+    origin = bmin - pad
+    spacing = np.maximum((bmax + pad - origin) / float(resolution - 1), entry["eps"])
+    axes = [origin[i] + spacing[i] * np.arange(resolution) for i in range(3)]
+    gx, gy, gz = np.meshgrid(*axes, indexing="ij")
+    nodes = np.stack((gx.ravel(), gy.ravel(), gz.ravel()), axis=1)
+    bvh = entry["bvh"]
+    values = np.empty((nodes.shape[0],), dtype=np.float32)
+    for row in range(nodes.shape[0]):
+        values[row] = _nearest(bvh, nodes[row])[1]
+    values = values.reshape(resolution, resolution, resolution)
+    # The grid starts outside the padded bounds, so odd crossings left of a node mean inside.
+    for j in range(resolution):
+        for k in range(resolution):
+            crossings = _row_crossings(bvh, (axes[0][0], axes[1][j], axes[2][k]), entry["eps"])
+            if crossings.size:
+                inside = np.searchsorted(crossings, axes[0]) % 2 == 1
+                values[inside, j, k] *= -1.0
+    grid = {
+        "origin": origin,
+        "spacing": spacing,
+        "res": resolution,
+        "values": values,
+    }
+    grids[resolution] = grid
+    return grid
+
+
+def sample_sdf(grid: Dict[str, Any], points_local: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Trilinear SDF lookup; returns (values, covered) for points inside the grid."""
+    pts = np.asarray(points_local, dtype=np.float64).reshape(-1, 3)
+    res = grid["res"]
+    g = (pts - grid["origin"]) / grid["spacing"]
+    covered = np.all((g >= 0.0) & (g <= res - 1), axis=1)
+    g = np.clip(g, 0.0, res - 1)
+    i0 = np.minimum(np.floor(g).astype(np.int64), res - 2)
+    f = g - i0
+    values = grid["values"]
+    x0, y0, z0 = i0[:, 0], i0[:, 1], i0[:, 2]
+    fx, fy, fz = f[:, 0], f[:, 1], f[:, 2]
+    c00 = values[x0, y0, z0] * (1 - fx) + values[x0 + 1, y0, z0] * fx
+    c10 = values[x0, y0 + 1, z0] * (1 - fx) + values[x0 + 1, y0 + 1, z0] * fx
+    c01 = values[x0, y0, z0 + 1] * (1 - fx) + values[x0 + 1, y0, z0 + 1] * fx
+    c11 = values[x0, y0 + 1, z0 + 1] * (1 - fx) + values[x0 + 1, y0 + 1, z0 + 1] * fx
+    c0 = c00 * (1 - fy) + c10 * fy
+    c1 = c01 * (1 - fy) + c11 * fy
+    return c0 * (1 - fz) + c1 * fz, covered
+
+
+def points_distance_sdf(
+    obj: bpy.types.Object,
+    entry: Dict[str, Any],
+    points_world: np.ndarray,
+    resolution: int,
+) -> np.ndarray:
+    """Grid-approximated surface distance; points outside the grid use the BVH.
+
+    Grid values are scaled by the mean object scale, which is only exact for
+    uniform scale.
+    """
+    pts = np.asarray(points_world, dtype=np.float64).reshape(-1, 3)
+    grid = sdf_grid(entry, resolution)
+    values, covered = sample_sdf(grid, to_local(obj, pts))
+    scale = float(np.mean(np.abs(obj.matrix_world.to_scale())))
+    dist = np.maximum(values, 0.0) * scale
+    if not np.all(covered):
+        outside = np.flatnonzero(~covered)
+        dist[outside] = points_distance(obj, entry, pts[outside])
+    return dist
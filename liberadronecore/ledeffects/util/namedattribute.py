@@ -1,93 +1,148 @@
 from __future__ import annotations
 
 import bpy
+from bpy.app.handlers import persistent
+import numpy as np
 
 from liberadronecore.ledeffects.nodes.util import le_meshinfo
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
 from liberadronecore.formation import fn_parse_pairing
+from liberadronecore.util import time_static
 
 
-_NAMED_ATTR_CACHE: dict[tuple[str, int, str], list[float]] = {}
+# Per-object float32 attribute arrays, dropped by depsgraph updates of that object.
+_OBJECT_ATTR_CACHE: dict[tuple[str, str], dict[str, object]] = {}
+# Per-frame arrays concatenated over the Formation meshes and permuted to runtime order.
+_FRAME_ATTR_CACHE: dict[str, object] = {"key": None, "values": {}}
 
 
-def _cache_key(name: str) -> tuple[str, int, str]:
+def _frame_key() -> tuple[str, int]:
     scene = bpy.context.scene
     frame = le_meshinfo._LED_FRAME_CACHE.get("frame")
     if frame is None:
         frame = int(getattr(scene, "frame_current", 0)) if scene else 0
-    return (scene.name if scene else "", int(frame), str(name))
+    return (scene.name if scene else "", int(frame))
 
 
-def _build_named_attr_cache(name: str) -> list[float]:
+def _read_float_attr(eval_mesh, obj: bpy.types.Object, name: str, entry: dict[str, object]) -> np.ndarray:
+    count = len(eval_mesh.vertices)
+    attr = eval_mesh.attributes.get(name)
+    if (
+        attr is None
+        or attr.data_type != 'FLOAT'
+        or attr.domain != 'POINT'
+        or len(attr.data) != count
+    ):
+        attr = obj.data.attributes.get(name)
+    if (
+        attr is None
+        or attr.data_type != 'FLOAT'
+        or attr.domain != 'POINT'
+        or len(attr.data) != count
+    ):
+        raise ValueError(f"Named attribute not found: {name}")
+    values = entry.get("values")
+    if not isinstance(values, np.ndarray) or values.shape[0] != count:
+        values = np.empty((count,), dtype=np.float32)
+    attr.data.foreach_get("value", values)
+    return values
+
+
+def _object_attr_values(obj: bpy.types.Object, name: str, depsgraph, frame_key) -> np.ndarray:
+    key = (obj.name, name)
+    entry = _OBJECT_ATTR_CACHE.get(key)
+    if entry is not None and (entry.get("frame_key") == frame_key or entry.get("static")):
+        return entry["values"]
+    if entry is None:
+        entry = {}
+        _OBJECT_ATTR_CACHE[key] = entry
+    eval_obj = obj.evaluated_get(depsgraph)
+    eval_mesh = eval_obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+    try:
+        values = _read_float_attr(eval_mesh, obj, name, entry)
+    except ValueError:
+        _OBJECT_ATTR_CACHE.pop(key, None)
+        raise
+    finally:
+        eval_obj.to_mesh_clear()
+    entry["values"] = values
+    entry["mesh"] = obj.data.name
+    entry["frame_key"] = frame_key
+    entry["static"] = time_static.is_time_static(obj, world=False)
+    return values
+
+
+def _runtime_order(values: np.ndarray) -> np.ndarray:
+    src_by_runtime = le_meshinfo._id_tables().get("src_by_runtime")
+    if src_by_runtime is None or src_by_runtime.shape[0] != values.shape[0]:
+        return values
+    return values[src_by_runtime]
+
+
+def _build_named_attr_values(name: str, frame_key) -> np.ndarray:
     col = bpy.data.collections.get("Formation")
     if col is None:
-        return []
+        return np.zeros((0,), dtype=np.float32)
     meshes = fn_parse_pairing._collect_mesh_objects(col)
     if not meshes:
-        return []
+        return np.zeros((0,), dtype=np.float32)
     depsgraph = bpy.context.evaluated_depsgraph_get()
-    values: list[float] = []
-    for obj in meshes:
-        eval_obj = obj.evaluated_get(depsgraph)
-        eval_mesh = eval_obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
-        try:
-            attr = eval_mesh.attributes.get(name)
-            if (
-                attr is None
-                or attr.data_type != 'FLOAT'
-                or attr.domain != 'POINT'
-                or len(attr.data) != len(eval_mesh.vertices)
-            ):
-                attr = obj.data.attributes.get(name)
-            if (
-                attr is None
-                or attr.data_type != 'FLOAT'
-                or attr.domain != 'POINT'
-                or len(attr.data) != len(eval_mesh.vertices)
-            ):
-                raise ValueError(f"Named attribute not found: {name}")
-            vals = [0.0] * len(eval_mesh.vertices)
-            attr.data.foreach_get("value", vals)
-            values.extend(float(v) for v in vals)
-        finally:
-            eval_obj.to_mesh_clear()
-    return values
+    parts = [_object_attr_values(obj, name, depsgraph, frame_key) for obj in meshes]
+    return _runtime_order(np.concatenate(parts) if len(parts) > 1 else parts[0])
 
 
-def _get_named_attr_cache(name: str) -> list[float]:
-    key = _cache_key(name)
-    cached = _NAMED_ATTR_CACHE.get(key)
-    if cached is not None:
-        return cached
-    values = _build_named_attr_cache(str(name))
-    _NAMED_ATTR_CACHE[key] = values
+def _get_named_attr_values(name: str) -> np.ndarray:
+    frame_key = _frame_key()
+    cache = _FRAME_ATTR_CACHE
+    if cache.get("key") != frame_key:
+        cache["key"] = frame_key
+        cache["values"] = {}
+    values = cache["values"].get(name)
+    if values is None:
+        values = _build_named_attr_values(str(name), frame_key)
+        cache["values"][name] = values
     return values
 
 
+def invalidate_object(obj_name: str) -> None:
+    for key in [key for key in _OBJECT_ATTR_CACHE if key[0] == obj_name]:
+        _OBJECT_ATTR_CACHE.pop(key, None)
+    _FRAME_ATTR_CACHE["key"] = None
+
+
+def _invalidate_mesh(mesh_name: str) -> None:
+    for key in [key for key, entry in _OBJECT_ATTR_CACHE.items() if entry.get("mesh") == mesh_name]:
+        _OBJECT_ATTR_CACHE.pop(key, None)
+    _FRAME_ATTR_CACHE["key"] = None
+
+
+def clear_named_attr_cache() -> None:
+    _OBJECT_ATTR_CACHE.clear()
+    _FRAME_ATTR_CACHE["key"] = None
+    _FRAME_ATTR_CACHE["values"] = {}
+
+
+@persistent
+def on_depsgraph_update(_scene, depsgraph) -> None:
+    if not _OBJECT_ATTR_CACHE:
+        return
+    for update in depsgraph.updates:
+        update_id = getattr(update.id, "original", update.id)
+        if isinstance(update_id, bpy.types.Object) and update.is_updated_geometry:
+            invalidate_object(update_id.name)
+        elif isinstance(update_id, bpy.types.Mesh):
+            _invalidate_mesh(update_id.name)
+
+
 @register_runtime_function
 def _named_attr_cache(name: str) -> None:
-    _get_named_attr_cache(str(name))
+    _get_named_attr_values(str(name))
 
 
 @register_runtime_function
 def _named_attr_value(name: str, idx: int) -> float:
-    values = _get_named_attr_cache(str(name))
-    if not values:
-        return 0.0
+    values = _get_named_attr_values(str(name))
     idx_val = int(idx)
-    src_idx = idx_val
-    pair_ids = le_meshinfo._LED_FRAME_CACHE.get("pair_ids")
-    if pair_ids and len(pair_ids) == len(values):
-        inv = le_meshinfo._LED_FRAME_CACHE.get("pair_id_inv_map")
-        if inv is None:
-            inv = {}
-            for src_idx_local, pid in enumerate(pair_ids):
-                key = int(pid)
-                if key in inv:
-                    continue
-                inv[key] = src_idx_local
-            le_meshinfo._LED_FRAME_CACHE["pair_id_inv_map"] = inv
-        src_idx = inv.get(idx_val, idx_val)
-    if 0 <= src_idx < len(values):
-        return float(values[src_idx])
+    if 0 <= idx_val < values.shape[0]:
+        return float(values[idx_val])
     return 0.0
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+# Above this fraction of moved drones a full rebuild is cheaper than patching rows.
+_INCREMENTAL_LIMIT = 0.25
+
+
+def _unique_allowed(allowed_indices: Sequence[int], count: int) -> np.ndarray:
+    allowed = np.asarray(list(allowed_indices), dtype=np.int64).reshape(-1)
+    allowed = allowed[(allowed >= 0) & (allowed < count)]
+    if allowed.size == 0:
+        return allowed
+    _values, first = np.unique(allowed, return_index=True)
+    return allowed[np.sort(first)]
+
+
+def _sq_dists(pts: np.ndarray, rows: np.ndarray, nbr: np.ndarray) -> np.ndarray:
+    diff = pts[nbr] - pts[rows][:, None, :]
+    return diff[..., 0] * diff[..., 0] + diff[..., 1] * diff[..., 1] + diff[..., 2] * diff[..., 2]
+
+
+def _exact_row(tree: cKDTree, pts: np.ndarray, row: int, radius_sq: float, k: int):
+    radius = float(np.sqrt(radius_sq)) * (1.0 + 1e-9) + 1e-12
+    cand = np.asarray(tree.query_ball_point(pts[row], radius), dtype=np.int64)
+    cand = cand[cand != row]
+    d2 = _sq_dists(pts, np.array([row]), cand[None, :])[0]
+    order = np.lexsort((cand, d2))[:k]
+    return cand[order], d2[order]
+
+
+def _query_rows(tree: cKDTree, pts: np.ndarray, rows: np.ndarray, k: int):
+    """k nearest rows ordered by (squared distance, allowed order), self excluded."""
+    m = pts.shape[0]
+    out_idx = np.full((rows.size, k), -1, dtype=np.int64)
+    out_d2 = np.full((rows.size, k), np.inf, dtype=np.float64)
+    if m <= 1 or rows.size == 0:
+        return out_idx, out_d2
+    kq = min(k + 2, m)
+    _dist, nbr = tree.query(pts[rows], k=kq)
+    nbr = np.asarray(nbr, dtype=np.int64).reshape(rows.size, kq)
+    d2 = _sq_dists(pts, rows, nbr)
+    d2[nbr == rows[:, None]] = np.inf
+    order = np.lexsort((nbr, d2), axis=-1)
+    nbr = np.take_along_axis(nbr, order, axis=-1)
+    d2 = np.take_along_axis(d2, order, axis=-1)
+    width = min(k, kq)
+    out_idx[:, :width] = nbr[:, :width]
+    out_d2[:, :width] = d2[:, :width]
+    out_idx[~np.isfinite(out_d2)] = -1
+    if kq < m and kq > k:
+        # The tree breaks distance ties arbitrarily; redo rows tied at the boundary.
+        tied = np.isfinite(d2[:, k]) & (d2[:, k] <= d2[:, k - 1] * (1.0 + 1e-12))
+        for pos in np.flatnonzero(tied):
+            cand, cand_d2 = _exact_row(tree, pts, int(rows[pos]), float(d2[pos, k - 1]), k)
+            out_idx[pos, :] = -1
+            out_d2[pos, :] = np.inf
+            out_idx[pos, : cand.size] = cand
+            out_d2[pos, : cand.size] = cand_d2
+    return out_idx, out_d2
+
+
+def _publish(graph: Dict[str, object], count: int) -> None:
+    allowed = graph["allowed"]
+    local_idx = graph["local_idx"]
+    local_d2 = graph["local_d2"]
+    k = local_idx.shape[1]
+    indices = np.full((count, k), -1, dtype=np.int32)
+    dists = np.full((count, k), np.inf, dtype=np.float32)
+    valid = local_idx >= 0
+    runtime = np.where(valid, allowed[np.where(valid, local_idx, 0)], -1)
+    indices[allowed] = runtime
+    dists[allowed] = np.sqrt(local_d2)
+    graph["indices"] = indices
+    graph["dists"] = dists
+
+
+def _build(pts: np.ndarray, allowed: np.ndarray, k: int) -> Dict[str, object]:
+    tree = cKDTree(pts) if pts.shape[0] else None
+    rows = np.arange(pts.shape[0], dtype=np.int64)
+    if tree is None:
+        local_idx = np.full((0, k), -1, dtype=np.int64)
+        local_d2 = np.full((0, k), np.inf, dtype=np.float64)
+    else:
+        local_idx, local_d2 = _query_rows(tree, pts, rows, k)
+    return {
+        "tree": tree,
+        "pts": pts,
+        "allowed": allowed,
+        "local_idx": local_idx,
+        "local_d2": local_d2,
+    }
+
+
+def _refresh(graph: Dict[str, object], pts: np.ndarray, moved: np.ndarray, k: int) -> bool:
+    local_idx = graph["local_idx"]
+    local_d2 = graph["local_d2"]
+    kth = local_d2[:, k - 1]
+    if not np.all(np.isfinite(kth)):
+        return False
+    tree = cKDTree(pts)
+    moved_rows = np.flatnonzero(moved)
+    affected = moved.copy()
+    valid = local_idx >= 0
+    affected |= np.any(valid & moved[np.where(valid, local_idx, 0)], axis=1)
+    reach = float(np.sqrt(kth.max())) * (1.0 + 1e-9) + 1e-12
+    for near in tree.query_ball_point(pts[moved_rows], reach):
+        if near:
+            near = np.asarray(near, dtype=np.int64)
+            affected[near] = True
+    rows = np.flatnonzero(affected)
+    new_idx, new_d2 = _query_rows(tree, pts, rows, k)
+    local_idx[rows] = new_idx
+    local_d2[rows] = new_d2
+    graph["tree"] = tree
+    graph["pts"] = pts
+    return True
+
+
+def radius_neighbors(tree: Optional[cKDTree], radius: float, max_pairs: Optional[int] = None):
+    """CSR neighbor lists of every point within ``radius`` (inclusive), self excluded.
+
+    Returns ``(offsets, indices)``; the neighbors of point ``i`` are
+    ``indices[offsets[i]:offsets[i + 1]]`` in ascending index order. Returns None
+    when the lists would hold more than ``max_pairs`` entries.
+    """
+    count = int(tree.n) if tree is not None else 0
+    if count == 0 or radius <= 0.0:
+        return np.zeros((count + 1,), dtype=np.int64), np.zeros((0,), dtype=np.int64)
+    if max_pairs is not None:
+        # Counting needs no pair storage; listing grows with the square of the density.
+        entries = int(tree.count_neighbors(tree, float(radius))) - count
+        if entries > max_pairs:
+            return None
+    pairs = tree.query_pairs(float(radius), output_type="ndarray")
+    rows = np.concatenate((pairs[:, 0], pairs[:, 1])).astype(np.int64, copy=False)
+    cols = np.concatenate((pairs[:, 1], pairs[:, 0])).astype(np.int64, copy=False)
+    order = np.lexsort((cols, rows))
+    offsets = np.zeros((count + 1,), dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=count), out=offsets[1:])
+    return offsets, cols[order]
+
+
+def knn_graph(
+    positions,
+    allowed_indices: Sequence[int],
+    neighbor_count: int,
+    graph: Optional[Dict[str, object]] = None,
+) -> Dict[str, object]:
+    """Return the k-nearest neighbor graph of the allowed drones.
+
+    ``indices``/``dists`` are (N,k) arrays indexed by runtime drone index; rows of
+    drones outside ``allowed_indices`` and missing neighbors are -1/inf. Passing
+    the previous graph reuses it when positions are unchanged and only requeries
+    affected rows when a few drones moved.
+    """
+    k = max(1, int(neighbor_count))
+    pts_all = np.asarray(positions)
+    if pts_all.dtype not in (np.float32, np.float64):
+        pts_all = pts_all.astype(np.float64)
+    # Keep the input precision so distance ordering matches per-drone Python math.
+    pts_all = pts_all.reshape(-1, 3)
+    count = int(pts_all.shape[0])
+    allowed = _unique_allowed(allowed_indices, count)
+    allowed_key = hash(allowed.tobytes())
+    pts = np.ascontiguousarray(pts_all[allowed])
+
+    if (
+        graph is not None
+        and graph.get("count") == count
+        and graph.get("k") == k
+        and graph.get("allowed_key") == allowed_key
+    ):
+        old_pts = graph["pts"]
+        moved = np.any(old_pts != pts, axis=1)
+        if not np.any(moved):
+            graph["hits"] = int(graph.get("hits", 0)) + 1
+            return graph
+        if moved.mean() <= _INCREMENTAL_LIMIT and _refresh(graph, pts, moved, k):
+            graph["refreshes"] = int(graph.get("refreshes", 0)) + 1
+            _publish(graph, count)
+            return graph
+
+    stats = {name: int(graph.get(name, 0)) if graph is not None else 0 for name in ("builds", "refreshes", "hits")}
+    stats["builds"] += 1
+    graph = _build(pts, allowed, k)
+    graph.update(stats)
+    graph.update({"count": count, "k": k, "allowed_key": allowed_key})
+    _publish(graph, count)
+    return graph
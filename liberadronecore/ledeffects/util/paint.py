@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import base64
 import math
+import zlib
+
 import bpy
 import bmesh
+import numpy as np
 import gpu
 from bpy_extras import view3d_utils
 from gpu_extras.batch import batch_for_shader
 from mathutils import Vector
 from mathutils.kdtree import KDTree
 
-from liberadronecore.ledeffects.nodes.le_output import _blend_over
 from liberadronecore.ledeffects.runtime_registry import register_runtime_function
+from liberadronecore.ledeffects.util import result_cache
 
 
 DEFAULT_BRUSH_RADIUS_PX = 40.0
@@ -29,13 +33,13 @@ PAINT_BLEND_MODES = [
     ("MAX", "Max", "Max channel value"),
 ]
 
-_PAINT_CACHE: dict[str, dict[int, tuple[float, float, float, float]]] = {}
+_PAINT_CACHE: dict[str, dict[str, np.ndarray]] = {}
 _ACTIVE_NODE: tuple[str, str] | None = None
 _LAST_MOUSE: tuple[int, int] | None = None
 _EYEDROP_MODE: str | None = None
 _MODAL_ACTIVE = False
-_PAINT_HISTORY: dict[str, list[dict[int, tuple[float, float, float, float]]]] = {}
-_PAINT_REDO: dict[str, list[dict[int, tuple[float, float, float, float]]]] = {}
+_PAINT_HISTORY: dict[str, list[tuple[np.ndarray, np.ndarray]]] = {}
+_PAINT_REDO: dict[str, list[tuple[np.ndarray, np.ndarray]]] = {}
 _PAINT_HISTORY_LIMIT = 32
 
 
@@ -88,42 +92,112 @@ def active_node() -> bpy.types.Node | None:
     return bpy.data.node_groups[tree_name].nodes[node_name]
 
 
-def get_paint_cache(node: bpy.types.Node | None) -> dict[int, tuple[float, float, float, float]]:
+def _empty_layer(count: int = 0) -> dict[str, np.ndarray]:
+    return {
+        "colors": np.zeros((int(count), 4), dtype=np.float32),
+        "mask": np.zeros((int(count),), dtype=bool),
+    }
+
+
+def _grow_layer(layer: dict[str, np.ndarray], count: int) -> dict[str, np.ndarray]:
+    size = int(layer["colors"].shape[0])
+    if count <= size:
+        return layer
+    grown = _empty_layer(max(int(count), size * 2))
+    grown["colors"][:size] = layer["colors"]
+    grown["mask"][:size] = layer["mask"]
+    layer["colors"] = grown["colors"]
+    layer["mask"] = grown["mask"]
+    return layer
+
+
+def _pack_layer(layer: dict[str, np.ndarray]) -> tuple[int, str]:
+    mask = layer["mask"]
+    covered = np.flatnonzero(mask)
+    if covered.size == 0:
+        return 0, ""
+    count = int(covered[-1]) + 1
+    colors = np.ascontiguousarray(layer["colors"][:count], dtype=np.float32)
+    raw = colors.tobytes() + np.ascontiguousarray(mask[:count], dtype=np.uint8).tobytes()
+    return count, base64.b64encode(zlib.compress(raw)).decode("ascii")
+
+
+def _unpack_layer(count: int, data: str) -> dict[str, np.ndarray] | None:
+    count = int(count)
+    if count <= 0 or not data:
+        return None
+    raw = zlib.decompress(base64.b64decode(data.encode("ascii")))
+    color_bytes = count * 4 * 4
+    if len(raw) != color_bytes + count:
+        return None
+    colors = np.frombuffer(raw, dtype=np.float32, count=count * 4).reshape(count, 4).copy()
+    mask = np.frombuffer(raw, dtype=np.uint8, count=count, offset=color_bytes).astype(bool)
+    return {"colors": colors, "mask": mask}
+
+
+def _layer_from_items(node: bpy.types.Node) -> dict[str, np.ndarray]:
+    items = node.paint_items
+    if len(items) == 0:
+        return _empty_layer()
+    indices = np.zeros(len(items), dtype=np.int32)
+    items.foreach_get("index", indices)
+    colors = np.zeros(len(items) * 4, dtype=np.float32)
+    items.foreach_get("color", colors)
+    layer = _empty_layer(int(indices.max()) + 1)
+    layer["colors"][indices] = colors.reshape(-1, 4)
+    layer["mask"][indices] = True
+    return layer
+
+
+def get_paint_layer(node: bpy.types.Node | None) -> dict[str, np.ndarray] | None:
     if node is None:
-        return {}
+        return None
     return _get_cache(node)
 
 
-
-def ensure_paint_cache(node: bpy.types.Node) -> dict[int, tuple[float, float, float, float]]:
+def ensure_paint_cache(node: bpy.types.Node) -> dict[str, np.ndarray]:
     key = _paint_key(node.id_data.name, node.name)
-    colors = {}
-    for item in node.paint_items:
-        idx = int(item.index)
-        color = tuple(float(c) for c in item.color)
-        colors[idx] = color
-    _PAINT_CACHE[key] = colors
-    return colors
+    layer = _unpack_layer(getattr(node, "paint_count", 0), getattr(node, "paint_data", ""))
+    if layer is None:
+        layer = _layer_from_items(node)
+    _PAINT_CACHE[key] = layer
+    return layer
 
 
-def _get_cache(node: bpy.types.Node) -> dict[int, tuple[float, float, float, float]]:
+def _get_cache(node: bpy.types.Node) -> dict[str, np.ndarray]:
     key = _paint_key(node.id_data.name, node.name)
-    colors = _PAINT_CACHE.get(key)
-    if colors is None:
-        colors = ensure_paint_cache(node)
-    return colors
+    layer = _PAINT_CACHE.get(key)
+    if layer is None:
+        layer = ensure_paint_cache(node)
+    return layer
 
 
 def clear_paint_cache(node: bpy.types.Node) -> None:
     key = _paint_key(node.id_data.name, node.name)
     _PAINT_CACHE.pop(key, None)
+    result_cache.bump_data_revision()
+
+
+def commit_paint(node: bpy.types.Node) -> None:
+    """Write the cached paint layer back to the node as packed bytes."""
+    layer = _get_cache(node)
+    count, data = _pack_layer(layer)
+    node.paint_count = count
+    node.paint_data = data
+    if len(node.paint_items):
+        node.paint_items.clear()
+    result_cache.bump_data_revision()
+
+
+def _snapshot(node: bpy.types.Node) -> tuple[np.ndarray, np.ndarray]:
+    layer = _get_cache(node)
+    return layer["colors"].copy(), layer["mask"].copy()
 
 
 def push_history(node: bpy.types.Node) -> None:
     key = _paint_key(node.id_data.name, node.name)
     history = _PAINT_HISTORY.setdefault(key, [])
-    snapshot = {int(item.index): tuple(float(c) for c in item.color) for item in node.paint_items}
-    history.append(snapshot)
+    history.append(_snapshot(node))
     if len(history) > _PAINT_HISTORY_LIMIT:
         history.pop(0)
     _PAINT_REDO.pop(key, None)
@@ -135,11 +209,9 @@ def undo_history(node: bpy.types.Node) -> bool:
     if not history:
         return False
     redo = _PAINT_REDO.setdefault(key, [])
-    current = {int(item.index): tuple(float(c) for c in item.color) for item in node.paint_items}
-    redo.append(current)
+    redo.append(_snapshot(node))
     snapshot = history.pop()
     _restore_history(node, snapshot)
-    clear_paint_cache(node)
     return True
 
 
@@ -149,13 +221,11 @@ def redo_history(node: bpy.types.Node) -> bool:
     if not redo:
         return False
     history = _PAINT_HISTORY.setdefault(key, [])
-    current = {int(item.index): tuple(float(c) for c in item.color) for item in node.paint_items}
-    history.append(current)
+    history.append(_snapshot(node))
     if len(history) > _PAINT_HISTORY_LIMIT:
         history.pop(0)
     snapshot = redo.pop()
     _restore_history(node, snapshot)
-    clear_paint_cache(node)
     return True
 
 
@@ -165,30 +235,80 @@ def clear_history(node: bpy.types.Node) -> None:
     _PAINT_REDO.pop(key, None)
 
 
-def _restore_history(node: bpy.types.Node, snapshot: dict[int, tuple[float, float, float, float]]) -> None:
-    node.paint_items.clear()
-    for idx, color in sorted(snapshot.items(), key=lambda item: item[0]):
-        item = node.paint_items.add()
-        item.index = int(idx)
-        item.color = color
+def _restore_history(node: bpy.types.Node, snapshot: tuple[np.ndarray, np.ndarray]) -> None:
+    colors, mask = snapshot
+    key = _paint_key(node.id_data.name, node.name)
+    _PAINT_CACHE[key] = {"colors": colors.copy(), "mask": mask.copy()}
+    commit_paint(node)
 
 
-def set_paint_color(
+def set_paint_colors(
     node: bpy.types.Node,
-    idx: int,
-    color: tuple[float, float, float, float],
-    item_map: dict[int, bpy.types.PropertyGroup] | None = None,
+    colors_by_id: dict[int, tuple[float, float, float, float]],
 ) -> None:
-    colors = _get_cache(node)
-    if item_map is None:
-        item_map = {int(item.index): item for item in node.paint_items}
-    item = item_map.get(int(idx))
-    if item is None:
-        item = node.paint_items.add()
-        item.index = int(idx)
-        item_map[int(idx)] = item
-    item.color = color
-    colors[int(idx)] = color
+    layer = _empty_layer()
+    if colors_by_id:
+        indices = np.fromiter((int(idx) for idx in colors_by_id.keys()), dtype=np.int64)
+        colors = np.asarray(list(colors_by_id.values()), dtype=np.float32).reshape(-1, 4)
+        layer = _empty_layer(int(indices.max()) + 1)
+        layer["colors"][indices] = colors
+        layer["mask"][indices] = True
+    key = _paint_key(node.id_data.name, node.name)
+    _PAINT_CACHE[key] = layer
+    commit_paint(node)
+
+
+def _blend_over_array(dst: np.ndarray, src: np.ndarray, alpha: np.ndarray, mode: str) -> np.ndarray:
+    """Vectorized ``_blend_over`` for (M,3) ``dst`` against one RGB ``src``."""
+    alpha = np.clip(alpha, 0.0, 1.0)[:, None]
+    a = dst
+    b = np.broadcast_to(src, dst.shape)
+    mode = (mode or "MIX").upper()
+    if mode == "MIX":
+        return b * alpha + a * (1.0 - alpha)
+    if mode == "ADD":
+        blended = a + b
+    elif mode == "MULTIPLY":
+        blended = a * b
+    elif mode == "SCREEN":
+        blended = 1.0 - (1.0 - a) * (1.0 - b)
+    elif mode == "OVERLAY":
+        blended = np.where(a < 0.5, 2.0 * a * b, 1.0 - 2.0 * (1.0 - a) * (1.0 - b))
+    elif mode == "HARD_LIGHT":
+        blended = np.where(b < 0.5, 2.0 * a * b, 1.0 - 2.0 * (1.0 - a) * (1.0 - b))
+    elif mode == "SOFT_LIGHT":
+        blended = np.where(
+            b < 0.5,
+            a - (1.0 - 2.0 * b) * a * (1.0 - a),
+            a + (2.0 * b - 1.0) * (np.sqrt(np.clip(a, 0.0, 1.0)) - a),
+        )
+    elif mode == "BURN":
+        blended = np.clip(1.0 - (1.0 - a) / np.where(b > 0.0, b, 1e-5), 0.0, 1.0)
+    elif mode == "SUBTRACT":
+        blended = a - b
+    elif mode == "MAX":
+        blended = np.maximum(a, b)
+    else:
+        blended = b
+    return a * (1.0 - alpha) + blended * alpha
+
+
+def _hits_to_arrays(hits: list[tuple[int, float]]) -> tuple[np.ndarray, np.ndarray]:
+    indices = np.fromiter((int(h[0]) for h in hits), dtype=np.int64, count=len(hits))
+    weights = np.fromiter((float(h[1]) for h in hits), dtype=np.float64, count=len(hits))
+    valid = indices >= 0
+    indices = indices[valid]
+    weights = weights[valid]
+    if indices.size > 1:
+        # Several vertices may map to the same formation id; keep the strongest hit.
+        order = np.lexsort((-weights, indices))
+        indices = indices[order]
+        weights = weights[order]
+        first = np.ones(indices.shape, dtype=bool)
+        first[1:] = indices[1:] != indices[:-1]
+        indices = indices[first]
+        weights = weights[first]
+    return indices, weights
 
 
 def apply_paint(
@@ -198,40 +318,60 @@ def apply_paint(
     alpha: float,
     blend_mode: str,
     erase: bool = False,
+    commit: bool = True,
 ) -> None:
     if not hits:
         return
-    colors = _get_cache(node)
-    item_map = {int(item.index): item for item in node.paint_items}
-    r, g, b = (float(color_rgb[0]), float(color_rgb[1]), float(color_rgb[2]))
+    indices, weights = _hits_to_arrays(hits)
     alpha_val = float(alpha)
-    for vidx, weight in hits:
-        strength = alpha_val * float(weight)
-        if strength <= 0.0:
-            continue
-        current = colors.get(int(vidx), (0.0, 0.0, 0.0, 0.0))
-        if erase:
-            new_alpha = current[3] - strength
-            if new_alpha <= 0.0:
-                set_paint_color(node, int(vidx), (0.0, 0.0, 0.0, 0.0), item_map=item_map)
-            else:
-                set_paint_color(
-                    node,
-                    int(vidx),
-                    (float(current[0]), float(current[1]), float(current[2]), float(new_alpha)),
-                    item_map=item_map,
-                )
-            continue
-        dst = [current[0], current[1], current[2], 1.0]
-        src = [r, g, b, 1.0]
-        blended = _blend_over(dst, src, strength, blend_mode)
-        new_alpha = current[3] + (alpha_val - current[3]) * float(weight)
-        set_paint_color(
-            node,
-            int(vidx),
-            (float(blended[0]), float(blended[1]), float(blended[2]), float(new_alpha)),
-            item_map=item_map,
-        )
+    strength = alpha_val * weights
+    keep = strength > 0.0
+    if not np.any(keep):
+        return
+    indices = indices[keep]
+    weights = weights[keep]
+    strength = strength[keep]
+
+    layer = _grow_layer(_get_cache(node), int(indices.max()) + 1)
+    colors = layer["colors"]
+    current = colors[indices].astype(np.float64)
+    current[~layer["mask"][indices]] = 0.0
+    if erase:
+        new_alpha = current[:, 3] - strength
+        current[:, 3] = new_alpha
+        current[new_alpha <= 0.0] = 0.0
+    else:
+        src = np.array(color_rgb[:3], dtype=np.float64)
+        current[:, :3] = _blend_over_array(current[:, :3], src, strength, blend_mode)
+        current[:, 3] = current[:, 3] + (alpha_val - current[:, 3]) * weights
+    colors[indices] = np.clip(current, 0.0, 1.0).astype(np.float32)
+    layer["mask"][indices] = True
+    # Uncommitted strokes never reach the depsgraph; drop cached colors here.
+    result_cache.bump_data_revision()
+    if commit:
+        commit_paint(node)
+
+
+def read_paint_colors(
+    node: bpy.types.Node,
+    indices,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (M,4) colors and a coverage mask for the given paint ids."""
+    layer = _get_cache(node)
+    return _read_layer(layer, indices)
+
+
+def _read_layer(layer: dict[str, np.ndarray], indices) -> tuple[np.ndarray, np.ndarray]:
+    idx = np.asarray(indices, dtype=np.int64).reshape(-1)
+    size = int(layer["colors"].shape[0])
+    valid = (idx >= 0) & (idx < size)
+    safe = np.where(valid, idx, 0)
+    out = np.zeros((idx.shape[0], 4), dtype=np.float32)
+    if size == 0:
+        return out, np.zeros(idx.shape, dtype=bool)
+    covered = valid & layer["mask"][safe]
+    out[covered] = layer["colors"][safe[covered]]
+    return out, covered
 
 
 def selected_vertex_indices(obj: bpy.types.Object) -> list[int]:
@@ -306,18 +446,13 @@ def average_color(
 ) -> tuple[float, float, float, float] | None:
     if not hits:
         return None
-    colors = _get_cache(node)
-    total = 0.0
-    acc = Vector((0.0, 0.0, 0.0, 0.0))
-    for vidx, weight in hits:
-        col = colors.get(int(vidx))
-        if col is None:
-            continue
-        acc += Vector(col) * float(weight)
-        total += float(weight)
+    indices, weights = _hits_to_arrays(hits)
+    colors, covered = read_paint_colors(node, indices)
+    weights = weights[covered]
+    total = float(weights.sum())
     if total <= 0.0:
         return None
-    out = acc / total
+    out = (colors[covered].astype(np.float64) * weights[:, None]).sum(axis=0) / total
     return (float(out[0]), float(out[1]), float(out[2]), float(out[3]))
 
 
@@ -366,11 +501,26 @@ def draw_callback_px(self, _context):
     draw_circle_2d(self._brush_center_2d, self._brush_radius_px)
 
 
-@register_runtime_function
-def _paint_color(tree_name: str, node_name: str, idx: int):
+def _runtime_layer(tree_name: str, node_name: str) -> dict[str, np.ndarray]:
     key = _paint_key(str(tree_name), str(node_name))
-    colors = _PAINT_CACHE.get(key)
-    if colors is None:
+    layer = _PAINT_CACHE.get(key)
+    if layer is None:
         node = bpy.data.node_groups[str(tree_name)].nodes[str(node_name)]
-        colors = ensure_paint_cache(node)
-    return colors.get(int(idx), (0.0, 0.0, 0.0, 0.0))
+        layer = ensure_paint_cache(node)
+    return layer
+
+
+@register_runtime_function
+def _paint_color(tree_name: str, node_name: str, idx: int):
+    layer = _runtime_layer(tree_name, node_name)
+    idx = int(idx)
+    if idx < 0 or idx >= layer["mask"].shape[0] or not layer["mask"][idx]:
+        return (0.0, 0.0, 0.0, 0.0)
+    col = layer["colors"][idx]
+    return (float(col[0]), float(col[1]), float(col[2]), float(col[3]))
+
+
+@register_runtime_function
+def _paint_colors(tree_name: str, node_name: str, indices) -> np.ndarray:
+    colors, _covered = _read_layer(_runtime_layer(tree_name, node_name), indices)
+    return colors
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import math
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+
+# Counter-based random numbers: every value is a pure function of (idx, frame, seed),
+# so drones can be evaluated in any order, alone or as whole arrays.
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+_STATIC_FRAME = 0x5DEECE66D
+_INV_2_53 = 1.0 / float(1 << 53)
+
+# hash01_static is called once per drone; its values are filled per seed in
+# array batches so the per-drone call is a list lookup.
+_STATIC_TABLES: Dict[float, List[float]] = {}
+_STATIC_TABLE_SEEDS = 32
+# Seeds that vary per drone would rebuild tables constantly; only table a seed
+# after it has been hashed a few times directly.
+_STATIC_SEED_USES: Dict[float, int] = {}
+_STATIC_TABLE_AFTER = 8
+_STATIC_TABLE_MIN = 1024
+_STATIC_TABLE_MAX = 1 << 20
+
+
+def _splitmix(x: int) -> int:
+    z = (x + _GOLDEN) & _MASK64
+    z = ((z ^ (z >> 30)) * _MIX1) & _MASK64
+    z = ((z ^ (z >> 27)) * _MIX2) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _float_bits(value: float) -> int:
+    # Adding 0.0 folds -0.0 into 0.0 so both hash the same.
+    return struct.unpack("<Q", struct.pack("<d", float(value) + 0.0))[0]
+
+
+def hash01(idx: int, frame: float, seed: float) -> float:
+    h = _splitmix(int(idx) & _MASK64)
+    h = _splitmix(h ^ _float_bits(frame))
+    h = _splitmix(h ^ _float_bits(seed))
+    return (h >> 11) * _INV_2_53
+
+
+def _hash01_static_scalar(idx: int, seed: float) -> float:
+    h = _splitmix(int(idx) & _MASK64)
+    h = _splitmix(h ^ _STATIC_FRAME)
+    h = _splitmix(h ^ _float_bits(seed))
+    return (h >> 11) * _INV_2_53
+
+
+def _static_table(seed: float, size: int) -> List[float]:
+    length = _STATIC_TABLE_MIN
+    while length < size:
+        length *= 2
+    table = hash01_static_array(np.arange(length, dtype=np.int64), seed).tolist()
+    _STATIC_TABLES.pop(seed, None)
+    _STATIC_TABLES[seed] = table
+    while len(_STATIC_TABLES) > _STATIC_TABLE_SEEDS:
+        _STATIC_TABLES.pop(next(iter(_STATIC_TABLES)))
+    return table
+
+
+def hash01_static(idx: int, seed: float) -> float:
+    seed = float(seed) + 0.0
+    table = _STATIC_TABLES.get(seed)
+    if table is not None:
+        try:
+            if idx >= 0:
+                return table[idx]
+        except (IndexError, TypeError):
+            pass
+    idx = int(idx)
+    if idx < 0 or idx >= _STATIC_TABLE_MAX or seed != seed:
+        return _hash01_static_scalar(idx, seed)
+    if table is None:
+        uses = _STATIC_SEED_USES.get(seed, 0) + 1
+        if uses < _STATIC_TABLE_AFTER:
+            if len(_STATIC_SEED_USES) > 4096:
+                _STATIC_SEED_USES.clear()
+            _STATIC_SEED_USES[seed] = uses
+            return _hash01_static_scalar(idx, seed)
+        _STATIC_SEED_USES.pop(seed, None)
+    return _static_table(seed, idx + 1)[idx]
+
+
+def clear_static_tables() -> None:
+    _STATIC_TABLES.clear()
+    _STATIC_SEED_USES.clear()
+
+
+def _splitmix_array(x: np.ndarray) -> np.ndarray:
+    z = x + np.uint64(_GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MIX2)
+    return z ^ (z >> np.uint64(31))
+
+
+def _float_bits_array(value) -> np.ndarray:
+    return (np.asarray(value, dtype=np.float64) + 0.0).view(np.uint64)
+
+
+def _idx_array(idx) -> np.ndarray:
+    return np.atleast_1d(np.asarray(idx, dtype=np.int64)).astype(np.uint64)
+
+
+def hash01_array(idx, frame, seed) -> np.ndarray:
+    """Array form of ``hash01``; arguments broadcast and results match bit for bit."""
+    h = _splitmix_array(_idx_array(idx))
+    h = _splitmix_array(h ^ np.atleast_1d(_float_bits_array(frame)))
+    h = _splitmix_array(h ^ np.atleast_1d(_float_bits_array(seed)))
+    return (h >> np.uint64(11)).astype(np.float64) * _INV_2_53
+
+
+def hash01_static_array(idx, seed) -> np.ndarray:
+    h = _splitmix_array(_idx_array(idx))
+    h = _splitmix_array(h ^ np.uint64(_STATIC_FRAME))
+    h = _splitmix_array(h ^ np.atleast_1d(_float_bits_array(seed)))
+    return (h >> np.uint64(11)).astype(np.float64) * _INV_2_53
+
+
+def legacy01(idx: int, frame: float, seed: float) -> float:
+    value = math.sin(idx * 12.9898 + frame * 78.233 + seed * 37.719)
+    return value - math.floor(value)
+
+
+def legacy01_static(idx: int, seed: float) -> float:
+    value = math.sin(idx * 12.9898 + seed * 78.233)
+    return value - math.floor(value)
+
+
+def legacy01_array(idx, frame, seed) -> np.ndarray:
+    value = np.sin(
+        np.asarray(idx, dtype=np.float64) * 12.9898
+        + np.asarray(frame, dtype=np.float64) * 78.233
+        + np.asarray(seed, dtype=np.float64) * 37.719
+    )
+    return value - np.floor(value)
+
+
+def legacy01_static_array(idx, seed) -> np.ndarray:
+    value = np.sin(np.asarray(idx, dtype=np.float64) * 12.9898 + np.asarray(seed, dtype=np.float64) * 78.233)
+    return value - np.floor(value)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import bpy
+from bpy.app.handlers import persistent
+import numpy as np
+
+from liberadronecore.ledeffects.util import temporal
+
+
+# Final per-frame drone colors (quantized as written to ColorVerts), most recent last.
+# "playback" holds frames already shown, "prefetch" frames evaluated ahead of the playhead.
+_POOL_LIMIT_PREFS = {
+    "playback": "led_cache_limit_mb",
+    "prefetch": "led_prefetch_limit_mb",
+}
+_POOLS: Dict[str, Dict[str, object]] = {
+    name: {"frames": OrderedDict(), "revision": None, "bytes": 0} for name in _POOL_LIMIT_PREFS
+}
+_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+_DATA_REVISION = 0
+_TRACKING_PAUSED = 0
+
+
+def limit_bytes(pool: str = "playback") -> int:
+    try:
+        prefs = bpy.context.preferences.addons["liberadronecore"].preferences
+        return max(0, int(getattr(prefs, _POOL_LIMIT_PREFS[pool]))) * 1024 * 1024
+    except Exception:
+        return 0
+
+
+def bump_data_revision() -> None:
+    """Mark every cached frame stale after an edit the tree signature does not cover."""
+    global _DATA_REVISION
+    _DATA_REVISION += 1
+
+
+def pause_tracking(active: bool) -> None:
+    """Ignore depsgraph updates caused by our own frame changes."""
+    global _TRACKING_PAUSED
+    if active:
+        _TRACKING_PAUSED += 1
+    else:
+        _TRACKING_PAUSED = max(0, _TRACKING_PAUSED - 1)
+
+
+def is_tracking_paused() -> bool:
+    return _TRACKING_PAUSED > 0
+
+
+def revision_key(scene: bpy.types.Scene, tree: bpy.types.NodeTree) -> Tuple:
+    return (
+        scene.name,
+        tree.name,
+        temporal.tree_revision(tree.name),
+        int(getattr(scene, "fn_schedule_version", 0)),
+        _DATA_REVISION,
+    )
+
+
+def _clear_pool(state: Dict[str, object]) -> None:
+    state["frames"].clear()
+    state["revision"] = None
+    state["bytes"] = 0
+
+
+def invalidate(pool: Optional[str] = None) -> None:
+    for name, state in _POOLS.items():
+        if pool is None or name == pool:
+            _clear_pool(state)
+
+
+def _sync_revision(state: Dict[str, object], revision: Tuple) -> None:
+    if state.get("revision") != revision:
+        _clear_pool(state)
+        state["revision"] = revision
+
+
+def lookup(frame: int, revision: Tuple) -> Optional[np.ndarray]:
+    frame = int(frame)
+    for state in _POOLS.values():
+        _sync_revision(state, revision)
+        frames = state["frames"]
+        colors = frames.get(frame)
+        if colors is not None:
+            frames.move_to_end(frame)
+            _STATS["hits"] += 1
+            return colors
+    _STATS["misses"] += 1
+    return None
+
+
+def contains(frame: int, revision: Tuple) -> bool:
+    frame = int(frame)
+    return any(
+        state.get("revision") == revision and frame in state["frames"]
+        for state in _POOLS.values()
+    )
+
+
+def store(frame: int, revision: Tuple, colors: np.ndarray, pool: str = "playback") -> None:
+    state = _POOLS[pool]
+    limit = limit_bytes(pool)
+    _sync_revision(state, revision)
+    if limit <= 0 or colors.nbytes > limit:
+        return
+    frame = int(frame)
+    frames = state["frames"]
+    old = frames.pop(frame, None)
+    if old is not None:
+        state["bytes"] -= old.nbytes
+    frames[frame] = colors.copy()
+    state["bytes"] += colors.nbytes
+    while state["bytes"] > limit and frames:
+        _frame, evicted = frames.popitem(last=False)
+        state["bytes"] -= evicted.nbytes
+        _STATS["evictions"] += 1
+
+
+def memory_used(pool: Optional[str] = None) -> int:
+    return sum(int(state["bytes"]) for name, state in _POOLS.items() if pool is None or name == pool)
+
+
+def frame_count(pool: Optional[str] = None) -> int:
+    return sum(len(state["frames"]) for name, state in _POOLS.items() if pool is None or name == pool)
+
+
+def get_stats() -> Dict[str, int]:
+    return dict(_STATS)
+
+
+def _reads_color_verts(obj) -> bool:
+    color_verts = bpy.data.objects.get("ColorVerts")
+    if color_verts is None:
+        return False
+    for mod in getattr(obj, "modifiers", ()):
+        if mod.type != 'NODES':
+            continue
+        for key in mod.keys():
+            if mod.get(key) == color_verts:
+                return True
+    return False
+
+
+def _ignored_update(update_id) -> bool:
+    # Our own ColorVerts writes (and the preview reading them) must not
+    # invalidate the colors they came from.
+    if str(getattr(update_id, "name", "")).startswith("ColorVerts"):
+        return True
+    return isinstance(update_id, bpy.types.Object) and _reads_color_verts(update_id)
+
+
+@persistent
+def on_depsgraph_update(_scene, depsgraph) -> None:
+    if is_tracking_paused():
+        return
+    for update in depsgraph.updates:
+        update_id = getattr(update.id, "original", update.id)
+        if _ignored_update(update_id):
+            continue
+        if isinstance(update_id, (bpy.types.Image, bpy.types.NodeTree)):
+            bump_data_revision()
+            return
+        if isinstance(update_id, (bpy.types.Object, bpy.types.Mesh)) and (
+            update.is_updated_geometry or update.is_updated_transform
+        ):
+            bump_data_revision()
+            return
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import bpy
+import numpy as np
+
+
+# Recent frames kept per node; scrubbing inside this window needs no re-evaluation.
+RING_FRAMES = 8
+# Every Nth frame is also kept as a checkpoint; a seek that lands just past one
+# replays forward from it instead of from the start of the priming window.
+CHECKPOINT_INTERVAL = 24
+CHECKPOINT_LIMIT = 64
+# Nodes whose output at a frame is built from their input at the previous frame.
+HISTORY_NODES = frozenset({"LDLEDEchoSamplerNode", "LDLEDBlurNode"})
+
+_HISTORY: Dict[str, Dict[str, object]] = {}
+_TREE_KEYS: Dict[str, set[str]] = {}
+_TREE_REVISIONS: Dict[str, int] = {}
+_EVALUATED: Dict[str, Dict[str, object]] = {}
+
+
+def history_key(node: bpy.types.Node) -> str:
+    tree_name = node.id_data.name
+    key = f"{tree_name}::{node.name or node.codegen_id()}"
+    _TREE_KEYS.setdefault(tree_name, set()).add(key)
+    return key
+
+
+def _tree_name(key: str) -> str:
+    return str(key).split("::", 1)[0]
+
+
+def tree_revision(tree_name: str) -> int:
+    return int(_TREE_REVISIONS.get(str(tree_name), 0))
+
+
+def bump_tree_revision(tree_name: str) -> None:
+    """Drop all history recorded against the previous build of ``tree_name``."""
+    tree_name = str(tree_name)
+    _TREE_REVISIONS[tree_name] = tree_revision(tree_name) + 1
+    for key in _TREE_KEYS.pop(tree_name, set()):
+        _HISTORY.pop(key, None)
+    _EVALUATED.pop(tree_name, None)
+
+
+def invalidate(key: Optional[str] = None) -> None:
+    if key is None:
+        _HISTORY.clear()
+        _EVALUATED.clear()
+        return
+    _HISTORY.pop(str(key), None)
+    _EVALUATED.pop(_tree_name(key), None)
+
+
+def _new_frame_slots() -> Dict[str, object]:
+    return {
+        "frames": np.full((RING_FRAMES,), np.iinfo(np.int64).min, dtype=np.int64),
+        "checkpoints": OrderedDict(),
+    }
+
+
+def _history(key: str, count: int) -> Dict[str, object]:
+    revision = tree_revision(_tree_name(key))
+    state = _HISTORY.get(key)
+    if state is None or state.get("count") != count or state.get("revision") != revision:
+        state = _new_frame_slots()
+        state.update(
+            {
+                "count": int(count),
+                "revision": revision,
+                "ring": np.zeros((RING_FRAMES, count, 4), dtype=np.float32),
+                "valid": np.zeros((RING_FRAMES, count), dtype=bool),
+            }
+        )
+        _HISTORY[key] = state
+    return state
+
+
+def _store_checkpoint(checkpoints: OrderedDict, frame: int, value) -> None:
+    checkpoints[frame] = value
+    checkpoints.move_to_end(frame)
+    while len(checkpoints) > CHECKPOINT_LIMIT:
+        checkpoints.popitem(last=False)
+
+
+def record(key: str, frame: int, idx: int, color, count: int) -> None:
+    if idx < 0 or idx >= count:
+        return
+    state = _history(key, count)
+    slot = frame % RING_FRAMES
+    frames = state["frames"]
+    if frames[slot] != frame:
+        frames[slot] = frame
+        state["valid"][slot] = False
+    state["ring"][slot, idx] = color
+    state["valid"][slot, idx] = True
+    if frame % CHECKPOINT_INTERVAL == 0:
+        checkpoints = state["checkpoints"]
+        cp = checkpoints.get(frame)
+        if cp is None:
+            cp = (np.zeros((count, 4), dtype=np.float32), np.zeros((count,), dtype=bool))
+            _store_checkpoint(checkpoints, frame, cp)
+        cp[0][idx] = color
+        cp[1][idx] = True
+
+
+def frame_colors(key: str, frame: int, count: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Return the (N,4) colors and valid mask recorded for ``frame`` if still held."""
+    state = _HISTORY.get(key)
+    if state is None or state.get("count") != count:
+        return None
+    if state.get("revision") != tree_revision(_tree_name(key)):
+        return None
+    slot = frame % RING_FRAMES
+    if state["frames"][slot] == frame:
+        return state["ring"][slot], state["valid"][slot]
+    return state["checkpoints"].get(frame)
+
+
+def lookup(key: str, frame: int, idx: int, count: int) -> Optional[Tuple[float, float, float, float]]:
+    held = frame_colors(key, frame, count)
+    if held is None or idx < 0 or idx >= count:
+        return None
+    colors, valid = held
+    if not valid[idx]:
+        return None
+    col = colors[idx]
+    return float(col[0]), float(col[1]), float(col[2]), float(col[3])
+
+
+def mark_evaluated(tree_name: str, frame: int) -> None:
+    tree_name = str(tree_name)
+    if not _TREE_KEYS.get(tree_name):
+        return
+    state = _EVALUATED.get(tree_name)
+    if state is None:
+        state = _new_frame_slots()
+        _EVALUATED[tree_name] = state
+    state["frames"][frame % RING_FRAMES] = frame
+    if frame % CHECKPOINT_INTERVAL == 0:
+        _store_checkpoint(state["checkpoints"], frame, True)
+
+
+def _was_evaluated(tree_name: str, frame: int) -> bool:
+    state = _EVALUATED.get(tree_name)
+    if state is None:
+        return False
+    if state["frames"][frame % RING_FRAMES] == frame:
+        return True
+    return frame in state["checkpoints"]
+
+
+def _nearest_evaluated(tree_name: str, frame: int, earliest: int) -> Optional[int]:
+    """Latest frame in [earliest, frame) whose history is held in the ring or a checkpoint."""
+    state = _EVALUATED.get(tree_name)
+    if state is None:
+        return None
+    held = [int(f) for f in state["frames"] if earliest <= f < frame]
+    held.extend(f for f in state["checkpoints"] if earliest <= f < frame)
+    return max(held) if held else None
+
+
+def history_depth(tree: bpy.types.NodeTree) -> int:
+    """Longest chain of history nodes feeding one another, capped to the ring size."""
+    upstream: Dict[str, list[str]] = {}
+    for link in getattr(tree, "links", []):
+        if not getattr(link, "is_valid", True):
+            continue
+        upstream.setdefault(link.to_node.name, []).append(link.from_node.name)
+    nodes = {node.name: node for node in tree.nodes}
+    depths: Dict[str, int] = {}
+
+    def visit(name: str, active: set[str]) -> int:
+        if name in depths:
+            return depths[name]
+        if name in active:
+            return 0
+        active.add(name)
+        best = max((visit(up, active) for up in upstream.get(name, ())), default=0)
+        active.discard(name)
+        node = nodes.get(name)
+        own = 1 if getattr(node, "bl_idname", "") in HISTORY_NODES else 0
+        depths[name] = best + own
+        return depths[name]
+
+    depth = max((visit(name, set()) for name in nodes), default=0)
+    return min(depth, RING_FRAMES - 1)
+
+
+def prime_frames(tree: bpy.types.NodeTree, frame: int) -> list[int]:
+    """Frames to evaluate, in order and each with its own inputs, before ``frame``.
+
+    A chain of N history nodes needs its first node's input from N frames back, so
+    replay starts there, or right after the nearest frame whose history is still
+    held. Evaluating those frames with the inputs of ``frame`` would record a wrong
+    history; callers must set the scene to each returned frame first.
+    """
+    tree_name = str(tree.name)
+    if not _TREE_KEYS.get(tree_name):
+        return []
+    frame = int(frame)
+    if _was_evaluated(tree_name, frame - 1):
+        return []
+    depth = history_depth(tree)
+    if depth <= 0:
+        return []
+    start = frame - depth
+    nearest = _nearest_evaluated(tree_name, frame, start)
+    if nearest is not None:
+        start = nearest + 1
+    return list(range(start, frame))
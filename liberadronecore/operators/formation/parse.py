@@ -14,7 +14,12 @@ from liberadronecore.formation.fn_parse import (
     _is_transition_node,
 )
 from liberadronecore.formation.fn_parse_pairing import _count_collection_vertices
-from liberadronecore.system.transition.transition_apply import apply_transition, purge_transition_nodes
+from liberadronecore.system.transition.transition_apply import (
+    apply_transition,
+    build_transition_contexts,
+    prefetch_transition_poses,
+    purge_transition_nodes,
+)
 
 
 def _render_end_for_range(start: int, end: int) -> int:
@@ -64,15 +69,22 @@ class FN_OT_calculate_schedule(bpy.types.Operator, FN_Register):
                 continue
             edges = _flow_edges(tree)
             reachable = _flow_reachable(start_nodes[0], edges)
-            for node in reachable:
-                if not _is_transition_node(node):
-                    continue
-                if not hasattr(node, "collection"):
-                    continue
-                if getattr(node, "collection", None) is not None:
-                    continue
+            pending = [
+                node for node in reachable
+                if _is_transition_node(node)
+                and hasattr(node, "collection")
+                and getattr(node, "collection", None) is None
+            ]
+            contexts = build_transition_contexts(pending, context)
+            prefetch_transition_poses(contexts.values())
+            for node in pending:
                 try:
-                    ok, message = apply_transition(node, context, assign_pairs_after=False)
+                    ok, message = apply_transition(
+                        node,
+                        context,
+                        assign_pairs_after=False,
+                        transition_ctx=contexts.get(node.name),
+                    )
                 except Exception as exc:
                     ok = False
                     message = str(exc)
@@ -116,13 +128,17 @@ class FN_OT_force_calculate_schedule(bpy.types.Operator, FN_Register):
                 continue
             edges = _flow_edges(tree)
             reachable = _flow_reachable(start_nodes[0], edges)
-            for node in reachable:
-                if not _is_transition_node(node):
-                    continue
-                if not hasattr(node, "collection"):
-                    continue
+            pending = [node for node in reachable if _is_transition_node(node) and hasattr(node, "collection")]
+            contexts = build_transition_contexts(pending, context)
+            prefetch_transition_poses(contexts.values())
+            for node in pending:
                 try:
-                    ok, message = apply_transition(node, context, assign_pairs_after=False)
+                    ok, message = apply_transition(
+                        node,
+                        context,
+                        assign_pairs_after=False,
+                        transition_ctx=contexts.get(node.name),
+                    )
                 except Exception as exc:
                     ok = False
                     message = str(exc)
@@ -721,20 +721,9 @@ class LDLED_OT_projectionuv_create_mesh(bpy.types.Operator):
             if verts:
                 bounds = projectionuv_util._world_bbox_from_points(verts)
             else:
-                bounds = None
-                for obj in projectionuv_util._selected_mesh_objects(context):
-                    obj_bounds = projectionuv_util._world_bbox_from_object(obj)
-                    if obj_bounds is None:
-                        continue
-                    if bounds is None:
-                        bounds = (obj_bounds[0].copy(), obj_bounds[1].copy())
-                    else:
-                        bounds[0].x = min(bounds[0].x, obj_bounds[0].x)
-                        bounds[0].y = min(bounds[0].y, obj_bounds[0].y)
-                        bounds[0].z = min(bounds[0].z, obj_bounds[0].z)
-                        bounds[1].x = max(bounds[1].x, obj_bounds[1].x)
-                        bounds[1].y = max(bounds[1].y, obj_bounds[1].y)
-                        bounds[1].z = max(bounds[1].z, obj_bounds[1].z)
+                bounds = projectionuv_util._world_bbox_from_objects(
+                    projectionuv_util._selected_mesh_objects(context)
+                )
             if bounds is None:
                 self.report({'ERROR'}, "No selection mesh or vertices")
                 return {'CANCELLED'}
@@ -1145,13 +1134,8 @@ class LDLED_OT_paint_take(bpy.types.Operator):
             self.report({'ERROR'}, "No colors captured")
             return {'CANCELLED'}
 
-        node.paint_items.clear()
-        for fid, color in sorted(colors_by_id.items(), key=lambda item: item[0]):
-            item = node.paint_items.add()
-            item.index = int(fid)
-            item.color = color
+        paint_util.set_paint_colors(node, colors_by_id)
         node.id_data.update_tag()
-        paint_util.clear_paint_cache(node)
         return {'FINISHED'}
 
 
@@ -1238,6 +1222,9 @@ class LDLED_OT_paint_modal(bpy.types.Operator):
         paint_util.set_paint_modal_active(False)
         node = paint_util.active_node()
         if node is not None:
+            if self._did_paint:
+                paint_util.commit_paint(node)
+                self._did_paint = False
             paint_util.clear_history(node)
         paint_util.clear_active_node()
 
@@ -1477,6 +1464,7 @@ class LDLED_OT_paint_modal(bpy.types.Operator):
                     node.paint_alpha,
                     node.blend_mode,
                     erase=bool(node.paint_erase),
+                    commit=False,
                 )
                 node.id_data.update_tag()
                 self._did_paint = True
@@ -1490,7 +1478,8 @@ class LDLED_OT_paint_modal(bpy.types.Operator):
             if self._did_paint:
                 node = paint_util.active_node()
                 if node is not None:
-                    paint_util.clear_paint_cache(node)
+                    paint_util.commit_paint(node)
+                    node.id_data.update_tag()
                 self._did_paint = False
             self._stroke_snapshot = False
             return {'RUNNING_MODAL'}
@@ -1512,6 +1501,7 @@ class LDLED_OT_paint_modal(bpy.types.Operator):
                     node.paint_alpha,
                     node.blend_mode,
                     erase=bool(node.paint_erase),
+                    commit=False,
                 )
                 node.id_data.update_tag()
                 self._did_paint = True
@@ -1565,7 +1555,6 @@ class LDLED_OT_paint_apply_selection(bpy.types.Operator):
             erase=bool(node.paint_erase),
         )
         node.id_data.update_tag()
-        paint_util.clear_paint_cache(node)
         bpy.ops.ed.undo_push(message="LED Paint Apply")
         return {'FINISHED'}
 
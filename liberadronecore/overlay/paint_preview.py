@@ -82,8 +82,8 @@ def draw_paint_preview():
     node = paint_util.active_node()
     if node is None:
         return
-    colors_by_id = paint_util.get_paint_cache(node)
-    if not colors_by_id:
+    layer = paint_util.get_paint_layer(node)
+    if layer is None or not layer["mask"].any():
         return
 
     cache = _update_cache(context.scene)
@@ -94,11 +94,11 @@ def draw_paint_preview():
     if not positions or not form_ids:
         return
 
+    paint_colors, covered = paint_util.read_paint_colors(node, form_ids)
     coords = []
     colors = []
-    for pos, fid in zip(positions, form_ids):
-        color = colors_by_id.get(int(fid))
-        if color is None:
+    for pos, color, hit in zip(positions, paint_colors.tolist(), covered.tolist()):
+        if not hit:
             continue
         pos_2d = view3d_utils.location_3d_to_region_2d(region, rv3d, pos)
         if pos_2d is None:
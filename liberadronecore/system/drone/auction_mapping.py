@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from liberadronecore.formation import greedy_pairing
+
+
+# Nearest candidates kept per point; the greedy partner is always added on top.
+CANDIDATE_COUNT = 48
+# Edges added per bidder that breaks epsilon complementary slackness outside its candidates.
+EXTRA_CANDIDATES = 32
+# Epsilon is divided by this factor between scaling phases.
+EPSILON_FACTOR = 6.0
+# Candidate repairs allowed per solve before falling back to an exact or greedy pairing.
+REPAIR_LIMIT = 64
+# Point counts above this are not solved exactly when building reports.
+EXACT_REPORT_LIMIT = 4000
+
+
+def _candidates(P: np.ndarray, Q: np.ndarray, k: int, workers: int) -> Tuple[np.ndarray, np.ndarray, float]:
+    n = P.shape[0]
+    k = max(1, min(int(k), n))
+    _dist, near = cKDTree(Q).query(P, k=k, workers=workers)
+    near = np.asarray(near, dtype=np.int64).reshape(n, k)
+    # The greedy pairing is a perfect matching, so the sparse problem is always feasible.
+    greedy = greedy_pairing.greedy_nearest_pairing(Q, P).reshape(n, 1)
+    cand = np.concatenate((near, greedy), axis=1)
+    cost = _edge_cost(P, Q, cand)
+    greedy_cost = float(cost[:, -1].sum())
+    cost[np.any(cand[:, :-1] == greedy, axis=1), -1] = np.inf
+    return cand, cost, greedy_cost
+
+
+def _edge_cost(P: np.ndarray, Q: np.ndarray, cand: np.ndarray) -> np.ndarray:
+    diff = P[:, None, :] - Q[cand]
+    return np.einsum("ijk,ijk->ij", diff, diff)
+
+
+def _best_objects(P: np.ndarray, Q: np.ndarray, prices: np.ndarray, k: int, workers: int):
+    """Exact ``min_j |P_i - Q_j|^2 + p_j`` over all objects via a lifted 4D KD-tree."""
+    base = float(prices.min())
+    lifted = np.concatenate((Q, np.sqrt(np.maximum(prices - base, 0.0))[:, None]), axis=1)
+    query = np.concatenate((P, np.zeros((P.shape[0], 1))), axis=1)
+    k = max(1, min(int(k), Q.shape[0]))
+    dist, near = cKDTree(lifted).query(query, k=k, workers=workers)
+    dist = np.asarray(dist, dtype=np.float64).reshape(P.shape[0], k)
+    near = np.asarray(near, dtype=np.int64).reshape(P.shape[0], k)
+    return dist[:, 0] * dist[:, 0] + base, near
+
+
+def _extend(cand: np.ndarray, cost: np.ndarray, rows: np.ndarray, extra: np.ndarray, extra_cost: np.ndarray):
+    width = extra.shape[1]
+    pad = np.repeat(cand[:, :1], width, axis=1)
+    pad_cost = np.full((cand.shape[0], width), np.inf)
+    pad[rows] = extra
+    pad_cost[rows] = extra_cost
+    pad_cost[np.any(pad[:, :, None] == cand[:, None, :], axis=2)] = np.inf
+    cand = np.concatenate((cand, pad), axis=1)
+    cost = np.concatenate((cost, pad_cost), axis=1)
+    # Move unused (infinite) slots to the end of each row and drop columns nobody uses.
+    order = np.argsort(~np.isfinite(cost), axis=1, kind="stable")
+    cand = np.take_along_axis(cand, order, axis=1)
+    cost = np.take_along_axis(cost, order, axis=1)
+    width = int(np.isfinite(cost).sum(axis=1).max())
+    return np.ascontiguousarray(cand[:, :width]), np.ascontiguousarray(cost[:, :width])
+
+
+def _auction_phase(
+    cand: np.ndarray,
+    value: np.ndarray,
+    prices: np.ndarray,
+    eps: float,
+    floor: float,
+    assigned: np.ndarray,
+    owner: np.ndarray,
+) -> None:
+    """Jacobi auction: every unassigned bidder bids at once, highest bid per object wins."""
+    rows = np.arange(cand.shape[0], dtype=np.int64)
+    bidders = rows[assigned < 0]
+    while bidders.size:
+        net = value[bidders] - prices[cand[bidders]]
+        best_col = np.argmax(net, axis=1)
+        best = net[np.arange(bidders.size), best_col]
+        net[np.arange(bidders.size), best_col] = -np.inf
+        second = np.maximum(net.max(axis=1), best - floor)
+        obj = cand[bidders, best_col]
+        bid = prices[obj] + (best - second) + eps
+
+        order = np.lexsort((-bid, obj))
+        first = np.ones((order.size,), dtype=bool)
+        first[1:] = obj[order][1:] != obj[order][:-1]
+        win = order[first]
+        won_obj = obj[win]
+        won_bidder = bidders[win]
+
+        lost = owner[won_obj]
+        lost = lost[lost >= 0]
+        assigned[lost] = -1
+        owner[won_obj] = won_bidder
+        assigned[won_bidder] = won_obj
+        prices[won_obj] = bid[win]
+        bidders = rows[assigned < 0]
+
+
+def _fallback_pairing(P: np.ndarray, Q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    n = P.shape[0]
+    if n <= EXACT_REPORT_LIMIT:
+        from liberadronecore.system.drone import calculate_mapping
+
+        return calculate_mapping.hungarian_from_points(P, Q)
+    p2q = greedy_pairing.greedy_nearest_pairing(Q, P).astype(np.int32)
+    q2p = np.empty((n,), dtype=np.int32)
+    q2p[p2q] = np.arange(n, dtype=np.int32)
+    return p2q, q2p
+
+
+def auction_from_points(
+    P: np.ndarray,
+    Q: np.ndarray,
+    *,
+    gap: float = 0.01,
+    candidates: int = CANDIDATE_COUNT,
+    workers: int = 1,
+    stats: Optional[Dict[str, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Squared-distance assignment by epsilon-scaling auction on sparse candidates.
+
+    Same contract as ``calculate_mapping.hungarian_from_points``. Bidding only looks at
+    each point's nearest candidates, but every phase ends with an exact check against
+    all objects, so the total cost is at most ``(1 + gap)`` times the optimum.
+    ``stats`` receives the centered cost, its dual lower bound and the phase counts.
+    ``workers`` is passed to the KD-tree queries (-1 uses every core). After
+    ``REPAIR_LIMIT`` candidate repairs the exact solver, or above
+    ``EXACT_REPORT_LIMIT`` points the greedy pairing, is returned instead.
+    """
+    P = np.asarray(P, dtype=np.float64).reshape(-1, 3)
+    Q = np.asarray(Q, dtype=np.float64).reshape(-1, 3)
+    n = P.shape[0]
+    p2q = np.empty((n,), dtype=np.int32)
+    q2p = np.empty((n,), dtype=np.int32)
+    if n == 0:
+        return p2q, q2p
+
+    # Translating either cloud adds the same constant to every perfect matching, so
+    # centering keeps the optimum while making nearest-neighbor candidates meaningful.
+    P = P - P.mean(axis=0)
+    Q = Q - Q.mean(axis=0)
+    cand, cost, greedy_cost = _candidates(P, Q, candidates, workers)
+    finite = cost[np.isfinite(cost)]
+    span = float(finite.max() - finite.min()) if finite.size else 0.0
+    eps_min = 1e-9 * max(span, 1.0) / n
+    eps = max(span * 0.25, eps_min)
+    floor = span + eps
+    prices = np.zeros((n,), dtype=np.float64)
+    rows = np.arange(n, dtype=np.int64)
+    lower_bound = 0.0
+    phases = 0
+    repairs = 0
+    phase_repairs = 0
+    fallback = False
+    assigned = np.full((n,), -1, dtype=np.int64)
+    owner = np.full((n,), -1, dtype=np.int64)
+    while True:
+        _auction_phase(cand, -cost, prices, eps, floor, assigned, owner)
+        held = np.argmax(cand == assigned[:, None], axis=1)
+        reduced = cost[rows, held] + prices[assigned]
+        best, near = _best_objects(P, Q, prices, 1, workers)
+        lower_bound = max(lower_bound, float(best.sum() - prices.sum()))
+        broken = np.flatnonzero(reduced > best + eps * (1.0 + 1e-9))
+        if broken.size:
+            if repairs >= REPAIR_LIMIT:
+                fallback = True
+                break
+            # Cheaper objects exist outside the candidate lists. The offending bidders get
+            # their best objects at the current prices and bid again at the same epsilon;
+            # if the same phase breaks again, prices have moved widely and every bidder does.
+            extend = broken if phase_repairs == 0 else rows
+            _best, near = _best_objects(P[extend], Q, prices, EXTRA_CANDIDATES, workers)
+            cand, cost = _extend(cand, cost, extend, near, _edge_cost(P[extend], Q, near))
+            owner[assigned[broken]] = -1
+            assigned[broken] = -1
+            repairs += 1
+            phase_repairs += 1
+            continue
+        phases += 1
+        phase_repairs = 0
+        if n * eps <= gap * lower_bound or eps <= eps_min:
+            break
+        eps = max(eps / EPSILON_FACTOR, min(gap * lower_bound / n, eps), eps_min)
+        assigned.fill(-1)
+        owner.fill(-1)
+
+    if fallback:
+        p2q[:], q2p[:] = _fallback_pairing(P, Q)
+    else:
+        p2q[:] = assigned
+        q2p[:] = owner
+    if stats is not None:
+        stats.update(
+            {
+                "cost": assignment_cost(P, Q, p2q),
+                "greedy_cost": greedy_cost,
+                "lower_bound": lower_bound,
+                "epsilon": eps,
+                "phases": phases,
+                "repairs": repairs,
+                "fallback": int(fallback),
+                "candidates": int(cand.shape[1]),
+            }
+        )
+    return p2q, q2p
+
+
+def assignment_cost(P: np.ndarray, Q: np.ndarray, p2q: np.ndarray) -> float:
+    diff = np.asarray(P, dtype=np.float64) - np.asarray(Q, dtype=np.float64)[np.asarray(p2q)]
+    return float(np.einsum("ij,ij->", diff, diff))
+
+
+def compare_solvers(P: np.ndarray, Q: np.ndarray, *, gap: float = 0.01, workers: int = 1) -> Dict[str, float]:
+    """Cost and time of the auction solver next to the exact Hungarian solver."""
+    from liberadronecore.system.drone import calculate_mapping
+
+    report: Dict[str, float] = {"count": int(len(P))}
+    start = time.perf_counter()
+    p2q, _q2p = auction_from_points(P, Q, gap=gap, workers=workers, stats=report)
+    report["auction_seconds"] = time.perf_counter() - start
+    if len(P) <= EXACT_REPORT_LIMIT:
+        start = time.perf_counter()
+        exact, _exact_q2p = calculate_mapping.hungarian_from_points(np.asarray(P), np.asarray(Q))
+        report["exact_seconds"] = time.perf_counter() - start
+        report["exact_cost"] = assignment_cost(P, Q, exact)
+        report["gap"] = assignment_cost(P, Q, p2q) / max(report["exact_cost"], 1e-12) - 1.0
+    return report
@@ -1,7 +1,13 @@
-﻿import bpy
+﻿import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
 import numpy as np
 from mathutils import Vector
 from mathutils.kdtree import KDTree
+from scipy.spatial import cKDTree
+
+from liberadronecore.system.transition import scurve
 
 # =========================================================
 # ユーザー設定
@@ -65,6 +71,7 @@ def _get_transition_settings(scene):
     speed_acc_margin = _get_scene_setting(scene, "ld_bakedt_speed_acc_margin", SPEED_ACC_MARGIN, float)
     speed_acc_margin = max(0.0, min(1.0, speed_acc_margin))
     max_neighbors = max(1, _get_scene_setting(scene, "ld_bakedt_max_neighbors", MAX_NEIGHBORS, int))
+    exact_scurve = _get_scene_setting(scene, "ld_bakedt_exact_scurve", EXACT_SCURVE, bool)
     return {
         "max_subdiv": max_subdiv,
         "check_relax_iters": check_relax_iters,
@@ -75,6 +82,7 @@ def _get_transition_settings(scene):
         "relax_edge_ratio": relax_edge_ratio,
         "speed_acc_margin": speed_acc_margin,
         "max_neighbors": max_neighbors,
+        "exact_scurve": exact_scurve,
     }
 
 
@@ -144,6 +152,8 @@ RELAX_EDGE_RATIO = 0.21875   # Ratio of transition frames (105/480)
 SPEED_ACC_MARGIN = 0.995     # Safety margin for speed/acc limits
 
 MAX_NEIGHBORS = 25           # KDTreeで見る近傍数
+POSE_BATCH = 32              # 一度にまとめて評価する仮想ポーズ数
+EXACT_SCURVE = False         # Sカーブを数値テーブルでなく厳密式で評価する
 
 END_POS_TOLERANCE = 0.01     # Max allowed end position error before correction
 END_CORRECTION_FRAMES = 6    # Frames used to blend into end target when off
@@ -158,88 +168,7 @@ CLEAR_OLD = True
 # Sカーブ台形（ジャーク制限）: 数値積分テーブル
 # =========================================================
 def build_scurve_table(L, T_total, v_max, a_max, j_max, samples=2048):
-    if L <= 1e-12 or T_total <= 1e-12:
-        return {"T": T_total, "ts": [0.0], "ss": [0.0], "vs": [0.0]}
-
-    dt = T_total / (samples - 1)
-
-    tJ = a_max / max(j_max, 1e-12)
-    tJ = min(tJ, T_total * 0.25)
-
-    # v_maxに到達する目安の加速時間
-    t_acc_nom = v_max / max(a_max, 1e-12)
-    tA_hold = max(0.0, t_acc_nom - 2.0 * tJ)
-
-    t_acc = 2.0 * tJ + tA_hold
-    t_cruise = max(0.0, T_total - 2.0 * t_acc)
-
-    if T_total < 2.0 * t_acc:
-        tA_hold = max(0.0, (T_total / 2.0) - 2.0 * tJ)
-        t_acc = 2.0 * tJ + tA_hold
-        t_cruise = 0.0
-
-    def accel_at_time(t):
-        t0 = 0.0
-        t1 = t0 + tJ
-        t2 = t1 + tA_hold
-        t3 = t2 + tJ
-        t4 = t3 + t_cruise
-
-        if t < t0:
-            return 0.0
-        if t < t1:
-            return j_max * (t - t0)
-        if t < t2:
-            return a_max
-        if t < t3:
-            return a_max - j_max * (t - t2)
-        if t < t4:
-            return 0.0
-
-        tr = T_total - t
-        if tr < t1:
-            return -(j_max * (tr - t0))
-        if tr < t2:
-            return -a_max
-        if tr < t3:
-            return -(a_max - j_max * (tr - t2))
-        return 0.0
-
-    ts = [0.0]
-    vs = [0.0]
-    ss = [0.0]
-    v = 0.0
-    s = 0.0
-
-    for n in range(1, samples):
-        t_prev = (n - 1) * dt
-        t = n * dt
-
-        a0 = accel_at_time(t_prev)
-        a1 = accel_at_time(t)
-        a = 0.5 * (a0 + a1)
-
-        v = v + a * dt
-        if v > v_max:
-            v = v_max
-        if v < 0.0:
-            v = 0.0
-
-        s = s + v * dt
-
-        ts.append(t)
-        vs.append(v)
-        ss.append(s)
-
-    # 距離を L に合わせてスケール
-    if ss[-1] > 1e-12:
-        scale = L / ss[-1]
-    else:
-        scale = 1.0
-    ss = [x * scale for x in ss]
-    vs = [x * scale for x in vs]
-
-    return {"T": T_total, "ts": ts, "ss": ss, "vs": vs}
+    return scurve.build_table(L, T_total, v_max, a_max, j_max, samples)
 
 def table_lookup(table, t, key="s"):
     T = table["T"]
@@ -333,7 +262,7 @@ def relax_pose(pos, base, d_min, iters, max_neighbors, tether, max_shift):
 # 適応仮想ポーズ生成（時間中間→リラックス→必要なら再帰分割）
 # =========================================================
 def base_pose_at_time(Aw, Ew, L_base, table, t):
-    s = table_lookup(table, t, key="s")
+    s = float(scurve.evaluate(table, t, "s"))
     u = 0.0 if L_base <= 1e-12 else min(1.0, max(0.0, s / L_base))
     return [Aw[i].lerp(Ew[i], u) for i in range(len(Aw))]
 
@@ -370,6 +299,131 @@ def interval_needs_split(
 
     return False
 
+def _batch_pairs(batch, d_min, max_neighbors, workers):
+    """Pairs closer than d_min among each drone's nearest neighbours, for a (B, N, 3) batch.
+
+    The poses are laid side by side along X so one KD-tree serves the whole batch.
+    Returns flat indices i, j (into B * N) and their distances.
+    """
+    B, N, _ = batch.shape
+    lo = batch[:, :, 0].min(axis=1)
+    span = float((batch[:, :, 0].max(axis=1) - lo).max())
+    stacked = batch.reshape(B * N, 3).copy()
+    stacked[:, 0] += np.repeat(np.arange(B) * (span + 4.0 * d_min + 1.0) - lo, N)
+    k = min(max_neighbors + 1, N)
+    dist, near = cKDTree(stacked).query(stacked, k=k, distance_upper_bound=d_min, workers=workers)
+    dist = np.asarray(dist).reshape(B * N, k)
+    near = np.asarray(near).reshape(B * N, k)
+    rows = np.repeat(np.arange(B * N), k).reshape(B * N, k)
+    valid = (near < B * N) & (near != rows) & (dist < d_min)
+    return rows[valid], near[valid], dist[valid]
+
+
+def relax_poses_np(batch, base, d_min, iters, max_neighbors, tether, max_shift, workers=1):
+    """relax_pose for a (B, N, 3) batch of poses at once; ``batch`` is updated in place."""
+    B, N, _ = batch.shape
+    if N < 2 or B == 0:
+        return batch
+    flat = batch.reshape(B * N, 3)
+    flat_base = base.reshape(B * N, 3)
+    for _ in range(iters):
+        i, j, dist = _batch_pairs(batch, d_min, max_neighbors, workers)
+        push = np.zeros((i.size, 3))
+        same = dist <= 1e-12
+        push[same, 0] = d_min * 0.5
+        apart = ~same
+        push[apart] = (flat[i[apart]] - flat[j[apart]]) * ((d_min - dist[apart]) * 0.5 / dist[apart])[:, None]
+        moved = np.zeros((B * N, 3))
+        for axis in range(3):
+            moved[:, axis] = np.bincount(i, push[:, axis], B * N) - np.bincount(j, push[:, axis], B * N)
+        flat += moved
+        if tether > 0.0:
+            flat += (flat_base - flat) * tether
+        if max_shift is not None:
+            off = flat - flat_base
+            length = np.linalg.norm(off, axis=1)
+            over = (length > max_shift) & (length > 1e-12)
+            flat[over] = flat_base[over] + off[over] * (max_shift / length[over])[:, None]
+    return batch
+
+
+def min_dist_violations_np(batch, d_min, max_neighbors=12, workers=1):
+    """has_min_dist_violation for every pose of a (B, N, 3) batch."""
+    B, N, _ = batch.shape
+    if N < 2 or B == 0:
+        return np.zeros((B,), dtype=bool)
+    i, _j, _dist = _batch_pairs(batch, d_min, max_neighbors, workers)
+    return np.bincount(i // N, minlength=B) > 0
+
+
+def _base_poses(Aw, Ew, L_base, table, times):
+    s = scurve.evaluate(table, times, "s")
+    u = np.zeros_like(s) if L_base <= 1e-12 else np.clip(s / L_base, 0.0, 1.0)
+    return Aw[None, :, :] + (Ew - Aw)[None, :, :] * u[:, None, None]
+
+
+def _relaxed_poses(Aw, Ew, L_base, table, times, d_min, iters, max_neighbors, tether, max_shift, workers):
+    out = []
+    for start in range(0, len(times), POSE_BATCH):
+        base = _base_poses(Aw, Ew, L_base, table, times[start:start + POSE_BATCH])
+        out.append(relax_poses_np(base.copy(), base, d_min, iters, max_neighbors, tether, max_shift, workers))
+    return np.concatenate(out, axis=0) if out else np.zeros((0,) + Aw.shape)
+
+
+def adaptive_pose_arrays(
+    Aw, Ew, L_base, table,
+    t0, t1,
+    d_min,
+    pre_iters,
+    tether,
+    max_shift,
+    max_subdiv,
+    max_neighbors=12,
+    check_relax_iters=4,
+    samples_in_interval=2,
+    relax_endpoints=True,
+    workers=1,
+):
+    """build_adaptive_poses の一括版: 同じ深さの区間をまとめて判定・分割する。
+
+    Returns (times[K], poses[K, N, 3]) sorted by time.
+    """
+    Aw = np.asarray(Aw, dtype=np.float64).reshape(-1, 3)
+    Ew = np.asarray(Ew, dtype=np.float64).reshape(-1, 3)
+    args = (d_min, pre_iters if relax_endpoints else 0, max_neighbors, tether, max_shift, workers)
+    times = [t0, t1]
+    poses = [_relaxed_poses(Aw, Ew, L_base, table, [t0, t1], *args)]
+
+    intervals = [(t0, t1)]
+    for _depth in range(max_subdiv):
+        intervals = [(tL, tR) for tL, tR in intervals if tR - tL > 1e-8]
+        if not intervals:
+            break
+        weights = [sidx / (samples_in_interval + 1) for sidx in range(1, samples_in_interval + 1)]
+        sample_times = [tL + (tR - tL) * w for tL, tR in intervals for w in weights]
+        violated = np.zeros((len(sample_times),), dtype=bool)
+        for start in range(0, len(sample_times), POSE_BATCH):
+            base = _base_poses(Aw, Ew, L_base, table, sample_times[start:start + POSE_BATCH])
+            test = relax_poses_np(base.copy(), base, d_min, check_relax_iters, max_neighbors, tether, max_shift, workers)
+            violated[start:start + base.shape[0]] = min_dist_violations_np(test, d_min, max_neighbors, workers)
+        if samples_in_interval > 0:
+            split = violated.reshape(len(intervals), samples_in_interval).any(axis=1)
+        else:
+            split = np.zeros((len(intervals),), dtype=bool)
+        intervals = [iv for iv, flag in zip(intervals, split) if flag]
+        if not intervals:
+            break
+        mids = [0.5 * (tL + tR) for tL, tR in intervals]
+        times.extend(mids)
+        poses.append(_relaxed_poses(Aw, Ew, L_base, table, mids, d_min, pre_iters, max_neighbors, tether, max_shift, workers))
+        intervals = [half for (tL, tR), tM in zip(intervals, mids) for half in ((tL, tM), (tM, tR))]
+
+    times = np.asarray(times, dtype=np.float64)
+    poses = np.concatenate(poses, axis=0)
+    order = np.argsort(times, kind="stable")
+    return times[order], poses[order]
+
+
 def build_adaptive_poses(
     Aw, Ew, L_base, table,
     t0, t1,
@@ -381,48 +435,82 @@ def build_adaptive_poses(
     max_neighbors=12,
     check_relax_iters=4,
     samples_in_interval=2,
-    relax_endpoints=True
+    relax_endpoints=True,
+    workers=1,
 ):
-    base0 = base_pose_at_time(Aw, Ew, L_base, table, t0)
-    base1 = base_pose_at_time(Aw, Ew, L_base, table, t1)
-    pose0 = [p.copy() for p in base0]
-    pose1 = [p.copy() for p in base1]
+    times, poses = adaptive_pose_arrays(
+        [(p.x, p.y, p.z) for p in Aw], [(p.x, p.y, p.z) for p in Ew], L_base, table,
+        t0, t1,
+        d_min=d_min,
+        pre_iters=pre_iters,
+        tether=tether,
+        max_shift=max_shift,
+        max_subdiv=max_subdiv,
+        max_neighbors=max_neighbors,
+        check_relax_iters=check_relax_iters,
+        samples_in_interval=samples_in_interval,
+        relax_endpoints=relax_endpoints,
+        workers=workers,
+    )
+    return [(float(t), [Vector(p) for p in pose.tolist()]) for t, pose in zip(times, poses)]  # [(t, pose[N]), ...]
+
+def adaptive_pose_job(start_positions, end_positions, frame_start, frame_end, fps, *, scene=None):
+    """Everything build_tracks_from_positions needs for its adaptive poses, without bpy objects."""
+    if scene is None:
+        scene = getattr(bpy, "context", None).scene if getattr(bpy, "context", None) else None
+    settings = _get_transition_settings(scene)
+    _up, _down, _horiz, v_max, a_max, j_max, d_min = _get_proxy_limits(scene)
+    j_max = max(1e-6, j_max * JERK_SCALE)
+    Aw = np.asarray([(p[0], p[1], p[2]) for p in start_positions], dtype=np.float64).reshape(-1, 3)
+    Ew = np.asarray([(p[0], p[1], p[2]) for p in end_positions], dtype=np.float64).reshape(-1, 3)
+    T_total = (int(frame_end) - int(frame_start)) / fps
+    # 代表距離（台形になりやすいようmax）
+    L_base = float(np.linalg.norm(Ew - Aw, axis=1).max()) if Aw.shape[0] else 0.0
+    return {
+        "Aw": Aw,
+        "Ew": Ew,
+        "L_base": L_base,
+        "table": scurve.build_table(L_base, T_total, v_max, a_max, j_max, exact=settings["exact_scurve"]),
+        "options": {
+            "t0": 0.0,
+            "t1": T_total,
+            "d_min": _expand_distance_limit(d_min, settings["exp_distance"]),
+            "pre_iters": settings["pre_relax_iters"],
+            "tether": TETHER_PRE,
+            "max_shift": MAX_SHIFT_PER_POSE,
+            "max_subdiv": settings["max_subdiv"],
+            "max_neighbors": settings["max_neighbors"],
+            "check_relax_iters": settings["check_relax_iters"],
+            "samples_in_interval": SAMPLES_IN_INTERVAL,
+            "relax_endpoints": False,
+        },
+    }
 
-    # 端点の距離制限を無視する場合はリラックスしない
-    if relax_endpoints:
-        relax_pose(pose0, base0, d_min, pre_iters, max_neighbors, tether, max_shift)
-        relax_pose(pose1, base1, d_min, pre_iters, max_neighbors, tether, max_shift)
 
-    poses = [(t0, pose0), (t1, pose1)]
+def run_pose_job(job, workers=1):
+    return adaptive_pose_arrays(
+        job["Aw"], job["Ew"], job["L_base"], job["table"],
+        workers=workers,
+        **job["options"],
+    )
 
-    def rec(tL, pL, tR, pR, depth):
-        if depth >= max_subdiv:
-            return
 
-        if not interval_needs_split(
-            Aw, Ew, L_base, table,
-            tL, tR,
-            d_min=d_min,
-            tether=tether,
-            max_shift=max_shift,
-            check_relax_iters=check_relax_iters,
-            samples_in_interval=samples_in_interval,
-            max_neighbors=max_neighbors
-        ):
-            return
-
-        tM = 0.5 * (tL + tR)
-        baseM = base_pose_at_time(Aw, Ew, L_base, table, tM)
-        pM = [p.copy() for p in baseM]
-        relax_pose(pM, baseM, d_min, pre_iters, max_neighbors, tether, max_shift)
-
-        poses.append((tM, pM))
-        rec(tL, pL, tM, pM, depth + 1)
-        rec(tM, pM, tR, pR, depth + 1)
-
-    rec(t0, pose0, t1, pose1, 0)
-    poses.sort(key=lambda x: x[0])
-    return poses  # [(t, pose[N]), ...]
+def prefetch_adaptive_poses(jobs, max_workers=None):
+    """Compute the adaptive poses of independent transitions concurrently.
+
+    Returns one (pose_times, poses) result per job, to be handed to
+    build_tracks_from_positions. The work is NumPy and KD-tree queries, which
+    release the GIL, so threads spread it over the cores.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    max_workers = max(1, min(len(jobs), max_workers or os.cpu_count() or 1))
+    if max_workers == 1:
+        return [run_pose_job(job, workers=-1) for job in jobs]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run_pose_job, jobs))
+
 
 # =========================================================
 # 折れ線補間（距離sで進む）
@@ -493,7 +581,13 @@ def build_tracks_from_positions(
     fps: float,
     *,
     scene=None,
+    poses=None,
 ):
+    """Bake drone tracks between two formations.
+
+    ``poses`` takes a (pose_times, poses) result of prefetch_adaptive_poses for the
+    same positions; without it the adaptive poses are solved here.
+    """
     if fps <= 0.0:
         raise RuntimeError("Invalid FPS")
     if len(start_positions) != len(end_positions):
@@ -511,9 +605,6 @@ def build_tracks_from_positions(
     v_max_horiz_run = v_max_horiz * speed_margin
     a_max_run = a_max * speed_margin
     max_neighbors = settings["max_neighbors"]
-    max_subdiv = settings["max_subdiv"]
-    check_relax_iters = settings["check_relax_iters"]
-    pre_relax_iters = settings["pre_relax_iters"]
     relax_dmin_scale = settings["relax_dmin_scale"]
     relax_edge_frames = settings["relax_edge_frames"]
     relax_edge_ratio = settings["relax_edge_ratio"]
@@ -545,70 +636,34 @@ def build_tracks_from_positions(
             )
         return tracks
 
-    T_total = frames / fps
-
-    Aw = list(start_positions)
-    Ew = list(end_positions)
-    N = len(Aw)
-
-    dists = [(Ew[i] - Aw[i]).length for i in range(N)]
-    L_base = max(dists) if N else 0.0
-
-    table = build_scurve_table(L_base, T_total, v_max, a_max, j_max, samples=2048)
-
-    poses_t = build_adaptive_poses(
-        Aw, Ew, L_base, table,
-        t0=0.0, t1=T_total,
-        d_min=d_min_relax,
-        pre_iters=pre_relax_iters,
-        tether=TETHER_PRE,
-        max_shift=MAX_SHIFT_PER_POSE,
-        max_subdiv=max_subdiv,
-        max_neighbors=max_neighbors,
-        check_relax_iters=check_relax_iters,
-        samples_in_interval=SAMPLES_IN_INTERVAL,
-        relax_endpoints=False
-    )
+    job = adaptive_pose_job(start_positions, end_positions, start_f, end_f, fps, scene=scene)
+    N = job["Aw"].shape[0]
+    table = job["table"]
+    pose_times_np, poses_np = poses if poses is not None else run_pose_job(job, workers=-1)
+    K = len(pose_times_np)
+    pose_s_np = scurve.evaluate(table, pose_times_np, "s")
+    frame_times = (np.arange(start_f, end_f + 1) - start_f) / fps
+    frame_s = scurve.evaluate(table, frame_times, "s")
+    frame_v = scurve.evaluate(table, frame_times, "v")
 
-    K = len(poses_t)
-    poses = [pose for (t, pose) in poses_t]
-    pose_times_np = np.asarray([t for (t, pose) in poses_t], dtype=np.float64)
-    pose_s_np = np.asarray([table_lookup(table, t, key="s") for t in pose_times_np], dtype=np.float64)
-
-    poses_np = np.asarray(
-        [[(p.x, p.y, p.z) for p in pose] for pose in poses],
-        dtype=np.float64,
-    ) if N else np.zeros((0, 0, 3), dtype=np.float64)
-
-    cur_pos_np = np.asarray(
-        [[p.x, p.y, p.z] for p in poses[0]],
-        dtype=np.float64,
-    ) if N else np.zeros((0, 3), dtype=np.float64)
-    prev_vel_np = np.zeros_like(cur_pos_np)
     dt = 1.0 / fps
 
     max_shift_run = (d_min_relax * MAX_SHIFT_RUN_RATIO) if (MAX_SHIFT_RUN is None) else MAX_SHIFT_RUN
 
-    end_np = np.asarray(
-        [[p.x, p.y, p.z] for p in Ew],
-        dtype=np.float64,
-    ) if N else np.zeros((0, 3), dtype=np.float64)
+    end_np = job["Ew"]
     a_max_run_base = a_max * speed_margin
 
     def _simulate_tracks():
-        cur_pos_np = np.asarray(
-            [[p.x, p.y, p.z] for p in poses[0]],
-            dtype=np.float64,
-        ) if N else np.zeros((0, 3), dtype=np.float64)
+        cur_pos_np = poses_np[0].copy() if N else np.zeros((0, 3), dtype=np.float64)
         prev_vel_np = np.zeros_like(cur_pos_np)
         tracks = [{"name": f"Drone_{i:04d}", "data": []} for i in range(N)]
         a_max_run = a_max_run_base
 
         for f in range(start_f, end_f + 1):
-            t = (f - start_f) / fps
+            t = frame_times[f - start_f]
 
-            s_base = table_lookup(table, t, key="s")
-            v_allow = table_lookup(table, t, key="v")
+            s_base = frame_s[f - start_f]
+            v_allow = float(frame_v[f - start_f])
             if K <= 1:
                 target_np = poses_np[0] if K else np.zeros((0, 3), dtype=np.float64)
             else:
@@ -773,7 +828,8 @@ def main():
     L_base = max(dists) if N else 0.0
 
     # 速度テーブル（Sカーブ）
-    table = build_scurve_table(L_base, T_total, v_max, a_max, j_max, samples=2048)
+    settings = _get_transition_settings(scene)
+    table = scurve.build_table(L_base, T_total, v_max, a_max, j_max, exact=settings["exact_scurve"])
 
     # 適応仮想ポーズ生成
     poses_t = build_adaptive_poses(
@@ -824,12 +880,14 @@ def main():
 
     max_shift_run = (d_min_relax * MAX_SHIFT_RUN_RATIO) if (MAX_SHIFT_RUN is None) else MAX_SHIFT_RUN
 
+    frame_times = (np.arange(start_f, end_f + 1) - start_f) / fps
+    frame_s = scurve.evaluate(table, frame_times, "s")
+    frame_v = scurve.evaluate(table, frame_times, "v")  # Sカーブ速度そのもの
+
     # Bake
     for f in range(start_f, end_f + 1):
-        t = (f - start_f) / fps
-
-        s_base = table_lookup(table, t, key="s")
-        v_allow = table_lookup(table, t, key="v")  # Sカーブ速度そのもの
+        s_base = float(frame_s[f - start_f])
+        v_allow = float(frame_v[f - start_f])
         u = 0.0 if L_base <= 1e-12 else min(1.0, max(0.0, s_base / L_base))
 
         # 目標位置（各ドローンは自分のパス長に比例して進む）
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+# Jerk-limited (S-curve) trapezoid used to time transitions. Tables reproduce the
+# numerical integration bakedt always used; the closed form integrates the same
+# piecewise-linear acceleration exactly.
+TABLE_SAMPLES = 2048
+_TABLE_LIMIT = 32
+_TABLES: "OrderedDict[Tuple, Dict[str, object]]" = OrderedDict()
+_STATS: Dict[str, int] = {"hits": 0, "builds": 0}
+
+
+def _phases(T_total: float, v_max: float, a_max: float, j_max: float) -> Tuple[float, float, float]:
+    tJ = a_max / max(j_max, 1e-12)
+    tJ = min(tJ, T_total * 0.25)
+
+    # v_maxに到達する目安の加速時間
+    t_acc_nom = v_max / max(a_max, 1e-12)
+    tA_hold = max(0.0, t_acc_nom - 2.0 * tJ)
+
+    t_acc = 2.0 * tJ + tA_hold
+    t_cruise = max(0.0, T_total - 2.0 * t_acc)
+
+    if T_total < 2.0 * t_acc:
+        tA_hold = max(0.0, (T_total / 2.0) - 2.0 * tJ)
+        t_cruise = 0.0
+    return tJ, tA_hold, t_cruise
+
+
+def accel_at_times(t, T_total: float, v_max: float, a_max: float, j_max: float) -> np.ndarray:
+    """Vectorized accel_at_time; every branch evaluates the same expression as the scalar one."""
+    t = np.asarray(t, dtype=np.float64)
+    tJ, tA_hold, t_cruise = _phases(T_total, v_max, a_max, j_max)
+    t0 = 0.0
+    t1 = t0 + tJ
+    t2 = t1 + tA_hold
+    t3 = t2 + tJ
+    t4 = t3 + t_cruise
+    tr = T_total - t
+    return np.select(
+        [t < t0, t < t1, t < t2, t < t3, t < t4, tr < t1, tr < t2, tr < t3],
+        [
+            0.0,
+            j_max * (t - t0),
+            a_max,
+            a_max - j_max * (t - t2),
+            0.0,
+            -(j_max * (tr - t0)),
+            -a_max,
+            -(a_max - j_max * (tr - t2)),
+        ],
+        0.0,
+    )
+
+
+def _integrate_table(L, T_total, v_max, a_max, j_max, samples):
+    if L <= 1e-12 or T_total <= 1e-12:
+        return {"T": T_total, "ts": np.zeros((1,)), "ss": np.zeros((1,)), "vs": np.zeros((1,))}
+
+    dt = T_total / (samples - 1)
+    ts = np.arange(samples, dtype=np.float64) * dt
+    acc = accel_at_times(ts, T_total, v_max, a_max, j_max)
+    dv = 0.5 * (acc[:-1] + acc[1:]) * dt
+    # Same left-to-right sums as the loop; it only has to run when the clamp engages.
+    vs = np.concatenate(([0.0], np.cumsum(dv)))
+    if np.any(vs > v_max) or np.any(vs < 0.0):
+        v = 0.0
+        for n in range(1, samples):
+            v = min(max(v + dv[n - 1], 0.0), v_max)
+            vs[n] = v
+    ss = np.concatenate(([0.0], np.cumsum(vs[1:] * dt)))
+
+    # 距離を L に合わせてスケール
+    scale = L / ss[-1] if ss[-1] > 1e-12 else 1.0
+    return {"T": T_total, "ts": ts, "ss": ss * scale, "vs": vs * scale}
+
+
+def _exact_segments(L, T_total, v_max, a_max, j_max):
+    """Piecewise-cubic s(t) of the unclamped profile, or None when the velocity clamp engages."""
+    if L <= 1e-12 or T_total <= 1e-12:
+        return None
+    tJ, tA_hold, t_cruise = _phases(T_total, v_max, a_max, j_max)
+    t1 = tJ
+    t2 = t1 + tA_hold
+    t3 = t2 + tJ
+    t4 = t3 + t_cruise
+    # (start, accel at start, jerk); the decel half mirrors the accel half.
+    rise = [(0.0, 0.0, j_max), (t1, a_max, 0.0), (t2, a_max, -j_max), (t3, 0.0, 0.0)]
+    fall = [
+        (t4, -(a_max - j_max * tJ), -j_max),
+        (T_total - t2, -a_max, 0.0),
+        (T_total - t1, -(j_max * tJ), j_max),
+    ]
+    starts = []
+    acc0 = []
+    jerk = []
+    for start, a0, j in rise + fall:
+        if starts and start <= starts[-1]:
+            starts[-1], acc0[-1], jerk[-1] = start, a0, j
+            continue
+        starts.append(start)
+        acc0.append(a0)
+        jerk.append(j)
+    starts = np.asarray(starts)
+    acc0 = np.asarray(acc0)
+    jerk = np.asarray(jerk)
+    ends = np.append(starts[1:], T_total)
+    span = ends - starts
+    v0 = np.zeros_like(starts)
+    s0 = np.zeros_like(starts)
+    for k in range(1, starts.size):
+        d = span[k - 1]
+        v0[k] = v0[k - 1] + acc0[k - 1] * d + jerk[k - 1] * d * d / 2.0
+        s0[k] = s0[k - 1] + v0[k - 1] * d + acc0[k - 1] * d * d / 2.0 + jerk[k - 1] * d ** 3 / 6.0
+    d = span[-1]
+    s_end = s0[-1] + v0[-1] * d + acc0[-1] * d * d / 2.0 + jerk[-1] * d ** 3 / 6.0
+    peak = float(v0.max())
+    if peak > v_max * (1.0 + 1e-9) or s_end <= 1e-12:
+        return None
+    return {
+        "starts": starts,
+        "acc0": acc0,
+        "jerk": jerk,
+        "v0": v0,
+        "s0": s0,
+        "scale": L / s_end,
+    }
+
+
+def _exact_eval(exact, T_total, t, key):
+    tc = np.clip(t, 0.0, T_total)
+    seg = np.clip(np.searchsorted(exact["starts"], tc, side="right") - 1, 0, exact["starts"].size - 1)
+    d = tc - exact["starts"][seg]
+    a0 = exact["acc0"][seg]
+    j = exact["jerk"][seg]
+    v0 = exact["v0"][seg]
+    if key == "s":
+        out = exact["s0"][seg] + v0 * d + a0 * d * d / 2.0 + j * d ** 3 / 6.0
+    else:
+        out = v0 + a0 * d + j * d * d / 2.0
+    return np.maximum(out, 0.0) * exact["scale"]
+
+
+def build_table(L, T_total, v_max, a_max, j_max, samples=TABLE_SAMPLES, *, exact=False) -> Dict[str, object]:
+    """S-curve table for the given limits, shared between calls with the same parameters.
+
+    With ``exact`` the closed form is attached whenever the profile never hits the
+    velocity clamp; ``evaluate`` then prefers it over the sampled table.
+    """
+    key = (float(L), float(T_total), float(v_max), float(a_max), float(j_max), int(samples), bool(exact))
+    table = _TABLES.get(key)
+    if table is not None:
+        _TABLES.move_to_end(key)
+        _STATS["hits"] += 1
+        return table
+    table = _integrate_table(float(L), float(T_total), float(v_max), float(a_max), float(j_max), int(samples))
+    if exact:
+        table["exact"] = _exact_segments(float(L), float(T_total), float(v_max), float(a_max), float(j_max))
+    _TABLES[key] = table
+    _STATS["builds"] += 1
+    while len(_TABLES) > _TABLE_LIMIT:
+        _TABLES.popitem(last=False)
+    return table
+
+
+def lookup(table, t, key="s") -> np.ndarray:
+    """table_lookup over an array of times of any shape, e.g. (frames, drones)."""
+    t = np.asarray(t, dtype=np.float64)
+    T = table["T"]
+    ts = np.asarray(table["ts"], dtype=np.float64)
+    arr = np.asarray(table["ss"] if key == "s" else table["vs"], dtype=np.float64)
+    if ts.size < 2 or T <= 0.0:
+        return np.where(t <= 0.0, arr[0], arr[-1])
+    u = np.where(t > 0.0, t, 0.0) / T
+    idx = np.clip((u * (ts.size - 1)).astype(np.int64), 0, ts.size - 2)
+    t0 = ts[idx]
+    t1 = ts[idx + 1]
+    a0 = arr[idx]
+    a1 = arr[idx + 1]
+    width = t1 - t0
+    flat = width <= 1e-12
+    w = (t - t0) / np.where(flat, 1.0, width)
+    out = np.where(flat, a0, a0 + (a1 - a0) * w)
+    out = np.where(t <= 0.0, arr[0], out)
+    return np.where(t >= T, arr[-1], out)
+
+
+def evaluate(table, t, key="s") -> np.ndarray:
+    exact = table.get("exact")
+    if exact is not None:
+        return _exact_eval(exact, table["T"], np.asarray(t, dtype=np.float64), key)
+    return lookup(table, t, key)
+
+
+def precision_report(L, T_total, v_max, a_max, j_max, samples=TABLE_SAMPLES, probes=16) -> Dict[str, object]:
+    """Error of the sampled table against the closed form, probed between table samples."""
+    table = build_table(L, T_total, v_max, a_max, j_max, samples)
+    exact = _exact_segments(float(L), float(T_total), float(v_max), float(a_max), float(j_max))
+    report: Dict[str, object] = {"samples": int(samples), "exact_available": exact is not None}
+    if exact is None:
+        return report
+    t = np.linspace(0.0, T_total, (int(samples) - 1) * int(probes) + 1)
+    for key in ("s", "v"):
+        err = np.abs(lookup(table, t, key) - _exact_eval(exact, T_total, t, key))
+        report[f"{key}_max_error"] = float(err.max())
+        report[f"{key}_mean_error"] = float(err.mean())
+    report["s_relative_error"] = report["s_max_error"] / max(float(L), 1e-12)
+    return report
+
+
+def get_stats() -> Dict[str, int]:
+    stats = dict(_STATS)
+    stats["cached"] = len(_TABLES)
+    return stats
+
+
+def clear_tables() -> None:
+    _TABLES.clear()
+
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import math
+import os
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import bpy
@@ -14,6 +15,7 @@ from liberadronecore.system.transition import bakedt, copyloc, vat_gn
 from liberadronecore.system.vat import create_vat
 from liberadronecore.util import image_util
 from liberadronecore.util import pair_id
+from liberadronecore.util import time_static
 
 
 @dataclass
@@ -27,6 +29,8 @@ class TransitionContext:
     prev_positions: List[Vector]
     next_positions: List[Vector]
     pair_ids: List[int]
+    # (pose_times, poses) solved ahead by prefetch_transition_poses.
+    poses: Optional[Tuple[np.ndarray, np.ndarray]] = None
 
 
 def _ensure_collection(scene: bpy.types.Scene, name: str) -> bpy.types.Collection:
@@ -150,6 +154,69 @@ def _resolve_node_collection(node: bpy.types.Node) -> Optional[bpy.types.Collect
     return fn_parse._as_collection(col)
 
 
+def _int_point_attr(eval_mesh, obj: bpy.types.Object, name: str, count: int):
+    for mesh in (eval_mesh, obj.data):
+        attr = mesh.attributes.get(name)
+        if (
+            attr is not None
+            and attr.data_type == 'INT'
+            and attr.domain == 'POINT'
+            and len(attr.data) == count
+        ):
+            return attr
+    return None
+
+
+def _read_collection_arrays(
+    col: bpy.types.Collection,
+    depsgraph: bpy.types.Depsgraph,
+    *,
+    collect_form_ids: bool = False,
+) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """World positions and pair/formation ids of every mesh in ``col`` as flat arrays."""
+    meshes = []
+    for obj in _collect_mesh_objects(col):
+        eval_obj = obj.evaluated_get(depsgraph)
+        eval_mesh = eval_obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+        meshes.append((obj, eval_obj, eval_mesh))
+    try:
+        counts = np.array([len(eval_mesh.vertices) for _obj, _eval, eval_mesh in meshes], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        total = int(offsets[-1])
+        local = np.empty((total, 3), dtype=np.float32)
+        flat = local.reshape(-1)
+        pair_ids = np.empty((total,), dtype=np.int32)
+        form_ids = np.empty((total,), dtype=np.int32) if collect_form_ids else None
+        matrices = np.empty((len(meshes), 4, 4), dtype=np.float32)
+        for idx, (obj, eval_obj, eval_mesh) in enumerate(meshes):
+            matrices[idx] = np.asarray(eval_obj.matrix_world, dtype=np.float32)
+            start = int(offsets[idx])
+            end = int(offsets[idx + 1])
+            if end == start:
+                continue
+            eval_mesh.vertices.foreach_get("co", flat[start * 3:end * 3])
+            if pair_ids is not None:
+                attr = _int_point_attr(eval_mesh, obj, fn_parse_pairing.PAIR_ATTR_NAME, end - start)
+                if attr is None:
+                    pair_ids = None
+                else:
+                    attr.data.foreach_get("value", pair_ids[start:end])
+            if form_ids is not None:
+                attr = _int_point_attr(eval_mesh, obj, fn_parse_pairing.FORMATION_ATTR_NAME, end - start)
+                if attr is None:
+                    form_ids = None
+                else:
+                    attr.data.foreach_get("value", form_ids[start:end])
+    finally:
+        for _obj, eval_obj, _eval_mesh in meshes:
+            eval_obj.to_mesh_clear()
+
+    owner = np.repeat(np.arange(len(meshes)), counts)
+    positions = np.einsum("nij,nj->ni", matrices[owner, :3, :3], local)
+    positions += matrices[owner, :3, 3]
+    return positions, pair_ids, form_ids
+
+
 def _collect_positions_for_collection(
     col: bpy.types.Collection,
     frame: int,
@@ -158,118 +225,93 @@ def _collect_positions_for_collection(
     collect_form_ids: bool = False,
     as_numpy: bool = False,
 ) -> Tuple[List[Vector], Optional[List[int]], Optional[List[int]]]:
-    positions: List[Vector] = []
-    positions_np: list[np.ndarray] = []
-    pair_ids: List[int] | None = []
-    form_ids: List[int] | None = [] if collect_form_ids else None
-    pairs_ok = True
-    forms_ok = True
-    meshes = _collect_mesh_objects(col)
-    for obj in meshes:
-        eval_obj = obj.evaluated_get(depsgraph)
-        eval_mesh = eval_obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
-        if as_numpy:
-            count = len(eval_mesh.vertices)
-            if count:
-                coords = np.empty(count * 3, dtype=np.float32)
-                eval_mesh.vertices.foreach_get("co", coords)
-                coords = coords.reshape((count, 3))
-                mw = np.asarray(eval_obj.matrix_world, dtype=np.float32)
-                world = coords @ mw[:3, :3].T + mw[:3, 3]
-                positions_np.append(world)
-        else:
-            for vtx in eval_mesh.vertices:
-                positions.append(eval_obj.matrix_world @ vtx.co)
-        if pairs_ok and pair_ids is not None:
-            attr = eval_mesh.attributes.get(fn_parse_pairing.PAIR_ATTR_NAME)
-            if (
-                attr is None
-                or attr.data_type != 'INT'
-                or attr.domain != 'POINT'
-                or len(attr.data) != len(eval_mesh.vertices)
-            ):
-                attr = obj.data.attributes.get(fn_parse_pairing.PAIR_ATTR_NAME)
-            if (
-                attr is None
-                or attr.data_type != 'INT'
-                or attr.domain != 'POINT'
-                or len(attr.data) != len(eval_mesh.vertices)
-            ):
-                pairs_ok = False
-            else:
-                values = [0] * len(eval_mesh.vertices)
-                attr.data.foreach_get("value", values)
-                pair_ids.extend(values)
-        if collect_form_ids and forms_ok and form_ids is not None:
-            attr = eval_mesh.attributes.get(fn_parse_pairing.FORMATION_ATTR_NAME)
-            if (
-                attr is None
-                or attr.data_type != 'INT'
-                or attr.domain != 'POINT'
-                or len(attr.data) != len(eval_mesh.vertices)
-            ):
-                attr = obj.data.attributes.get(fn_parse_pairing.FORMATION_ATTR_NAME)
-            if (
-                attr is None
-                or attr.data_type != 'INT'
-                or attr.domain != 'POINT'
-                or len(attr.data) != len(eval_mesh.vertices)
-            ):
-                forms_ok = False
-            else:
-                values = [0] * len(eval_mesh.vertices)
-                attr.data.foreach_get("value", values)
-                form_ids.extend(values)
-        eval_obj.to_mesh_clear()
-    if as_numpy:
-        positions = np.concatenate(positions_np, axis=0) if positions_np else np.empty((0, 3), dtype=np.float32)
-    if not pairs_ok:
-        pair_ids = None
-    if collect_form_ids and not forms_ok:
-        form_ids = None
+    positions, pair_ids, form_ids = _read_collection_arrays(
+        col,
+        depsgraph,
+        collect_form_ids=collect_form_ids,
+    )
+    if not as_numpy:
+        positions = [Vector(co) for co in positions.tolist()]
+    if pair_ids is not None:
+        pair_ids = pair_ids.tolist()
+    if form_ids is not None:
+        form_ids = form_ids.tolist()
     return positions, pair_ids, form_ids
 
 
-def _collect_positions_for_nodes(
+def _is_static_collection(col: bpy.types.Collection) -> bool:
+    return all(time_static.is_time_static(obj) for obj in _collect_mesh_objects(col))
+
+
+def _sample_collections(
+    requests: Iterable[Tuple[bpy.types.Collection, int]],
+    scene: bpy.types.Scene,
+    depsgraph: bpy.types.Depsgraph,
+    *,
+    skip_static: bool = True,
+) -> Dict[Tuple[str, int], Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]]:
+    """Read every requested (collection, frame) once, visiting distinct frames in order.
+
+    With ``skip_static`` a collection whose geometry cannot change over time is read
+    once at the current frame and shared by all of its requested frames.
+    """
+    by_frame: Dict[int, Dict[str, bpy.types.Collection]] = {}
+    for col, frame in requests:
+        by_frame.setdefault(int(frame), {})[col.name] = col
+    static: Dict[str, bool] = {}
+    static_reads: Dict[str, Tuple] = {}
+    samples: Dict[Tuple[str, int], Tuple] = {}
+    for frame in sorted(by_frame):
+        pending = []
+        for name, col in by_frame[frame].items():
+            if skip_static and name not in static:
+                static[name] = _is_static_collection(col)
+            if skip_static and static[name]:
+                if name not in static_reads:
+                    static_reads[name] = _read_collection_arrays(col, depsgraph, collect_form_ids=True)
+                samples[(name, frame)] = static_reads[name]
+            else:
+                pending.append((name, col))
+        if not pending:
+            continue
+        if int(scene.frame_current) != frame:
+            scene.frame_set(frame)
+        for name, col in pending:
+            samples[(name, frame)] = _read_collection_arrays(col, depsgraph, collect_form_ids=True)
+    return samples
+
+
+def _node_requests(
     nodes: Sequence[bpy.types.Node],
     entry_map: Dict[str, fn_parse.ScheduleEntry],
     frame_selector,
-    scene: bpy.types.Scene,
-    depsgraph: bpy.types.Depsgraph,
-) -> Tuple[List[Vector], Optional[List[int]], Optional[List[int]]]:
-    positions: List[Vector] = []
-    pair_ids: List[int] | None = []
-    pairs_ok = True
-    form_ids: List[int] | None = []
-    forms_ok = True
+) -> List[Tuple[bpy.types.Collection, int]]:
+    requests = []
     for node in nodes:
         entry = entry_map.get(node.name)
-        if not entry or not entry.collection:
-            continue
-        frame = frame_selector(entry)
-        scene.frame_set(frame)
-        pos, pairs, forms = _collect_positions_for_collection(
-            entry.collection,
-            frame,
-            depsgraph,
-            collect_form_ids=True,
-        )
-        positions.extend(pos)
-        if pairs_ok:
-            if pairs is None:
-                pairs_ok = False
-            elif pair_ids is not None:
-                pair_ids.extend(pairs)
-        if forms_ok:
-            if forms is None:
-                forms_ok = False
-            elif form_ids is not None:
-                form_ids.extend(forms)
-    if not pairs_ok:
-        pair_ids = None
-    if not forms_ok:
-        form_ids = None
-    return positions, pair_ids, form_ids
+        if entry and entry.collection:
+            requests.append((entry.collection, int(frame_selector(entry))))
+    return requests
+
+
+def _collect_positions_for_nodes(
+    nodes: Sequence[bpy.types.Node],
+    entry_map: Dict[str, fn_parse.ScheduleEntry],
+    frame_selector,
+    samples: Dict[Tuple[str, int], Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]],
+) -> Tuple[List[Vector], Optional[List[int]], Optional[List[int]]]:
+    reads = [
+        samples[(col.name, frame)]
+        for col, frame in _node_requests(nodes, entry_map, frame_selector)
+    ]
+    if not reads:
+        return [], [], []
+    positions = np.concatenate([pos for pos, _pairs, _forms in reads], axis=0)
+    pairs = [pairs for _pos, pairs, _forms in reads]
+    forms = [forms for _pos, _pairs, forms in reads]
+    pair_ids = None if any(p is None for p in pairs) else np.concatenate(pairs).tolist()
+    form_ids = None if any(f is None for f in forms) else np.concatenate(forms).tolist()
+    return [Vector(co) for co in positions.tolist()], pair_ids, form_ids
 
 
 def _update_transition_move_stats(
@@ -321,12 +363,13 @@ def _node_tree_from_context(context, node_name: str) -> Tuple[Optional[bpy.types
     return tree, node
 
 
-def _build_transition_context(node: bpy.types.Node, context) -> TransitionContext:
+def _build_transition_context(node: bpy.types.Node, context, schedule=None) -> TransitionContext:
     tree = node.id_data
     scene = context.scene if context else bpy.context.scene
     depsgraph = context.evaluated_depsgraph_get() if context else bpy.context.evaluated_depsgraph_get()
 
-    schedule = fn_parse.compute_schedule(context, assign_pairs=False)
+    if schedule is None:
+        schedule = fn_parse.compute_schedule(context, assign_pairs=False)
     if getattr(node, "error_message", ""):
         raise RuntimeError(node.error_message)
     entry_map = {entry.node_name: entry for entry in schedule if entry.tree_name == tree.name}
@@ -345,22 +388,30 @@ def _build_transition_context(node: bpy.types.Node, context) -> TransitionContex
             return max(entry.start, entry.end - 1)
         return entry.start
 
+    def _next_frame(entry: fn_parse.ScheduleEntry) -> int:
+        return entry.start
+
+    # Both sides are sampled in one pass so each distinct frame is evaluated once.
+    samples = _sample_collections(
+        _node_requests(prev_nodes, entry_map, _prev_frame) + _node_requests(next_nodes, entry_map, _next_frame),
+        scene,
+        depsgraph,
+    )
     prev_positions, _prev_pair_ids, prev_form_ids = _collect_positions_for_nodes(
         prev_nodes,
         entry_map,
         _prev_frame,
-        scene,
-        depsgraph,
+        samples,
     )
     next_positions, next_pair_ids, _next_form_ids = _collect_positions_for_nodes(
         next_nodes,
         entry_map,
-        lambda entry: entry.start,
-        scene,
-        depsgraph,
+        _next_frame,
+        samples,
     )
 
-    scene.frame_set(original_frame)
+    if int(scene.frame_current) != int(original_frame):
+        scene.frame_set(original_frame)
 
     if len(prev_positions) != len(next_positions):
         raise RuntimeError("Start/End vertex counts do not match")
@@ -497,6 +548,7 @@ def _apply_auto(ctx: TransitionContext) -> str:
         ctx.end_frame,
         ctx.fps,
         scene=ctx.scene,
+        poses=ctx.poses,
     )
 
     image_prefix = _transition_base_name(ctx.node)
@@ -627,6 +679,7 @@ def _apply_construction(ctx: TransitionContext, *, start_per_frame: int) -> str:
         ctx.end_frame,
         ctx.fps,
         scene=ctx.scene,
+        poses=ctx.poses,
     )
     _stagger_tracks_by_distance(
         tracks,
@@ -751,13 +804,62 @@ def _apply_copyloc(ctx: TransitionContext, *, mode: str, split_count: int, grid_
     return f"CopyLoc transition created: steps={steps}"
 
 
+def build_transition_contexts(nodes: Sequence[bpy.types.Node], context=None) -> Dict[str, TransitionContext]:
+    """Build the context of every transition in ``nodes`` from one schedule pass.
+
+    Nodes whose context cannot be built are left out; apply_transition reports
+    their error when it builds them itself.
+    """
+    schedule = fn_parse.compute_schedule(context, assign_pairs=False)
+    contexts: Dict[str, TransitionContext] = {}
+    for node in nodes:
+        try:
+            contexts[node.name] = _build_transition_context(node, context, schedule)
+        except Exception:
+            continue
+    return contexts
+
+
+def prefetch_transition_poses(contexts: Iterable[TransitionContext]) -> int:
+    """Solve the adaptive poses of every Auto/Construction context in parallel."""
+    pending = [
+        ctx for ctx in contexts
+        if getattr(ctx.node, "mode", "AUTO") in {"AUTO", "CONSTRUCTION"}
+        and ctx.end_frame > ctx.start_frame
+        and ctx.fps > 0.0
+    ]
+    # On one core solving ahead only holds every result in memory for no gain.
+    if len(pending) < 2 or (os.cpu_count() or 1) < 2:
+        return 0
+    jobs = [
+        bakedt.adaptive_pose_job(
+            ctx.prev_positions,
+            ctx.next_positions,
+            ctx.start_frame,
+            ctx.end_frame,
+            ctx.fps,
+            scene=ctx.scene,
+        )
+        for ctx in pending
+    ]
+    for ctx, poses in zip(pending, bakedt.prefetch_adaptive_poses(jobs)):
+        ctx.poses = poses
+    return len(pending)
+
+
 def apply_transition_by_node_name(node_name: str, context=None) -> Tuple[bool, str]:
     tree, node = _node_tree_from_context(context, node_name)
     if node is None:
         return False, "Node not found"
     return apply_transition(node, context)
-def apply_transition(node: bpy.types.Node, context=None, *, assign_pairs_after: bool = True) -> Tuple[bool, str]:
-    ctx = _build_transition_context(node, context)
+def apply_transition(
+    node: bpy.types.Node,
+    context=None,
+    *,
+    assign_pairs_after: bool = True,
+    transition_ctx: Optional[TransitionContext] = None,
+) -> Tuple[bool, str]:
+    ctx = transition_ctx if transition_ctx is not None else _build_transition_context(node, context)
     _purge_transition_collections(node)
     if hasattr(node, "collection"):
         node.collection = None
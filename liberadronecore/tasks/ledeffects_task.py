@@ -5,11 +5,15 @@ TODO LedEffectsをドローンへ反映するタスク
 フォーメーションを跨げない　正しく跨ぐには、、、
 """
 
+import time
+from typing import Dict, Optional
+
 import bpy
 from bpy.app.handlers import persistent
 
 from liberadronecore.ledeffects import led_codegen_runtime as le_codegen
 from liberadronecore.ledeffects.nodes.util import le_meshinfo
+from liberadronecore.ledeffects.util import mesh_bvh, namedattribute, result_cache, temporal
 from liberadronecore.util import formation_positions
 from liberadronecore.util import led_eval
 import numpy as np
@@ -18,6 +22,14 @@ import numpy as np
 _UNDO_DEPTH = 0
 _SUSPEND_LED_EFFECTS = 0
 _LED_UPDATE_PENDING = False
+_COLOR_WRITE_STATE: Dict[str, object] = {"buffers": None, "target": None}
+_COLOR_WRITE_STATS: Dict[str, int] = {"written": 0, "skipped": 0}
+# Nodes that carry state from one frame to the next and expect frames in order.
+_STATEFUL_NODES = frozenset(
+    {"LDLEDTrailNode", "LDLEDChainNode", "LDLEDEchoSamplerNode", "LDLEDBlurNode"}
+)
+_LAST_EVALUATED: Dict[str, object] = {"tree": None, "frame": None}
+_PRIME_STATE: Dict[str, object] = {"scene": None}
 
 
 def use_task_update_pref() -> bool:
@@ -39,6 +51,10 @@ def _on_undo_pre(*_args, **_kwargs) -> None:
 
 def _on_undo_post(*_args, **_kwargs) -> None:
     _set_undo_block(False)
+    reset_color_write_state()
+    result_cache.invalidate()
+    namedattribute.clear_named_attr_cache()
+    formation_positions.clear_snapshots()
 
 
 def _on_redo_pre(*_args, **_kwargs) -> None:
@@ -47,6 +63,26 @@ def _on_redo_pre(*_args, **_kwargs) -> None:
 
 def _on_redo_post(*_args, **_kwargs) -> None:
     _set_undo_block(False)
+    reset_color_write_state()
+    result_cache.invalidate()
+    namedattribute.clear_named_attr_cache()
+    formation_positions.clear_snapshots()
+
+
+@persistent
+def _on_load_post(*_args, **_kwargs) -> None:
+    # Cached colors are keyed by names that the newly loaded file may reuse.
+    reset_color_write_state()
+    result_cache.invalidate()
+    namedattribute.clear_named_attr_cache()
+    formation_positions.clear_snapshots()
+    mesh_bvh.clear_bvh_cache()
+    _LAST_EVALUATED["tree"] = None
+    _LAST_EVALUATED["frame"] = None
+    _PREFETCH_STATE["scene"] = None
+    _PREFETCH_STATE["frame"] = None
+    _PREFETCH_STATE["queue"] = None
+    _PRIME_STATE["scene"] = None
 
 
 def _is_undo_running() -> bool:
@@ -100,7 +136,34 @@ def _is_any_viewport_wireframe() -> bool:
     return False
 
 
-def _write_led_color_attribute(colors) -> None:
+def _new_color_buffers(count: int) -> Dict[str, np.ndarray]:
+    return {
+        "colors": np.zeros((count, 4), dtype=np.float32),
+        "scratch": np.zeros((count, 4), dtype=np.float32),
+        "quant": np.zeros((count, 4), dtype=np.uint16),
+    }
+
+
+def _color_write_buffers(count: int) -> Dict[str, np.ndarray]:
+    state = _COLOR_WRITE_STATE
+    buffers = state.get("buffers")
+    if buffers is None or buffers["colors"].shape[0] != count:
+        buffers = _new_color_buffers(count)
+        buffers["last_quant"] = np.zeros((count, 4), dtype=np.uint16)
+        state["buffers"] = buffers
+        state["target"] = None
+    return buffers
+
+
+def get_color_write_stats() -> Dict[str, int]:
+    return dict(_COLOR_WRITE_STATS)
+
+
+def reset_color_write_state() -> None:
+    _COLOR_WRITE_STATE["target"] = None
+
+
+def _color_attribute():
     mesh = bpy.data.objects["ColorVerts"].data
     attr = mesh.color_attributes.get("color")
     if attr is None or attr.domain != 'POINT' or attr.data_type != 'BYTE_COLOR':
@@ -109,27 +172,70 @@ def _write_led_color_attribute(colors) -> None:
         attr = mesh.color_attributes.new(
             name="color", domain='POINT', type='BYTE_COLOR'
         )
+    return mesh, attr
 
-    expected = len(attr.data)
 
+def _commit_color_write(mesh, attr, buffers: Dict[str, np.ndarray]) -> bool:
+    quant = buffers["quant"]
+    target = (mesh.as_pointer(), attr.as_pointer(), quant.shape[0])
+    state = _COLOR_WRITE_STATE
+    if state.get("target") == target and np.array_equal(quant, buffers["last_quant"]):
+        _COLOR_WRITE_STATS["skipped"] += 1
+        return False
+
+    attr.data.foreach_set("color", buffers["colors"].reshape(-1))
+    buffers["last_quant"][...] = quant
+    state["target"] = target
+    _COLOR_WRITE_STATS["written"] += 1
+    return True
+
+
+def _quantize_led_colors(colors, buffers: Dict[str, np.ndarray]) -> None:
+    expected = buffers["colors"].shape[0]
     arr = np.asarray(colors, dtype=np.float32)
     if arr.ndim == 1:
         arr = arr.reshape((-1, 4))
     elif arr.ndim >= 2:
         arr = arr.reshape((-1, arr.shape[-1]))
-    if arr.shape[1] < 4:
-        pad = np.zeros((arr.shape[0], 4 - arr.shape[1]), dtype=arr.dtype)
-        arr = np.concatenate([arr, pad], axis=1)
-    elif arr.shape[1] > 4:
-        arr = arr[:, :4]
+    rows = min(arr.shape[0], expected)
+    cols = min(arr.shape[1], 4)
+
+    out = buffers["colors"]
+    out.fill(0.0)
+    np.clip(arr[:rows, :cols], 0.0, 1.0, out=out[:rows, :cols])
+
+    # 16-bit quantization is finer than the sRGB bytes stored in the attribute.
+    scratch = buffers["scratch"]
+    np.multiply(out, 65535.0, out=scratch)
+    np.rint(scratch, out=scratch)
+    buffers["quant"][...] = scratch
 
-    arr = arr[:expected]
-    if arr.shape[0] < expected:
-        pad = np.zeros((expected - arr.shape[0], 4), dtype=arr.dtype)
-        arr = np.concatenate([arr, pad], axis=0)
 
-    arr = np.clip(arr, 0.0, 1.0)
-    attr.data.foreach_set("color", arr.reshape(-1).tolist())
+def _write_led_color_attribute(colors) -> bool:
+    mesh, attr = _color_attribute()
+    buffers = _color_write_buffers(len(attr.data))
+    _quantize_led_colors(colors, buffers)
+    return _commit_color_write(mesh, attr, buffers)
+
+
+def _write_led_quantized_colors(quant: np.ndarray) -> Optional[bool]:
+    """Write colors previously quantized by ``_write_led_color_attribute``.
+
+    Returns None when the stored colors no longer match the ColorVerts mesh.
+    """
+    mesh, attr = _color_attribute()
+    expected = len(attr.data)
+    if quant.shape != (expected, 4):
+        return None
+    buffers = _color_write_buffers(expected)
+    buffers["quant"][...] = quant
+    np.multiply(quant, 1.0 / 65535.0, out=buffers["colors"])
+    return _commit_color_write(mesh, attr, buffers)
+
+
+def _last_quantized_colors() -> Optional[np.ndarray]:
+    buffers = _COLOR_WRITE_STATE.get("buffers")
+    return buffers["quant"] if buffers is not None else None
 
 
 def _collect_formation_positions(scene):
@@ -153,6 +259,98 @@ def _collect_formation_positions(scene):
     return positions, pair_ids, formation_ids
 
 
+def _is_stateful_tree(tree) -> bool:
+    return any(getattr(node, "bl_idname", "") in _STATEFUL_NODES for node in tree.nodes)
+
+
+def _follows_last_evaluated(tree, frame: int) -> bool:
+    last = _LAST_EVALUATED
+    return last.get("tree") == tree.name and last.get("frame") == int(frame) - 1
+
+
+def _evaluate_frame_colors(scene, effect_fn, frame):
+    positions, pair_ids, formation_ids = _collect_formation_positions(scene)
+    if positions is None or len(positions) == 0:
+        return None
+    positions_cache, inv_map = led_eval.order_positions_cache_by_pair_ids(positions, pair_ids)
+    le_meshinfo.begin_led_frame_cache(
+        frame,
+        positions_cache,
+        formation_ids=formation_ids,
+        pair_ids=pair_ids,
+    )
+    colors = led_eval.eval_effect_colors_by_map(
+        positions,
+        pair_ids,
+        inv_map,
+        effect_fn,
+        frame,
+    )
+    le_meshinfo.end_led_frame_cache()
+    return colors
+
+
+def _evaluate_led_frame(scene, tree, effect_fn, frame):
+    colors = _evaluate_frame_colors(scene, effect_fn, frame)
+    if colors is not None:
+        temporal.mark_evaluated(tree.name, frame)
+    return colors
+
+
+def _history_to_prime(tree, frame) -> list[int]:
+    # Stepping the scene would stall playback and cannot be done during a render;
+    # a skipped frame then leaves Echo/Blur without their previous input once.
+    if _is_animation_playing() or bpy.app.is_job_running('RENDER'):
+        return []
+    return temporal.prime_frames(tree, frame)
+
+
+def _schedule_history_prime(scene: bpy.types.Scene) -> None:
+    _PRIME_STATE["scene"] = scene.name
+    if not bpy.app.timers.is_registered(_prime_history_tick):
+        bpy.app.timers.register(_prime_history_tick, first_interval=0.0)
+
+
+def _prime_history_tick():
+    """Replay the frames Echo/Blur need after a jump, then redraw the current frame.
+
+    Runs from a timer because frame_change_post must not move the scene itself.
+    Each frame is replayed at its own scene state, from the nearest frame whose
+    history is held in the ring or a checkpoint, so a seek always ends with the
+    same colors as playing up to it.
+    """
+    if _is_undo_running():
+        return 0.1
+    scene = bpy.data.scenes.get(str(_PRIME_STATE.get("scene") or ""))
+    _PRIME_STATE["scene"] = None
+    if scene is None or _is_led_suspended():
+        return None
+    tree = le_codegen.get_active_tree(scene)
+    effect_fn = le_codegen.get_compiled_effect(tree) if tree is not None else None
+    if effect_fn is None:
+        return None
+    frame = scene.frame_current
+    frames = _history_to_prime(tree, frame)
+    if not frames:
+        return None
+
+    suspend_led_effects(True)
+    result_cache.pause_tracking(True)
+    try:
+        for prime_frame in frames:
+            scene.frame_set(prime_frame)
+            _evaluate_led_frame(scene, tree, effect_fn, prime_frame)
+    finally:
+        scene.frame_set(frame)
+        view_layer = bpy.context.view_layer
+        if view_layer is not None:
+            view_layer.update()
+        result_cache.pause_tracking(False)
+        suspend_led_effects(False)
+    update_led_effects(scene)
+    return None
+
+
 @persistent
 def update_led_effects(scene):
     if _is_undo_running():
@@ -177,27 +375,207 @@ def update_led_effects(scene):
 
     frame = scene.frame_current
 
-    positions, pair_ids, formation_ids = _collect_formation_positions(scene)
-    if positions is None or len(positions) == 0:
+    revision = result_cache.revision_key(scene, tree)
+    cached = result_cache.lookup(frame, revision)
+    if cached is not None and _write_led_quantized_colors(cached) is not None:
+        _note_playhead(scene, frame)
         return
-    positions_cache, inv_map = led_eval.order_positions_cache_by_pair_ids(positions, pair_ids)
 
-    le_meshinfo.begin_led_frame_cache(
-        frame,
-        positions_cache,
-        formation_ids=formation_ids,
-        pair_ids=pair_ids,
-    )
-    colors = led_eval.eval_effect_colors_by_map(
-        positions,
-        pair_ids,
-        inv_map,
-        effect_fn,
-        frame,
-    )
-    le_meshinfo.end_led_frame_cache()
+    # Stateful nodes only give the right colors when frames arrive in order;
+    # anything else is shown but not replayed from the cache.
+    missing = _history_to_prime(tree, frame)
+    cacheable = not missing and (not _is_stateful_tree(tree) or _follows_last_evaluated(tree, frame))
+    if missing:
+        # Shown with the history still held; the skipped frames are replayed from a timer.
+        colors = _evaluate_frame_colors(scene, effect_fn, frame)
+        if colors is not None:
+            _schedule_history_prime(scene)
+    else:
+        colors = _evaluate_led_frame(scene, tree, effect_fn, frame)
+    if colors is None:
+        return
+    _LAST_EVALUATED["tree"] = tree.name
+    _LAST_EVALUATED["frame"] = int(frame)
 
     _write_led_color_attribute(colors)
+    quant = _last_quantized_colors()
+    if quant is not None and cacheable:
+        result_cache.store(frame, revision, quant)
+    _note_playhead(scene, frame)
+
+
+# Background pre-evaluation: fill the prefetch pool around the playhead while the UI is idle.
+_PREFETCH_AHEAD = 240
+_PREFETCH_BEHIND = 48
+_PREFETCH_SLICE = 0.02
+_PREFETCH_IDLE = 0.5
+_PREFETCH_STATE: Dict[str, object] = {
+    "scene": None,
+    "frame": None,
+    "direction": 1,
+    "queue": None,
+    "revision": None,
+    "done": 0,
+    "total": 0,
+    "last_edit": 0.0,
+}
+
+
+def use_prefetch_pref() -> bool:
+    try:
+        prefs = bpy.context.preferences.addons["liberadronecore"].preferences
+        return bool(prefs.led_prefetch)
+    except Exception:
+        return False
+
+
+def prefetch_progress() -> tuple[int, int]:
+    return int(_PREFETCH_STATE["done"]), int(_PREFETCH_STATE["total"])
+
+
+def _note_playhead(scene: bpy.types.Scene, frame: int) -> None:
+    state = _PREFETCH_STATE
+    last = state.get("frame")
+    if last is not None and state.get("scene") == scene.name and frame != last:
+        state["direction"] = 1 if frame > last else -1
+    state["scene"] = scene.name
+    state["frame"] = int(frame)
+    state["queue"] = None
+    if use_prefetch_pref() and not bpy.app.timers.is_registered(_prefetch_tick):
+        bpy.app.timers.register(_prefetch_tick, first_interval=_PREFETCH_IDLE)
+
+
+@persistent
+def _on_depsgraph_edit(_scene, _depsgraph) -> None:
+    if result_cache.is_tracking_paused():
+        return
+    # Any edit stops the current pass; it restarts once the UI has been idle again.
+    _PREFETCH_STATE["last_edit"] = time.monotonic()
+    _PREFETCH_STATE["queue"] = None
+
+
+def _prefetch_frames(scene: bpy.types.Scene, frame: int, direction: int) -> list[int]:
+    start = int(scene.frame_start)
+    end = int(scene.frame_end)
+    ahead = [frame + direction * step for step in range(1, _PREFETCH_AHEAD + 1)]
+    behind = [frame - direction * step for step in range(1, _PREFETCH_BEHIND + 1)]
+    frames: list[int] = []
+    # Mostly the play direction, with a trickle behind the playhead for scrubbing back.
+    while ahead or behind:
+        frames.extend(ahead[:4])
+        del ahead[:4]
+        frames.extend(behind[:1])
+        del behind[:1]
+    return [f for f in frames if start <= f <= end]
+
+
+def _is_animation_playing() -> bool:
+    wm = bpy.context.window_manager
+    for window in wm.windows:
+        if getattr(window.screen, "is_animation_playing", False):
+            return True
+    return False
+
+
+def _tag_timeline_redraw() -> None:
+    wm = bpy.context.window_manager
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'DOPESHEET_EDITOR':
+                area.tag_redraw()
+
+
+def _stop_prefetch():
+    _PREFETCH_STATE["queue"] = None
+    _PREFETCH_STATE["done"] = 0
+    _PREFETCH_STATE["total"] = 0
+    _tag_timeline_redraw()
+    return None
+
+
+def _prefetch_tick():
+    state = _PREFETCH_STATE
+    if not use_prefetch_pref():
+        return _stop_prefetch()
+    if _is_undo_running() or _is_led_suspended() or _is_animation_playing():
+        return _PREFETCH_IDLE
+    idle_for = time.monotonic() - float(state["last_edit"])
+    if idle_for < _PREFETCH_IDLE:
+        return _PREFETCH_IDLE - idle_for
+
+    scene = bpy.data.scenes.get(str(state.get("scene") or ""))
+    if scene is None or state.get("frame") is None or not getattr(scene, "update_led_effects", True):
+        return _stop_prefetch()
+    tree = le_codegen.get_active_tree(scene)
+    effect_fn = le_codegen.get_compiled_effect(tree) if tree is not None else None
+    if effect_fn is None or _is_stateful_tree(tree):
+        # Evaluating out of order would advance Trail/Chain/Echo/Blur state.
+        return _stop_prefetch()
+
+    revision = result_cache.revision_key(scene, tree)
+    if state.get("queue") is None or state.get("revision") != revision:
+        frames = _prefetch_frames(scene, int(state["frame"]), int(state["direction"]))
+        queue = [f for f in frames if not result_cache.contains(f, revision)]
+        state["queue"] = queue
+        state["revision"] = revision
+        state["total"] = len(frames)
+        state["done"] = len(frames) - len(queue)
+    queue = state["queue"]
+    if not queue:
+        _tag_timeline_redraw()
+        return None
+
+    original_frame = scene.frame_current
+    buffers = None
+    evaluated = False
+    slowest = 0.0
+    deadline = time.monotonic() + _PREFETCH_SLICE
+    suspend_led_effects(True)
+    result_cache.pause_tracking(True)
+    try:
+        _mesh, attr = _color_attribute()
+        buffers = _new_color_buffers(len(attr.data))
+        while queue and time.monotonic() < deadline:
+            frame = queue.pop(0)
+            state["done"] = int(state["done"]) + 1
+            if result_cache.contains(frame, revision):
+                continue
+            started = time.monotonic()
+            evaluated = True
+            scene.frame_set(frame)
+            colors = _evaluate_led_frame(scene, tree, effect_fn, frame)
+            if colors is not None:
+                _quantize_led_colors(colors, buffers)
+                result_cache.store(frame, revision, buffers["quant"], pool="prefetch")
+            slowest = max(slowest, time.monotonic() - started)
+            if slowest > _PREFETCH_SLICE:
+                break
+    finally:
+        if evaluated:
+            if scene.frame_current != original_frame:
+                scene.frame_set(original_frame)
+            # Flush updates from our own frame changes while they are still ignored.
+            view_layer = bpy.context.view_layer
+            if view_layer is not None:
+                view_layer.update()
+        result_cache.pause_tracking(False)
+        suspend_led_effects(False)
+    _tag_timeline_redraw()
+    if not queue:
+        return None
+    # A single frame overran the slice: give the UI at least as long before the next one.
+    return slowest if slowest > _PREFETCH_SLICE else 0.0
+
+
+def _draw_prefetch_progress(self, context) -> None:
+    done, total = prefetch_progress()
+    if total <= 0 or done >= total or not use_prefetch_pref():
+        return
+    factor = done / float(total)
+    if hasattr(self.layout, "progress"):
+        self.layout.progress(factor=factor, type='BAR', text=f"LED {done}/{total}")
+    else:
+        self.layout.label(text=f"LED {int(factor * 100.0)}%")
 
 
 def register():
@@ -211,6 +589,19 @@ def register():
         bpy.app.handlers.redo_pre.append(_on_redo_pre)
     if _on_redo_post not in bpy.app.handlers.redo_post:
         bpy.app.handlers.redo_post.append(_on_redo_post)
+    if _on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_on_load_post)
+    if result_cache.on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(result_cache.on_depsgraph_update)
+    if _on_depsgraph_edit not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_edit)
+    if namedattribute.on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(namedattribute.on_depsgraph_update)
+    if formation_positions.on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(formation_positions.on_depsgraph_update)
+    if mesh_bvh.on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(mesh_bvh.on_depsgraph_update)
+    bpy.types.TIME_MT_editor_menus.append(_draw_prefetch_progress)
 
 
 def unregister():
@@ -224,3 +615,24 @@ def unregister():
         bpy.app.handlers.redo_pre.remove(_on_redo_pre)
     if _on_redo_post in bpy.app.handlers.redo_post:
         bpy.app.handlers.redo_post.remove(_on_redo_post)
+    if _on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load_post)
+    if result_cache.on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(result_cache.on_depsgraph_update)
+    if _on_depsgraph_edit in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_edit)
+    if namedattribute.on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(namedattribute.on_depsgraph_update)
+    if formation_positions.on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(formation_positions.on_depsgraph_update)
+    if mesh_bvh.on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(mesh_bvh.on_depsgraph_update)
+    namedattribute.clear_named_attr_cache()
+    formation_positions.clear_snapshots()
+    mesh_bvh.clear_bvh_cache()
+    if bpy.app.timers.is_registered(_prefetch_tick):
+        bpy.app.timers.unregister(_prefetch_tick)
+    if bpy.app.timers.is_registered(_prime_history_tick):
+        bpy.app.timers.unregister(_prime_history_tick)
+    bpy.types.TIME_MT_editor_menus.remove(_draw_prefetch_progress)
+    result_cache.invalidate()
@@ -26,6 +26,40 @@ class LD_Preferences(bpy.types.AddonPreferences):
         default=True,
         description="Update LED effects via scheduled tasks instead of immediate updates",
     )
+    led_cache_limit_mb: bpy.props.IntProperty(
+        name="LED Cache Limit (MB)",
+        default=512,
+        min=0,
+        description="Memory used to keep evaluated LED colors per frame for replay (0 disables)",
+    )
+    led_prefetch: bpy.props.BoolProperty(
+        name="LED Prefetch",
+        default=False,
+        description="Evaluate LED colors ahead of the playhead while the UI is idle (skipped for trees with Trail, Chain, Echo or Blur)",
+    )
+    led_prefetch_limit_mb: bpy.props.IntProperty(
+        name="LED Prefetch Limit (MB)",
+        default=256,
+        min=0,
+        description="Memory used to keep LED colors evaluated ahead of the playhead",
+    )
+    pairing_solver: bpy.props.EnumProperty(
+        name="Pairing Solver",
+        items=[
+            ("AUTO", "Auto", "Exact solver for small formations, auction solver for large ones"),
+            ("EXACT", "Exact", "Always use the exact Hungarian solver"),
+            ("AUCTION", "Auction", "Always use the auction solver"),
+        ],
+        default="AUTO",
+        description="Assignment solver used when pairing formations",
+    )
+    pairing_gap: bpy.props.FloatProperty(
+        name="Pairing Gap (%)",
+        default=1.0,
+        min=0.0,
+        max=50.0,
+        description="Total distance the auction solver may exceed the optimum by",
+    )
 
     def draw(self, context):
         layout = self.layout
@@ -73,6 +107,13 @@ class LD_Preferences(bpy.types.AddonPreferences):
         layout.separator()
         layout.label(text="LED Effects")
         layout.prop(self, "led_task_update")
+        layout.prop(self, "led_cache_limit_mb")
+        layout.prop(self, "led_prefetch")
+        layout.prop(self, "led_prefetch_limit_mb")
+        layout.separator()
+        layout.label(text="Formation")
+        layout.prop(self, "pairing_solver")
+        layout.prop(self, "pairing_gap")
 
 
 # ---- (Register core prefs/operators even when deps are missing) ----
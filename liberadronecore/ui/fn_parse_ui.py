@@ -382,6 +382,7 @@ class FN_PT_transition_settings(bpy.types.Panel, FN_Register):
         col.prop(scene, "ld_bakedt_relax_edge_ratio", text="Relax Edge Ratio")
         col.prop(scene, "ld_bakedt_speed_acc_margin", text="Speed/Acc Margin")
         col.prop(scene, "ld_bakedt_max_neighbors", text="Max Neighbors")
+        col.prop(scene, "ld_bakedt_exact_scurve", text="Exact S-Curve")
 
 
 class FN_TransitionSettingsProps(RegisterBase):
@@ -434,6 +435,10 @@ class FN_TransitionSettingsProps(RegisterBase):
             default=bakedt.MAX_NEIGHBORS,
             min=1,
         )
+        bpy.types.Scene.ld_bakedt_exact_scurve = bpy.props.BoolProperty(
+            name="Exact S-Curve",
+            default=bakedt.EXACT_SCURVE,
+        )
 
     @classmethod
     def unregister(cls) -> None:
@@ -447,6 +452,7 @@ class FN_TransitionSettingsProps(RegisterBase):
             "ld_bakedt_relax_edge_ratio",
             "ld_bakedt_speed_acc_margin",
             "ld_bakedt_max_neighbors",
+            "ld_bakedt_exact_scurve",
         ):
             if hasattr(bpy.types.Scene, name):
                 delattr(bpy.types.Scene, name)
@@ -1,106 +1,198 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence, Tuple
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
 
 import bpy
+from bpy.app.handlers import persistent
 import numpy as np
 from mathutils import Vector
 
+from liberadronecore.formation import fn_parse_pairing
 from liberadronecore.system.transition import transition_apply
 from liberadronecore.util import pair_id
 
 
+# Formation reads of recent frames, most recent last. LED evaluation, overlays and
+# checkers of one frame share a single depsgraph read through this history.
+SNAPSHOT_HISTORY = 8
+_SNAPSHOTS: "OrderedDict[Tuple, Dict[str, object]]" = OrderedDict()
+_SNAPSHOT_STATS: Dict[str, int] = {"requests": 0, "reads": 0, "evictions": 0}
+_REVISION = 0
+
+
 def _pair_ids_hash(pair_ids: Optional[Sequence[int]]) -> int:
-    if not pair_ids:
+    if pair_ids is None or len(pair_ids) == 0:
         return 0
-    h = 1469598103934665603
-    for pid in pair_ids:
-        try:
-            val = int(pid)
-        except (TypeError, ValueError):
-            val = 0
-        h ^= val & 0xFFFFFFFFFFFFFFFF
-        h = (h * 1099511628211) & 0xFFFFFFFFFFFFFFFF
-    return h
-
-
-def _order_by_pair_ids(
-    positions: Sequence,
-    pair_ids: Optional[Sequence[int]],
-):
-    if not pair_ids or len(pair_ids) != len(positions):
-        return positions, pair_ids, False
-
-    indices, ok = pair_id.order_indices_by_pair_id(pair_ids)
-    if not ok:
-        return positions, pair_ids, False
+    keys, valid = pair_id.as_int_keys(pair_ids)
+    if not valid.all():
+        keys = np.where(valid, keys, 0)
+    digest = hashlib.blake2b(np.ascontiguousarray(keys).tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def bump_revision() -> None:
+    global _REVISION
+    _REVISION += 1
+
+
+@persistent
+def on_depsgraph_update(_scene, depsgraph) -> None:
+    for update in depsgraph.updates:
+        update_id = getattr(update.id, "original", update.id)
+        if str(getattr(update_id, "name", "")).startswith("ColorVerts"):
+            continue
+        if isinstance(update_id, bpy.types.Collection):
+            bump_revision()
+            return
+        if isinstance(update_id, (bpy.types.Object, bpy.types.Mesh)) and (
+            update.is_updated_geometry or update.is_updated_transform
+        ):
+            bump_revision()
+            return
+
+
+def clear_snapshots() -> None:
+    _SNAPSHOTS.clear()
+
+
+def snapshot_stats() -> Dict[str, int]:
+    stats = dict(_SNAPSHOT_STATS)
+    stats["hits"] = stats["requests"] - stats["reads"]
+    stats["cached"] = len(_SNAPSHOTS)
+    return stats
+
+
+def _readonly(values):
+    if values is None:
+        return None
+    arr = np.ascontiguousarray(values)
+    arr.flags.writeable = False
+    return arr
+
+
+def _id_array(values) -> Optional[np.ndarray]:
+    if values is None or len(values) == 0:
+        return None
+    return _readonly(np.asarray(values, dtype=np.int64))
+
+
+def _frame_snapshot(scene, depsgraph, col, frame: int) -> Dict[str, object]:
+    meshes = fn_parse_pairing._collect_mesh_objects(col)
+    view_layer = getattr(depsgraph, "view_layer", None)
+    key = (
+        scene.name if scene else "",
+        col.name,
+        getattr(view_layer, "name", ""),
+        int(frame),
+        _REVISION,
+        tuple(obj.name for obj in meshes),
+    )
+    _SNAPSHOT_STATS["requests"] += 1
+    snap = _SNAPSHOTS.get(key)
+    if snap is not None:
+        _SNAPSHOTS.move_to_end(key)
+        return snap
 
-    if isinstance(positions, np.ndarray):
-        ordered_positions = positions[np.asarray(indices, dtype=np.int64)]
-    else:
-        ordered_positions = [positions[idx] for idx in indices]
-    ordered_pair_ids = [pair_ids[idx] for idx in indices]
-    return ordered_positions, ordered_pair_ids, True
+    positions, pair_ids, form_ids = transition_apply._read_collection_arrays(
+        col,
+        depsgraph,
+        collect_form_ids=True,
+    )
+    _SNAPSHOT_STATS["reads"] += 1
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    snap = {
+        "positions": _readonly(positions),
+        "pair_ids": _id_array(pair_ids),
+        "form_ids": _id_array(form_ids),
+    }
+    _SNAPSHOTS[key] = snap
+    while len(_SNAPSHOTS) > SNAPSHOT_HISTORY:
+        _SNAPSHOTS.popitem(last=False)
+        _SNAPSHOT_STATS["evictions"] += 1
+    return snap
+
+
+def _snapshot_order(snap: Dict[str, object]) -> Optional[np.ndarray]:
+    if "order" not in snap:
+        order = None
+        pair_ids = snap["pair_ids"]
+        if pair_ids is not None and len(pair_ids) == len(snap["positions"]):
+            indices, ok = pair_id.order_indices_by_pair_id(pair_ids)
+            if ok:
+                order = _readonly(np.asarray(indices, dtype=np.int64))
+        snap["order"] = order
+    return snap["order"]
+
+
+def _snapshot_hash(snap: Dict[str, object], sorted_ids: bool) -> int:
+    key = ("hash", sorted_ids)
+    if key not in snap:
+        pair_ids = snap["pair_ids"]
+        if sorted_ids and pair_ids is not None:
+            pair_ids = pair_ids[snap["order"]]
+        snap[key] = _pair_ids_hash(pair_ids)
+    return snap[key]
+
+
+def _empty_signature(scene):
+    return (
+        ("__scene__", scene.name if scene else ""),
+        ("__vert_count__", 0),
+        ("__pair_sort__", 0),
+    )
 
 
-def collect_formation_positions(
-    scene: bpy.types.Scene,
-    depsgraph: bpy.types.Depsgraph,
-    *,
-    collection_name: str = "Formation",
-    sort_by_pair_id: bool = False,
-    include_signature: bool = False,
-    as_numpy: bool = False,
+def _snapshot_outputs(
+    scene,
+    depsgraph,
+    collection_name: str,
+    sort_by_pair_id: bool,
+    include_signature: bool,
+    as_numpy: bool,
 ):
     col = bpy.data.collections.get(collection_name)
     if col is None:
         positions = np.empty((0, 3), dtype=np.float32) if as_numpy else []
-        signature = None
-        if include_signature:
-            signature = (
-                ("__scene__", scene.name if scene else ""),
-                ("__vert_count__", 0),
-                ("__pair_sort__", 0),
-            )
-        return positions, None, signature
+        signature = _empty_signature(scene) if include_signature else None
+        return positions, None, None, signature
 
     frame = int(getattr(scene, "frame_current", 0)) if scene else 0
-    positions, pair_ids, _ = transition_apply._collect_positions_for_collection(
-        col,
-        frame,
-        depsgraph,
-        as_numpy=as_numpy,
-    )
-
-    if positions is None or len(positions) == 0:
+    snap = _frame_snapshot(scene, depsgraph, col, frame)
+    positions = snap["positions"]
+    if len(positions) == 0:
         positions = np.empty((0, 3), dtype=np.float32) if as_numpy else []
-        signature = None
-        if include_signature:
-            signature = (
-                ("__scene__", scene.name if scene else ""),
-                ("__vert_count__", 0),
-                ("__pair_sort__", 0),
-            )
-        return positions, None, signature
-
-    pair_sort = False
-    if sort_by_pair_id:
-        positions, pair_ids, pair_sort = _order_by_pair_ids(positions, pair_ids)
+        signature = _empty_signature(scene) if include_signature else None
+        return positions, None, None, signature
+
+    pair_ids = snap["pair_ids"]
+    form_ids = snap["form_ids"]
+    order = _snapshot_order(snap) if sort_by_pair_id else None
+    if order is not None:
+        positions = positions[order]
+        pair_ids = pair_ids[order]
+        if form_ids is not None and len(form_ids) == len(order):
+            form_ids = form_ids[order]
 
     signature = None
     if include_signature:
-        pair_hash = _pair_ids_hash(pair_ids)
         signature = (
             ("__scene__", scene.name if scene else ""),
             ("__vert_count__", len(positions)),
-            ("__pair_sort__", 1 if pair_sort else 0),
-            ("__pair_hash__", pair_hash),
+            ("__pair_sort__", 1 if order is not None else 0),
+            ("__pair_hash__", _snapshot_hash(snap, order is not None)),
         )
 
-    return positions, pair_ids, signature
+    # Positions stay shared and read-only; id lists are handed out as fresh lists.
+    if not as_numpy:
+        positions = [Vector(co) for co in positions.tolist()]
+    pair_ids = pair_ids.tolist() if pair_ids is not None else None
+    form_ids = form_ids.tolist() if form_ids is not None else None
+    return positions, pair_ids, form_ids, signature
 
 
-def collect_formation_positions_with_form_ids(
+def collect_formation_positions(
     scene: bpy.types.Scene,
     depsgraph: bpy.types.Depsgraph,
     *,
@@ -109,59 +201,31 @@ def collect_formation_positions_with_form_ids(
     include_signature: bool = False,
     as_numpy: bool = False,
 ):
-    col = bpy.data.collections.get(collection_name)
-    if col is None:
-        positions = np.empty((0, 3), dtype=np.float32) if as_numpy else []
-        signature = None
-        if include_signature:
-            signature = (
-                ("__scene__", scene.name if scene else ""),
-                ("__vert_count__", 0),
-                ("__pair_sort__", 0),
-            )
-        return positions, None, None, signature
-
-    frame = int(getattr(scene, "frame_current", 0)) if scene else 0
-    positions, pair_ids, form_ids = transition_apply._collect_positions_for_collection(
-        col,
-        frame,
+    positions, pair_ids, _form_ids, signature = _snapshot_outputs(
+        scene,
         depsgraph,
-        collect_form_ids=True,
-        as_numpy=as_numpy,
+        collection_name,
+        sort_by_pair_id,
+        include_signature,
+        as_numpy,
     )
+    return positions, pair_ids, signature
 
-    if positions is None or len(positions) == 0:
-        positions = np.empty((0, 3), dtype=np.float32) if as_numpy else []
-        signature = None
-        if include_signature:
-            signature = (
-                ("__scene__", scene.name if scene else ""),
-                ("__vert_count__", 0),
-                ("__pair_sort__", 0),
-            )
-        return positions, None, None, signature
-
-    pair_sort = False
-    if sort_by_pair_id:
-        indices, ok = pair_id.order_indices_by_pair_id(pair_ids)
-        if ok:
-            if isinstance(positions, np.ndarray):
-                positions = positions[np.asarray(indices, dtype=np.int64)]
-            else:
-                positions = [positions[idx] for idx in indices]
-            pair_ids = [pair_ids[idx] for idx in indices] if pair_ids else pair_ids
-            if form_ids:
-                form_ids = [form_ids[idx] for idx in indices]
-            pair_sort = True
-
-    signature = None
-    if include_signature:
-        pair_hash = _pair_ids_hash(pair_ids)
-        signature = (
-            ("__scene__", scene.name if scene else ""),
-            ("__vert_count__", len(positions)),
-            ("__pair_sort__", 1 if pair_sort else 0),
-            ("__pair_hash__", pair_hash),
-        )
 
-    return positions, pair_ids, form_ids, signature
+def collect_formation_positions_with_form_ids(
+    scene: bpy.types.Scene,
+    depsgraph: bpy.types.Depsgraph,
+    *,
+    collection_name: str = "Formation",
+    sort_by_pair_id: bool = False,
+    include_signature: bool = False,
+    as_numpy: bool = False,
+):
+    return _snapshot_outputs(
+        scene,
+        depsgraph,
+        collection_name,
+        sort_by_pair_id,
+        include_signature,
+        as_numpy,
+    )
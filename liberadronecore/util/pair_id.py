@@ -1,3 +1,10 @@
+import numpy as np
+
+
+_INT64_MIN = int(np.iinfo(np.int64).min)
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+
 def order_items_by_pair_id(items, pair_ids):
     if pair_ids is None or len(items) != len(pair_ids):
         return items
@@ -14,24 +21,38 @@ def order_items_by_pair_id(items, pair_ids):
     return ordered
 
 
-def order_indices_by_pair_id(pair_ids):
-    if not pair_ids:
-        return [], False
-    paired = []
-    fallback = []
+def as_int_keys(pair_ids):
+    """Pair ids as an int64 array plus a mask of the entries that converted like ``int(pid)``."""
+    arr = np.asarray(pair_ids)
+    if arr.ndim == 1 and arr.dtype.kind in "biu":
+        keys = arr.astype(np.int64, copy=False)
+        return keys, np.ones(keys.shape, dtype=bool)
+    count = len(pair_ids)
+    keys = np.zeros((count,), dtype=np.int64)
+    valid = np.zeros((count,), dtype=bool)
     for idx, pid in enumerate(pair_ids):
         try:
             key = int(pid)
         except (TypeError, ValueError):
-            key = None
-        if key is None:
-            fallback.append(idx)
-        else:
-            paired.append((key, idx))
-    if not paired:
+            continue
+        # int() overflowing (inf) propagates as in the scalar code; ints beyond int64 saturate.
+        keys[idx] = min(max(key, _INT64_MIN), _INT64_MAX)
+        valid[idx] = True
+    return keys, valid
+
+
+def order_indices_by_pair_id(pair_ids):
+    if pair_ids is None or len(pair_ids) == 0:
         return [], False
-    paired.sort(key=lambda item: (item[0], item[1]))
-    return [idx for _key, idx in paired] + fallback, True
+    keys, valid = as_int_keys(pair_ids)
+    paired = np.flatnonzero(valid)
+    if paired.size == 0:
+        return [], False
+    # A stable sort keeps equal ids in source order, like sorting on (key, idx).
+    paired = paired[np.argsort(keys[paired], kind="stable")]
+    if paired.size != valid.size:
+        paired = np.concatenate((paired, np.flatnonzero(~valid)))
+    return paired.tolist(), True
 
 
 def build_pair_id_map(pair_ids):
@@ -74,17 +95,46 @@ def is_pair_id_permutation_lenient(pair_ids, count: int) -> bool:
     return True
 
 
+def _inverse_map_error(keys: np.ndarray, count: int):
+    # Report whichever problem a source-order scan would have hit first.
+    src = np.arange(keys.size, dtype=np.int64)
+    in_range = (keys >= 0) & (keys < count)
+    first_bad = int(np.argmin(in_range)) if not in_range.all() else keys.size
+    first_seen = np.full((count,), keys.size, dtype=np.int64)
+    np.minimum.at(first_seen, keys[in_range], src[in_range])
+    repeated = in_range.copy()
+    repeated[in_range] = first_seen[keys[in_range]] != src[in_range]
+    first_dup = int(np.argmax(repeated)) if repeated.any() else keys.size
+    if first_bad < first_dup:
+        return "pair_id out of range"
+    if first_dup < keys.size:
+        return "duplicate pair_id"
+    return None
+
+
 def build_inverse_map(pair_ids, count: int):
     if pair_ids is None or len(pair_ids) != count:
         raise ValueError("pair_ids length mismatch")
-    inv = [None] * count
-    for src_idx, pid in enumerate(pair_ids):
-        key = int(pid)
-        if key < 0 or key >= count:
-            raise ValueError("pair_id out of range")
-        if inv[key] is not None:
-            raise ValueError("duplicate pair_id")
-        inv[key] = src_idx
-    if any(idx is None for idx in inv):
-        raise ValueError("pair_ids must cover all positions")
-    return inv
+    arr = np.asarray(pair_ids)
+    if arr.ndim == 1 and arr.dtype.kind in "biu":
+        keys = arr.astype(np.int64, copy=False)
+    else:
+        keys = []
+        for pid in pair_ids:
+            try:
+                key = int(pid)
+            except (TypeError, ValueError, OverflowError):
+                message = _inverse_map_error(np.asarray(keys, dtype=np.int64), count)
+                if message:
+                    raise ValueError(message) from None
+                raise
+            # Ids beyond int64 are out of range as well; keep them from overflowing the array.
+            keys.append(key if 0 <= key < count else -1)
+        keys = np.asarray(keys, dtype=np.int64)
+    message = _inverse_map_error(keys, count)
+    if message:
+        raise ValueError(message)
+    # Length matches and ids are unique and in range, so every position is covered.
+    inv = np.empty((count,), dtype=np.int64)
+    inv[keys] = np.arange(count, dtype=np.int64)
+    return inv.tolist()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import bpy
+
+
+# Modifiers whose result only depends on their (animatable) settings, never on the frame.
+STATIC_MODIFIERS = frozenset({
+    'ARRAY', 'BEVEL', 'DECIMATE', 'EDGE_SPLIT', 'MIRROR', 'REMESH',
+    'SMOOTH', 'SOLIDIFY', 'SUBSURF', 'TRIANGULATE', 'WEIGHTED_NORMAL', 'WELD',
+})
+
+# Objects a static modifier reads; its result follows them, so they must be static too.
+_MODIFIER_OBJECT_REFS = {
+    'ARRAY': ("offset_object", "start_cap", "end_cap", "curve"),
+    'MIRROR': ("mirror_object",),
+}
+
+
+def has_animation(id_data) -> bool:
+    anim = getattr(id_data, "animation_data", None)
+    if anim is None:
+        return False
+    return anim.action is not None or len(anim.drivers) > 0 or len(anim.nla_tracks) > 0
+
+
+def is_time_static(obj: bpy.types.Object, world: bool = True, visited: Optional[set] = None) -> bool:
+    """True when nothing keyed or driven can change ``obj`` from one frame to the next.
+
+    With ``world=False`` only the evaluated local mesh has to hold still, so parents
+    and constraints are ignored unless a modifier reads another object's placement.
+    """
+    if visited is None:
+        visited = set()
+    while obj is not None:
+        if obj.name in visited:
+            return True
+        visited.add(obj.name)
+        # Object animation also covers keyed modifier settings.
+        if has_animation(obj):
+            return False
+        refs = []
+        for mod in obj.modifiers:
+            if mod.type not in STATIC_MODIFIERS:
+                return False
+            for attr in _MODIFIER_OBJECT_REFS.get(mod.type, ()):
+                ref = getattr(mod, attr, None)
+                if ref is not None:
+                    refs.append(ref)
+        if any(not is_time_static(ref, True, visited) for ref in refs):
+            return False
+        data = getattr(obj, "data", None)
+        if data is not None:
+            if has_animation(data):
+                return False
+            shape_keys = getattr(data, "shape_keys", None)
+            if shape_keys is not None and has_animation(shape_keys):
+                return False
+        if refs:
+            # The referenced objects are read relative to this one.
+            world = True
+        if not world:
+            return True
+        if len(obj.constraints) > 0:
+            return False
+        obj = obj.parent
+    return True
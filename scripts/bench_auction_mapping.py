@@ -0,0 +1,41 @@
+import numpy as np
+
+from liberadronecore.system.drone import auction_mapping
+
+
+# Settings
+POINT_COUNTS = (1000, 2000, 10000)
+GAP = 0.01
+WORKERS = -1
+SEED = 0
+
+
+def _cases(rng, count):
+    grid = rng.random((count, 3)) * 50.0
+    yield "shuffle", grid, grid[rng.permutation(count)] + rng.normal(scale=2.0, size=(count, 3))
+    yield "shift", grid, rng.random((count, 3)) * 50.0 + np.array((30.0, 0.0, 0.0))
+    theta = rng.random(count) * 2.0 * np.pi
+    phi = np.arccos(rng.random(count) * 2.0 - 1.0)
+    sphere = np.stack((np.sin(phi) * np.cos(theta), np.sin(phi) * np.sin(theta), np.cos(phi)), axis=1) * 30.0
+    plane = np.concatenate((rng.random((count, 2)) * 80.0, np.zeros((count, 1))), axis=1)
+    yield "plane->sphere", plane, sphere
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    for count in POINT_COUNTS:
+        for name, P, Q in _cases(rng, count):
+            report = auction_mapping.compare_solvers(P, Q, gap=GAP, workers=WORKERS)
+            line = (
+                f"{count:>6} {name:<14} auction {report['auction_seconds']:8.2f} s"
+                f"  phases {report['phases']:3d}  repairs {report['repairs']:4d}"
+            )
+            if "exact_seconds" in report:
+                line += f"  exact {report['exact_seconds']:8.2f} s  gap {report['gap'] * 100.0:6.3f} %"
+            else:
+                bound_gap = report["cost"] / max(report["lower_bound"], 1e-12) - 1.0
+                line += f"  certified gap <= {bound_gap * 100.0:6.3f} %"
+            print(line)
+
+
+main()
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+
+from liberadronecore.formation import greedy_pairing
+
+
+# Settings
+POINT_COUNTS = (1000, 5000, 10000)
+JITTER = 2.0
+EXTENT = 50.0
+SEED = 0
+# The per-vertex find_n loop is quadratic; only time it up to this size.
+BASELINE_MAX = 2000
+
+
+def _find_n_pairing(prev_pts, cur_pts):
+    from mathutils import Vector
+    from mathutils.kdtree import KDTree
+
+    kd = KDTree(len(prev_pts))
+    for i, co in enumerate(prev_pts):
+        kd.insert(Vector(co), i)
+    kd.balance()
+    used = set()
+    result = np.arange(len(cur_pts), dtype=np.int64)
+    for idx, co in enumerate(cur_pts):
+        for (_, pidx, _) in kd.find_n(Vector(co), len(prev_pts)):
+            if pidx not in used:
+                result[idx] = pidx
+                break
+        used.add(int(result[idx]))
+    return result
+
+
+def _baseline_available() -> bool:
+    try:
+        import mathutils  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    use_baseline = _baseline_available()
+    for count in POINT_COUNTS:
+        prev_pts = rng.random((count, 3)) * EXTENT
+        cur_pts = prev_pts[rng.permutation(count)] + rng.normal(scale=JITTER, size=(count, 3))
+
+        start = time.perf_counter()
+        pairing = greedy_pairing.greedy_nearest_pairing(prev_pts, cur_pts)
+        elapsed = time.perf_counter() - start
+        line = f"{count:>6} points  greedy_nearest_pairing {elapsed * 1000.0:9.1f} ms"
+
+        if use_baseline and count <= BASELINE_MAX:
+            start = time.perf_counter()
+            baseline = _find_n_pairing(prev_pts, cur_pts)
+            base_elapsed = time.perf_counter() - start
+            mismatches = int(np.count_nonzero(baseline != pairing))
+            line += f"  find_n {base_elapsed * 1000.0:9.1f} ms  mismatches {mismatches}"
+        print(line)
+
+
+main()
@@ -0,0 +1,45 @@
+import os
+import time
+
+import numpy as np
+
+from liberadronecore.system.transition import bakedt
+
+
+# Settings
+TRANSITIONS = 4
+DRONE_COUNT = 2000
+FRAMES = 240
+FPS = 24.0
+SEED = 0
+
+
+def _jobs(rng):
+    jobs = []
+    for _ in range(TRANSITIONS):
+        start = rng.random((DRONE_COUNT, 3)) * 40.0
+        end = start[rng.permutation(DRONE_COUNT)] + np.array((0.0, 0.0, 20.0))
+        jobs.append(bakedt.adaptive_pose_job(start, end, 0, FRAMES, FPS, scene=None))
+    return jobs
+
+
+def main():
+    jobs = _jobs(np.random.default_rng(SEED))
+    t0 = time.perf_counter()
+    serial = [bakedt.run_pose_job(job, workers=-1) for job in jobs]
+    serial_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    parallel = bakedt.prefetch_adaptive_poses(jobs)
+    parallel_s = time.perf_counter() - t0
+    same = all(
+        np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+        for a, b in zip(serial, parallel)
+    )
+    print(
+        f"{TRANSITIONS} x {DRONE_COUNT} drones on {os.cpu_count()} cores:"
+        f" serial {serial_s:7.2f} s  prefetch {parallel_s:7.2f} s"
+        f"  speed-up {serial_s / max(parallel_s, 1e-9):5.2f}x  identical {same}"
+    )
+
+
+main()
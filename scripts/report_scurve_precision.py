@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+
+from liberadronecore.system.transition import scurve
+
+
+# Settings
+# (distance m, duration s, v_max m/s, a_max m/s^2, j_max m/s^3)
+CURVES = (
+    (10.0, 10.0, 2.0, 8.0, 36.0),
+    (40.0, 20.0, 2.0, 8.0, 36.0),
+    (120.0, 30.0, 5.0, 4.0, 36.0),
+)
+FRAMES = 480
+DRONES = 5000
+SEED = 0
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    for L, T, v_max, a_max, j_max in CURVES:
+        report = scurve.precision_report(L, T, v_max, a_max, j_max)
+        line = f"L={L:6.1f} T={T:5.1f}"
+        if report["exact_available"]:
+            line += (
+                f"  table s error max {report['s_max_error'] * 1000.0:7.3f} mm"
+                f" ({report['s_relative_error'] * 100.0:.4f} %)"
+                f"  v error max {report['v_max_error'] * 1000.0:7.3f} mm/s"
+            )
+        else:
+            line += "  velocity clamp engages, table only"
+        progress = rng.random((FRAMES, DRONES)) * T
+        for exact in (False, True):
+            table = scurve.build_table(L, T, v_max, a_max, j_max, exact=exact)
+            start = time.perf_counter()
+            scurve.evaluate(table, progress, "s")
+            line += f"  {'exact' if exact else 'table'} {(time.perf_counter() - start) * 1000.0:7.1f} ms"
+        print(line)
+
+
+main()